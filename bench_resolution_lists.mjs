@@ -0,0 +1,107 @@
+// Benchmark the web extension's resolution list construction under Node.
+//
+// Builds a synthetic presets payload with 1k and 10k labels per model and times a
+// model switch the pre-memoization way (rebuild the list, Array.includes lookups)
+// against the memoized lists, plus picker filtering and windowing.
+//
+// Usage:
+//     node bench_resolution_lists.mjs
+//     node bench_resolution_lists.mjs --sizes 1000,10000,100000
+
+import { performance } from "node:perf_hooks";
+import {
+    createResolutionLists,
+    filterEntries,
+    getDefaultResolution,
+    getResolutionsForModel,
+    visibleRange,
+} from "./web/js/resolution_lists.js";
+
+const MODELS = ["Flux", "Qwen Image", "Z-Image", "SD 1.5", "SDXL", "All"];
+
+function gcd(a, b) {
+    return b ? gcd(b, a % b) : a;
+}
+
+function label(width, height) {
+    const divisor = gcd(width, height);
+    const orientation = width === height ? "Square" : width > height ? "Landscape" : "Portrait";
+    return `${`${width}x${height}`.padEnd(12)} (${width / divisor}:${height / divisor} ${orientation})`;
+}
+
+function syntheticPresets(count) {
+    const presets = { models: MODELS, resolutions: {}, buckets: {}, defaults: {} };
+    MODELS.forEach((model, m) => {
+        const labels = [];
+        for (let i = 0; labels.length < count; i++) {
+            labels.push(label(512 + 8 * ((i + m) % 512), 512 + 8 * Math.floor(i / 512)));
+        }
+        presets.resolutions[model] = labels.slice(0, count / 2);
+        presets.buckets[model] = labels.slice(count / 4);
+        presets.defaults[model] = labels[count - 1];
+    });
+    return presets;
+}
+
+function time(func, minSeconds = 0.2) {
+    const samples = [];
+    const deadline = performance.now() + minSeconds * 1000;
+    while (samples.length < 20 || performance.now() < deadline) {
+        const started = performance.now();
+        func();
+        samples.push((performance.now() - started) * 1000);
+    }
+    samples.sort((a, b) => a - b);
+    return { p50: samples[samples.length >> 1], p90: samples[Math.floor(samples.length * 0.9)] };
+}
+
+function switchUncached(presets, model) {
+    const resolutions = getResolutionsForModel(presets, model, "both");
+    const defaultRes = getDefaultResolution(presets, model);
+    return resolutions.includes(defaultRes) || resolutions.includes(resolutions[resolutions.length >> 1]);
+}
+
+function switchMemoized(lists, model) {
+    const resolutions = lists.labels(model, "both");
+    return lists.has(model, "both", lists.defaultFor(model)) || lists.has(model, "both", resolutions[resolutions.length >> 1]);
+}
+
+function main(argv) {
+    const sizesIndex = argv.indexOf("--sizes");
+    const sizes = sizesIndex >= 0 ? argv[sizesIndex + 1].split(",").map(Number) : [1000, 10000];
+
+    console.log(`${"case".padEnd(40)}${"p50 us".padStart(12)}${"p90 us".padStart(12)}`);
+    for (const size of sizes) {
+        const presets = syntheticPresets(size);
+        const lists = createResolutionLists(presets);
+        let m = 0;
+        const cases = [
+            ["switch model (rebuild)", () => switchUncached(presets, MODELS[m++ % MODELS.length])],
+            ["switch model (memoized)", () => switchMemoized(lists, MODELS[m++ % MODELS.length])],
+            ["picker entries (cold parse)", () => createResolutionLists(presets).entries("SDXL", "both")],
+            ["picker filter '16:9 >1mp'", () => filterEntries(lists.entries("SDXL", "both"), "16:9 >1mp")],
+            ["picker filter 'portrait 1024'", () => filterEntries(lists.entries("SDXL", "both"), "portrait 1024")],
+            ["picker window", () => visibleRange(12345, 360, 24, lists.entries("SDXL", "both").length)],
+        ];
+
+        // Memoized lists must match a fresh rebuild for every model and source
+        for (const model of MODELS) {
+            for (const source of ["presets", "buckets", "both"]) {
+                const expected = getResolutionsForModel(presets, model, source);
+                const actual = lists.labels(model, source);
+                if (actual.length !== expected.length || actual.some((value, i) => value !== expected[i])) {
+                    throw new Error(`Memoized ${model}/${source} list differs from a rebuild`);
+                }
+            }
+        }
+
+        for (const [name, func] of cases) {
+            const { p50, p90 } = time(func);
+            console.log(`${`${name} [${size}]`.padEnd(40)}${p50.toFixed(2).padStart(12)}${p90.toFixed(2).padStart(12)}`);
+        }
+        const window = visibleRange(12345, 360, 24, lists.entries("SDXL", "both").length);
+        console.log(`  rendered rows: ${window.end - window.start} of ${lists.entries("SDXL", "both").length}`);
+    }
+}
+
+main(process.argv.slice(2));
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression suite for ResolutionSelector hot paths.
+
+Runs against real (CPU) torch and reports latency percentiles, Python allocations per
+call and peak RSS for each case. Results can be saved as a baseline and later checked
+against it with a regression threshold.
+
+Usage:
+    python bench_resolution_selector.py                      # run and print results
+    python bench_resolution_selector.py --save-baseline      # write bench_baseline.json
+    python bench_resolution_selector.py --check              # fail if slower than baseline
+    python bench_resolution_selector.py --filter select --threshold 2.0
+"""
+
+import argparse
+import itertools
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import torch
+
+from resolution_selector import (
+    ResolutionSelector,
+    format_resolution,
+    get_all_resolutions,
+    get_default_resolution,
+    parse_resolution_string,
+    MODEL_RESOLUTIONS
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# Grid for end-to-end select_resolution cases
+GRID_MODELS = list(MODEL_RESOLUTIONS.keys())
+GRID_MULTIPLIERS = ["1x", "2x", "4x"]
+GRID_BATCH_SIZES = [1, 4, 16]
+
+
+def build_cases():
+    """
+    Build the benchmark cases.
+
+    Returns:
+        list: (name, callable) pairs, or (name, callable, setup) where setup runs untimed before each call
+    """
+    labels = get_all_resolutions()
+    dimensions = [parse_resolution_string(label) for label in labels]
+    node = ResolutionSelector()
+
+    cases = [
+        ("INPUT_TYPES", ResolutionSelector.INPUT_TYPES),
+        ("get_all_resolutions", get_all_resolutions),
+        ("parse_resolution_string[all]", lambda: [parse_resolution_string(label) for label in labels]),
+        ("format_resolution[all]", lambda: [format_resolution(w, h) for w, h in dimensions]),
+    ]
+
+    for model in GRID_MODELS:
+        resolution = get_default_resolution(model)
+        for multiplier in GRID_MULTIPLIERS:
+            for batch_size in GRID_BATCH_SIZES:
+                name = f"select_resolution[{model}|{multiplier}|b{batch_size}]"
+                cases.append((name, lambda r=resolution, m=model, x=multiplier, b=batch_size:
+                              node.select_resolution(m, r, x, b)))
+
+    # Cold path: empty pool on every call, so each run pays allocation and zero-fill
+    def select_cold():
+        ResolutionSelector._latent_pool.clear()
+        node.select_resolution("SDXL", get_default_resolution("SDXL"), "2x", 4)
+
+    cases.append(("select_resolution[cold|SDXL|2x|b4]", select_cold))
+
+    # Allocation options at the largest grid point: half-size dtype, fresh buffers, zero-stride views
+    resolution = get_default_resolution("SDXL")
+    for name, options in [
+        ("fp16", {"latent_dtype": "fp16"}),
+        ("eager", {"allocation": "eager"}),
+        ("lazy", {"allocation": "lazy"}),
+    ]:
+        cases.append((f"select_resolution[{name}|SDXL|4x|b16]", lambda o=options:
+                      node.select_resolution("SDXL", resolution, "4x", 16, **o)))
+
+    # Noise mode over a seed sweep: inline generation vs the next seeds pre-generated in the background.
+    # The prefetch case waits (untimed) for the background work before every call, so it measures a
+    # guaranteed hit instead of racing the worker thread; that makes it the idle-time best case
+    for prefetch in (0, 4):
+        seeds = itertools.count()
+        case = (f"select_resolution[noise-p{prefetch}|SDXL|1x|b4]", lambda p=prefetch, s=seeds:
+                node.select_resolution("SDXL", resolution, "1x", 4, latent_mode="noise",
+                                       noise_prefetch=p, latent_seed=next(s)))
+        cases.append(case + (node._noise_prefetcher.wait,) if prefetch else case)
+    return cases
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at the given fraction of a sorted list (nearest rank)."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_case(func, setup=None, min_iterations=20, min_seconds=0.2, warmup=3):
+    """
+    Time one case and measure its allocations.
+
+    Args:
+        func (callable): Operation to benchmark
+        setup (callable, optional): Untimed call made before every run of func
+        min_iterations (int): Minimum timed iterations
+        min_seconds (float): Minimum total timed duration
+        warmup (int): Untimed iterations before measuring
+
+    Returns:
+        dict: p50_us, p90_us, p99_us, iterations, alloc_bytes, alloc_blocks, peak_rss_kb
+    """
+    setup = setup or (lambda: None)
+    for _ in range(warmup):
+        setup()
+        func()
+
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < min_iterations or time.perf_counter() - started < min_seconds:
+        setup()
+        t0 = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - t0) / 1000)
+    samples.sort()
+
+    # Separate pass for allocations since tracing slows every call down
+    tracemalloc.start()
+    setup()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    alloc_bytes = sum(max(stat.size_diff, 0) for stat in stats)
+    alloc_blocks = sum(max(stat.count_diff, 0) for stat in stats)
+
+    return {
+        "p50_us": round(percentile(samples, 0.50), 2),
+        "p90_us": round(percentile(samples, 0.90), 2),
+        "p99_us": round(percentile(samples, 0.99), 2),
+        "iterations": len(samples),
+        "alloc_bytes": alloc_bytes,
+        "alloc_blocks": alloc_blocks,
+        # ru_maxrss is the process-wide high-water mark in KiB on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def check_regressions(results, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Case name -> measurements from run_case
+        baseline (dict): Case name -> measurements from a previous run
+        threshold (float): Allowed ratio of current to baseline p50 latency
+
+    Returns:
+        list: Human readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p50_us"] > previous["p50_us"] * threshold:
+            regressions.append(
+                f"{name}: p50 {current['p50_us']:.1f}us vs baseline {previous['p50_us']:.1f}us "
+                f"(x{current['p50_us'] / previous['p50_us']:.2f} > x{threshold})"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ResolutionSelector hot paths")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--check", action="store_true", help="Fail if any case regresses past the threshold")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Allowed p50 slowdown ratio (default: 1.5)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    torch.set_num_threads(1)
+    results = {}
+    for name, func, *setup in build_cases():
+        if args.filter in name:
+            results[name] = run_case(func, *setup)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'case':<48}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'alloc B':>10}{'rss MiB':>9}")
+        for name, result in results.items():
+            print(f"{name:<48}{result['p50_us']:>10.1f}{result['p90_us']:>10.1f}{result['p99_us']:>10.1f}"
+                  f"{result['alloc_bytes']:>10}{result['peak_rss_kb'] / 1024:>9.1f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = check_regressions(results, baseline, args.threshold)
+        if regressions:
+            print("\n✗ REGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n✓ No regressions beyond x{args.threshold} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
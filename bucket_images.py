@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Assign images to the nearest model preset from their headers alone.
+
+Reads PNG, JPEG and WebP dimensions without decoding pixels, fans the work out over a
+process pool and streams one JSONL or CSV row per image with the chosen bucket and the
+crop (or pad) needed after scaling. Per-bucket counts and throughput are printed to
+stderr when done. Memory stays bounded: the directory is walked lazily and only a fixed
+number of chunks are in flight at once.
+
+Usage:
+    python bucket_images.py /data/images --model SDXL > buckets.jsonl
+    python bucket_images.py /data/images --model Flux --fit pad --format csv -o buckets.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from resolution_presets import (
+    RESOLUTION_SOURCES,
+    calculate_aspect_ratio,
+    nearest_resolution,
+    MODEL_RESOLUTIONS
+)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+# JPEG start-of-frame markers carrying dimensions (excludes DHT C4, JPG C8 and DAC CC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# EXIF orientations 5-8 rotate the stored image by 90 degrees, swapping width and height
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+OUTPUT_FIELDS = [
+    "path", "width", "height", "aspect_ratio", "bucket", "bucket_width", "bucket_height",
+    "scale", "crop_x", "crop_y", "pad_x", "pad_y", "error"
+]
+
+
+def _read_png_size(f, header):
+    """PNG: IHDR is always the first chunk, width and height follow its type."""
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def _read_webp_size(f, header):
+    """WebP: dimensions live in the VP8, VP8L or VP8X chunk header."""
+    chunk = header[12:16]
+    if len(header) < (25 if chunk == b"VP8L" else 30):
+        return None
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return (width, height)
+    if chunk == b"VP8L":
+        bits = int.from_bytes(header[21:25], "little")
+        return ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return (width & 0x3FFF, height & 0x3FFF)
+    return None
+
+
+def _read_exif_orientation(payload):
+    """EXIF APP1 payload: the IFD0 Orientation tag (1-8), or None if absent or malformed."""
+    tiff = payload[6:]
+    if not payload.startswith(b"Exif\x00\x00") or len(tiff) < 8 or tiff[:2] not in (b"II", b"MM"):
+        return None
+    endian = "<" if tiff[:2] == b"II" else ">"
+    offset = struct.unpack(endian + "I", tiff[4:8])[0]
+    if offset + 2 > len(tiff):
+        return None
+    count = struct.unpack(endian + "H", tiff[offset:offset + 2])[0]
+    for entry in range(offset + 2, min(offset + 2 + count * 12, len(tiff) - 11), 12):
+        tag, _, _, value = struct.unpack(endian + "HHI2s", tiff[entry:entry + 10])
+        if tag == EXIF_ORIENTATION_TAG:
+            return struct.unpack(endian + "H", value)[0]
+    return None
+
+
+def _read_jpeg_size(f, header):
+    """JPEG: walk marker segments (seeking past their payloads) until a start-of-frame.
+    EXIF orientations 5-8 display the image rotated by 90 degrees, so they swap the size."""
+    f.seek(2)
+    orientation = None
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        # Fill bytes and standalone markers have no length field
+        if code == 0xFF:
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code in (0x01,) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2:
+            return None
+        if code in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            if orientation in EXIF_TRANSPOSED_ORIENTATIONS:
+                return (height, width)
+            return (width, height)
+        if code == 0xE1 and orientation is None:
+            # APP1: EXIF comes before the frame, so its orientation is known by the SOF
+            orientation = _read_exif_orientation(f.read(length - 2))
+            continue
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_size(path):
+    """
+    Read image dimensions from the file header without decoding pixels.
+
+    Args:
+        path (str): Path to a PNG, JPEG or WebP file
+
+    Returns:
+        tuple or None: (width, height) as displayed, or None if the format is unsupported or malformed
+
+    Raises:
+        OSError: If the file cannot be read
+        struct.error: If a header field is cut short
+    """
+    with open(path, "rb") as f:
+        header = f.read(32)
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            size = _read_png_size(f, header)
+        elif header.startswith(b"\xff\xd8"):
+            size = _read_jpeg_size(f, header)
+        elif header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            size = _read_webp_size(f, header)
+        else:
+            size = None
+    if size is None or size[0] <= 0 or size[1] <= 0:
+        return None
+    return size
+
+
+def assign_bucket(path, model, fit="crop", source="presets"):
+    """
+    Match one image to its nearest preset and compute the crop or pad after scaling.
+
+    Args:
+        path (str): Image path
+        model (str): Model whose presets to match against
+        fit (str): "crop" scales to cover the bucket and crops the overflow,
+            "pad" scales to fit inside the bucket and pads the remainder
+        source (str): Resolution list to match against (default: "presets")
+
+    Returns:
+        dict: One output row (see OUTPUT_FIELDS); "error" is set when the header is unreadable
+    """
+    row = dict.fromkeys(OUTPUT_FIELDS)
+    row["path"] = path
+    try:
+        size = read_image_size(path)
+    except OSError as e:
+        size = None
+        row["error"] = str(e)
+    except struct.error as e:
+        size = None
+        row["error"] = f"truncated header: {e}"
+    if size is None:
+        row["error"] = row["error"] or "unsupported or malformed header"
+        return row
+
+    width, height = size
+    bucket_width, bucket_height, label = nearest_resolution(model, width, height, source)
+    if fit == "crop":
+        scale = max(bucket_width / width, bucket_height / height)
+    else:
+        scale = min(bucket_width / width, bucket_height / height)
+    scaled_width = round(width * scale)
+    scaled_height = round(height * scale)
+
+    row.update({
+        "width": width,
+        "height": height,
+        "aspect_ratio": calculate_aspect_ratio(width, height),
+        "bucket": label.split("(")[0].strip(),
+        "bucket_width": bucket_width,
+        "bucket_height": bucket_height,
+        "scale": round(scale, 6),
+        "crop_x": max(scaled_width - bucket_width, 0),
+        "crop_y": max(scaled_height - bucket_height, 0),
+        "pad_x": max(bucket_width - scaled_width, 0),
+        "pad_y": max(bucket_height - scaled_height, 0),
+    })
+    return row
+
+
+def _assign_chunk(paths, model, fit, source):
+    """Process-pool worker: bucket a chunk of paths."""
+    return [assign_bucket(path, model, fit, source) for path in paths]
+
+
+def iter_image_paths(root):
+    """
+    Lazily walk a directory tree for supported image files.
+
+    Args:
+        root (str): Directory to scan
+
+    Yields:
+        str: Image file paths in directory order
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def _chunks(iterable, size):
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bucket_images(paths, model, fit="crop", source="presets", workers=None, chunk_size=256):
+    """
+    Bucket many images in parallel, yielding rows in input order with bounded memory.
+
+    Args:
+        paths (iterable): Image paths (consumed lazily)
+        model (str): Model whose presets to match against
+        fit (str): "crop" or "pad" (default: "crop")
+        source (str): Resolution list to match against (default: "presets")
+        workers (int, optional): Process count (default: os.cpu_count()); 0 runs inline
+        chunk_size (int): Paths per task (default: 256)
+
+    Yields:
+        dict: One row per image, see assign_bucket
+    """
+    if workers == 0:
+        for path in paths:
+            yield assign_bucket(path, model, fit, source)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunks(paths, chunk_size):
+            pending.append(executor.submit(_assign_chunk, chunk, model, fit, source))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign images to the nearest model preset from headers only")
+    parser.add_argument("directory", help="Directory of images (scanned recursively)")
+    parser.add_argument("--model", default="SDXL", choices=["All"] + list(MODEL_RESOLUTIONS.keys()))
+    parser.add_argument("--source", default="presets", choices=RESOLUTION_SOURCES,
+                        help="Match curated presets, generated buckets or both")
+    parser.add_argument("--fit", default="crop", choices=["crop", "pad"],
+                        help="Scale to cover and crop, or scale to fit and pad (default: crop)")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "csv"])
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (0 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS) if args.format == "csv" else None
+    if writer:
+        writer.writeheader()
+
+    counts = Counter()
+    errors = 0
+    started = time.perf_counter()
+    try:
+        rows = bucket_images(iter_image_paths(args.directory), args.model, args.fit, args.source,
+                             args.workers, args.chunk_size)
+        for row in rows:
+            if row["error"]:
+                errors += 1
+            else:
+                counts[row["bucket"]] += 1
+            if writer:
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values()) + errors
+    summary = {
+        "files": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+        "buckets": dict(counts.most_common()),
+    }
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Coalesce queued ComfyUI prompts whose ResolutionSelector latents have the same shape.
+
+Reads a queue of API-format prompts and groups jobs that would run the same graph on the
+same latent shape, differing only in seeds (or other --ignore-input names). Each group is
+rewritten into one prompt whose ResolutionSelector batch is the sum of the jobs' batches,
+capped by the model's memory estimate for --memory-budget, so N single-image prompts
+become one batched sampling run. A mapping file records, for every merged prompt, which
+batch indices belong to which original job so outputs can be split back.
+
+With --submit the merged prompts are queued on a ComfyUI server and each one's server
+prompt_id (or the server's validation errors) is added to the mapping. --benchmark also
+times the original queue, alternating which queue runs first and freeing the server's
+models and cache before every run so neither side starts warm.
+
+Batched samples share the first job's seed: the images are equivalent draws, not
+bit-identical to the individual runs. Prompts with no ResolutionSelector, more than one,
+or size inputs fed by links are passed through unchanged.
+
+Usage:
+    python coalesce_prompts.py queue/ -o merged.jsonl --mapping mapping.json
+    python coalesce_prompts.py queue.jsonl --memory-budget 8000000000
+    python coalesce_prompts.py queue/ --submit http://127.0.0.1:8188 --benchmark
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import namedtuple
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from resolution_presets import (
+    get_latent_shape,
+    parse_resolution_string,
+    plan_latent_memory,
+    resolve_latent_dtype,
+    snap_dimensions,
+    settings_fingerprint
+)
+from resolution_selector import LATENT_OUTPUT_SLOTS, get_connected_outputs
+
+NODE_TYPE = "ResolutionSelector"
+
+# Inputs that may differ between jobs in one group; the merged prompt keeps the first job's
+DEFAULT_IGNORED_INPUTS = ("seed", "noise_seed", "latent_seed")
+
+# Selector inputs that only decide the latent size; jobs are compared on the resulting
+# dimensions instead, so "1024x1024 2x" and "2048x2048 1x" can share a batch
+SIZE_INPUTS = ("resolution", "resolution_multiplier", "batch_size", "custom_width", "custom_height",
+               "custom_multiplier", "custom_batch", "snap_to_model", "resolution_source")
+
+# Same limit as the node's batch_size widget
+MAX_BATCH = 64
+
+# Batch input behind each latent output
+BATCH_INPUTS = {LATENT_OUTPUT_SLOTS["latent"]: "batch_size", LATENT_OUTPUT_SLOTS["custom_latent"]: "custom_batch"}
+
+Job = namedtuple("Job", ["id", "prompt", "extra"])
+
+# Result of run_prompts: server prompt_id per queued job id, /prompt rejection per rejected job id
+RunResult = namedtuple("RunResult", ["seconds", "prompt_ids", "errors"])
+
+
+def _jobs_from_value(value, job_id):
+    """Turn a parsed JSON value into jobs: a prompt, a {"prompt": ...} wrapper or a list of either."""
+    if isinstance(value, list):
+        jobs = []
+        for i, item in enumerate(value):
+            jobs.extend(_jobs_from_value(item, f"{job_id}[{i}]"))
+        return jobs
+    if not isinstance(value, dict):
+        raise ValueError(f"{job_id}: expected a prompt object, got {type(value).__name__}")
+    if isinstance(value.get("prompt"), dict):
+        extra = {key: item for key, item in value.items() if key not in ("id", "prompt")}
+        return [Job(str(value.get("id", job_id)), value["prompt"], extra)]
+    return [Job(job_id, value, {})]
+
+
+def load_jobs(paths):
+    """
+    Read queued prompts from .json files, .jsonl files or directories of them.
+
+    Args:
+        paths (list): Files or directories; directories are read in sorted order
+
+    Returns:
+        list: Job tuples (id, prompt, extra) in queue order. Ids come from an "id" key
+            when present, otherwise from the file name (and line or list index)
+
+    Raises:
+        ValueError: If a file is not valid JSON or holds something other than prompts
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in sorted(os.walk(path)):
+                files.extend(os.path.join(directory, name) for name in sorted(names)
+                             if name.lower().endswith((".json", ".jsonl")))
+        else:
+            files.append(path)
+
+    jobs = []
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            if path.lower().endswith(".jsonl"):
+                for line_number, line in enumerate(f, 1):
+                    if line.strip():
+                        try:
+                            value = json.loads(line)
+                        except ValueError as e:
+                            raise ValueError(f"{path}:{line_number}: {e}") from None
+                        jobs.extend(_jobs_from_value(value, f"{path}:{line_number}"))
+            else:
+                try:
+                    value = json.load(f)
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}") from None
+                jobs.extend(_jobs_from_value(value, path))
+    return jobs
+
+
+def _multiplier(value):
+    return int(str(value).replace("x", ""))
+
+
+def latent_target(prompt):
+    """
+    Work out which ResolutionSelector latent a prompt samples, and at what size.
+
+    Args:
+        prompt (dict): API-format prompt
+
+    Returns:
+        dict or None: node_id, batch_input ("batch_size" or "custom_batch"), batch, model,
+            width, height, latent_dtype and shape (single-sample latent shape); None when
+            the prompt cannot be coalesced (no selector or more than one, linked size
+            inputs, tiling, or neither or both latent outputs in use)
+    """
+    selectors = [(str(node_id), node) for node_id, node in prompt.items()
+                 if isinstance(node, dict) and node.get("class_type") == NODE_TYPE]
+    if len(selectors) != 1:
+        return None
+    node_id, node = selectors[0]
+    inputs = node.get("inputs", {})
+    if any(isinstance(inputs.get(name), list) for name in SIZE_INPUTS + ("model", "latent_dtype", "tile_size")):
+        return None
+    if inputs.get("tile_size", 0) > 0:
+        return None
+
+    slots = set(get_connected_outputs(prompt, node_id)) & set(BATCH_INPUTS)
+    if len(slots) != 1:
+        return None
+    slot = slots.pop()
+    model = inputs["model"]
+
+    try:
+        if slot == LATENT_OUTPUT_SLOTS["latent"]:
+            width, height = parse_resolution_string(inputs["resolution"])
+            multiplier = _multiplier(inputs.get("resolution_multiplier", "1x"))
+            width, height = width * multiplier, height * multiplier
+        else:
+            custom_width, custom_height = inputs.get("custom_width", 0), inputs.get("custom_height", 0)
+            if not (custom_width > 0 and custom_height > 0):
+                return None
+            multiplier = _multiplier(inputs.get("custom_multiplier", "1x"))
+            width, height = custom_width * multiplier, custom_height * multiplier
+            if inputs.get("snap_to_model", False):
+                width, height = snap_dimensions(model, width, height)
+    except (KeyError, ValueError):
+        return None
+
+    batch_input = BATCH_INPUTS[slot]
+    latent_dtype = inputs.get("latent_dtype", "auto")
+    return {
+        "node_id": node_id,
+        "batch_input": batch_input,
+        "batch": inputs.get(batch_input, 1),
+        "model": model,
+        "width": width,
+        "height": height,
+        "latent_dtype": latent_dtype,
+        "shape": list(get_latent_shape(model, width, height, 1)[1:]),
+    }
+
+
+def coalesce_key(prompt, target, ignored_inputs=DEFAULT_IGNORED_INPUTS):
+    """
+    Fingerprint a prompt so that jobs with equal keys can share one batched run.
+
+    The selector's size inputs are replaced by the resolved latent shape and dtype, and
+    ignored inputs are dropped from every node; everything else must match exactly.
+
+    Args:
+        prompt (dict): API-format prompt
+        target (dict): Result of latent_target for the prompt
+        ignored_inputs (tuple): Input names allowed to differ (default: seed, noise_seed, latent_seed)
+
+    Returns:
+        str: Fingerprint from settings_fingerprint
+    """
+    canonical = {}
+    for node_id, node in prompt.items():
+        inputs = {name: value for name, value in node.get("inputs", {}).items() if name not in ignored_inputs}
+        if str(node_id) == target["node_id"]:
+            inputs = {name: value for name, value in inputs.items() if name not in SIZE_INPUTS}
+            inputs["latent_dtype"] = resolve_latent_dtype(target["model"], target["latent_dtype"])
+            inputs["latent"] = [target["width"], target["height"], target["batch_input"]] + target["shape"]
+        canonical[str(node_id)] = {"class_type": node.get("class_type"), "inputs": inputs}
+    return settings_fingerprint(canonical)
+
+
+def batch_cap(target, memory_budget=None, max_batch=MAX_BATCH):
+    """
+    Largest merged batch for a latent target.
+
+    Args:
+        target (dict): Result of latent_target
+        memory_budget (int, optional): Bytes available for the latent and sampling
+            working set; when None only max_batch applies
+        max_batch (int): Hard limit (default: the node's batch_size maximum)
+
+    Returns:
+        int: Batch cap; 0 when a single sample does not fit the budget
+    """
+    plan = plan_latent_memory(target["model"], target["width"], target["height"], max_batch,
+                              memory_budget, target["latent_dtype"])
+    return plan.max_batch
+
+
+def coalesce_jobs(jobs, memory_budget=None, max_batch=MAX_BATCH, ignored_inputs=DEFAULT_IGNORED_INPUTS):
+    """
+    Merge same-shape jobs into batched prompts.
+
+    Groups keep queue order (by their first job), and jobs within a group are packed
+    greedily into prompts whose summed batch stays within batch_cap. A job whose own batch
+    exceeds the cap runs on its own, unchanged.
+
+    Args:
+        jobs (list): Job tuples from load_jobs
+        memory_budget (int, optional): Bytes per merged prompt, see batch_cap
+        max_batch (int): Hard limit on a merged batch (default: 64)
+        ignored_inputs (tuple): Input names allowed to differ within a group
+
+    Returns:
+        tuple: (prompts, mapping). prompts is a list of Job tuples to queue; mapping maps
+            each prompt id to {"jobs": [...], "batch_size": int, "node_id": str or None},
+            where each job entry has id, batch_offset, batch_count and its original seeds
+    """
+    groups = {}
+    order = []
+    for job in jobs:
+        target = latent_target(job.prompt)
+        key = coalesce_key(job.prompt, target, ignored_inputs) if target else None
+        if key is None or not isinstance(target["batch"], int):
+            key = ("passthrough", len(order))
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append((job, target))
+
+    chunks = []
+    for key in order:
+        members = groups[key]
+        if isinstance(key, tuple):
+            chunks.append(members)
+            continue
+        cap = batch_cap(members[0][1], memory_budget, max_batch)
+        chunk, total = [], 0
+        for job, target in members:
+            if chunk and total + target["batch"] > cap:
+                chunks.append(chunk)
+                chunk, total = [], 0
+            chunk.append((job, target))
+            total += target["batch"]
+        chunks.append(chunk)
+
+    prompts = []
+    mapping = {}
+    for index, chunk in enumerate(chunks, 1):
+        first, target = chunk[0]
+        prompt_id = f"coalesced-{index:04d}"
+        prompt = copy.deepcopy(first.prompt)
+        entries = []
+        offset = 0
+        for job, job_target in chunk:
+            count = job_target["batch"] if job_target else None
+            entries.append({
+                "id": job.id,
+                "batch_offset": offset if job_target else None,
+                "batch_count": count,
+                "seeds": _seeds(job.prompt, ignored_inputs),
+            })
+            offset += count or 0
+        if target:
+            prompt[target["node_id"]]["inputs"][target["batch_input"]] = offset
+        prompts.append(Job(prompt_id, prompt, first.extra))
+        mapping[prompt_id] = {
+            "jobs": entries,
+            "batch_size": offset if target else None,
+            "node_id": target["node_id"] if target else None,
+        }
+    return prompts, mapping
+
+
+def _seeds(prompt, ignored_inputs):
+    """Values of ignored inputs per node, so each job's original seeds are kept in the mapping."""
+    seeds = {}
+    for node_id, node in prompt.items():
+        values = {name: value for name, value in node.get("inputs", {}).items()
+                  if name in ignored_inputs and not isinstance(value, list)}
+        if values:
+            seeds[str(node_id)] = values
+    return seeds
+
+
+def _request(server, path, payload=None, timeout=30):
+    """JSON request to a ComfyUI server: POST when there is a payload, GET otherwise."""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(server.rstrip("/") + path, data=data,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def _rejection(error):
+    """Status and validation errors of a rejected /prompt request, which ComfyUI sends as JSON."""
+    body = error.read()
+    try:
+        details = json.loads(body)
+    except ValueError:
+        details = None
+    if not isinstance(details, dict):
+        details = {"error": body.decode("utf-8", "replace") or error.reason}
+    return {"status": error.code, "error": details.get("error"), "node_errors": details.get("node_errors", {})}
+
+
+def free_server(server):
+    """Ask a ComfyUI server to unload its models and drop cached node outputs (POST /free)."""
+    _request(server, "/free", {"unload_models": True, "free_memory": True})
+
+
+def run_prompts(server, prompts, timeout=3600.0, poll_interval=0.5):
+    """
+    Queue prompts on a ComfyUI server and wait until all have finished.
+
+    Prompts the server rejects (HTTP errors from /prompt, e.g. 400 for validation
+    failures) are recorded with their node errors and the rest still run.
+
+    Args:
+        server (str): Server URL, e.g. http://127.0.0.1:8188
+        prompts (list): Job tuples to queue
+        timeout (float): Seconds to wait for the whole run (default: 3600)
+        poll_interval (float): Seconds between /history polls (default: 0.5)
+
+    Returns:
+        RunResult: Wall-clock seconds from the first submission to the last completion,
+            the server prompt_id per job id and the rejection per rejected job id
+
+    Raises:
+        TimeoutError: If the prompts have not all finished within timeout
+    """
+    client_id = uuid.uuid4().hex
+    start = time.perf_counter()
+    prompt_ids = {}
+    errors = {}
+    for job in prompts:
+        try:
+            response = _request(server, "/prompt", {**job.extra, "prompt": job.prompt, "client_id": client_id})
+        except urllib.error.HTTPError as e:
+            errors[job.id] = _rejection(e)
+            continue
+        prompt_ids[job.id] = response["prompt_id"]
+    pending = list(prompt_ids.values())
+
+    deadline = start + timeout
+    while pending:
+        if _request(server, f"/history/{pending[0]}"):
+            pending.pop(0)
+            continue
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"{len(pending)} prompts still running after {timeout}s")
+        time.sleep(poll_interval)
+    return RunResult(time.perf_counter() - start, prompt_ids, errors)
+
+
+def _throughput(jobs, seconds):
+    return {"seconds": round(seconds, 3), "jobs_per_minute": round(jobs * 60 / seconds, 2) if seconds else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge queued prompts with same-shape ResolutionSelector latents")
+    parser.add_argument("paths", nargs="+", help="Prompt .json/.jsonl files or directories of them")
+    parser.add_argument("-o", "--output", help="Merged prompts as JSONL (default: stdout)")
+    parser.add_argument("--mapping", help="Write the prompt -> job batch index mapping to this JSON file")
+    parser.add_argument("--memory-budget", type=int, default=None,
+                        help="Bytes available per merged prompt; caps the batch via the model's memory estimate")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Hard cap on a merged batch (default: 64)")
+    parser.add_argument("--ignore-input", action="append", default=None,
+                        help="Input name allowed to differ within a group (repeatable; default: seed, noise_seed, latent_seed)")
+    parser.add_argument("--submit", metavar="URL", help="Queue the merged prompts on a ComfyUI server and wait")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="With --submit, also run the original prompts and report jobs per minute for both")
+    parser.add_argument("--rounds", type=int, default=2,
+                        help="With --benchmark, timed runs of each queue, alternating which goes first (default: 2)")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="Seconds to wait per run (default: 3600)")
+    args = parser.parse_args(argv)
+    if args.benchmark and not args.submit:
+        parser.error("--benchmark needs --submit")
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+
+    ignored = tuple(args.ignore_input) if args.ignore_input else DEFAULT_IGNORED_INPUTS
+    jobs = load_jobs(args.paths)
+    prompts, mapping = coalesce_jobs(jobs, args.memory_budget, args.max_batch, ignored)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for job in prompts:
+            output.write(json.dumps({"id": job.id, "prompt": job.prompt, **job.extra}) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary = {
+        "jobs": len(jobs),
+        "prompts": len(prompts),
+        "merged_prompts": sum(1 for entry in mapping.values() if len(entry["jobs"]) > 1),
+        "passthrough": sum(1 for entry in mapping.values() if entry["node_id"] is None),
+        "largest_batch": max((entry["batch_size"] or 0 for entry in mapping.values()), default=0),
+    }
+    rejected = {}
+    if args.submit:
+        queues = {"original": jobs, "coalesced": prompts} if args.benchmark else {"coalesced": prompts}
+        seconds = {name: [] for name in queues}
+        for round_index in range(args.rounds if args.benchmark else 1):
+            # Alternate the order so model loading and caches do not always favour the second queue
+            for name in (list(queues) if round_index % 2 == 0 else list(queues)[::-1]):
+                if args.benchmark:
+                    free_server(args.submit)
+                result = run_prompts(args.submit, queues[name], args.timeout)
+                seconds[name].append(result.seconds)
+                if result.errors:
+                    rejected.setdefault(name, {}).update(result.errors)
+                if name == "coalesced":
+                    for prompt_id, server_prompt_id in result.prompt_ids.items():
+                        mapping[prompt_id]["prompt_id"] = server_prompt_id
+                    for prompt_id, error in result.errors.items():
+                        mapping[prompt_id]["error"] = error
+        for name, runs in seconds.items():
+            summary[name] = _throughput(len(jobs), sum(runs) / len(runs))
+        if args.benchmark and summary["coalesced"]["seconds"]:
+            summary["speedup"] = round(summary["original"]["seconds"] / summary["coalesced"]["seconds"], 2)
+        if rejected:
+            summary["rejected"] = rejected
+
+    if args.mapping:
+        with open(args.mapping, "w") as f:
+            json.dump(mapping, f, indent=2)
+    sys.stderr.write(json.dumps(summary) + "\n")
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
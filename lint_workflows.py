@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Lint ResolutionSelector settings across a directory of saved ComfyUI workflows.
+
+Finds every ResolutionSelector node in UI-format workflows (including subgraphs) and
+API-format prompts, and reports settings that would fail or silently change at queue
+time: custom dimensions that break the model's constraints, presets whose multiplier
+pushes them past the model's limits, labels that no longer exist and presets that do
+not belong to the selected model. Constraint checks run vectorized per chunk of files,
+and chunks are spread over a process pool. With --fix, stale labels are rewritten in
+place to the nearest current preset for the node's model.
+
+Usage:
+    python lint_workflows.py workflows/                  # JSON report on stdout
+    python lint_workflows.py workflows/ --format jsonl   # one finding per line
+    python lint_workflows.py workflows/ --fix            # rewrite stale labels
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from resolution_presets import (
+    RESOLUTION_SOURCES,
+    dimension_violation_mask,
+    dimension_violations,
+    get_resolution_list,
+    get_selectable_resolutions,
+    nearest_resolution,
+    parse_resolution_string,
+    MODEL_RESOLUTIONS
+)
+from resolution_selector import ResolutionSelector
+
+NODE_TYPE = "ResolutionSelector"
+
+# UI workflows store widget values positionally, in INPUT_TYPES order
+_input_types = ResolutionSelector.INPUT_TYPES()
+WIDGET_NAMES = list(_input_types["required"]) + list(_input_types["optional"])
+WIDGET_DEFAULTS = {
+    name: options[1].get("default")
+    for section in ("required", "optional")
+    for name, options in _input_types[section].items()
+}
+
+# Finding severities: errors fail at queue time, warnings run but not as intended
+SEVERITIES = {
+    "unreadable": "error",
+    "unknown-model": "error",
+    "stale-label": "error",
+    "custom-dimensions": "error",
+    "preset-exceeds-constraints": "warning",
+    "model-mismatch": "warning",
+}
+
+
+def iter_workflow_paths(root):
+    """
+    Lazily walk a directory tree for workflow JSON files.
+
+    Args:
+        root (str): Directory to scan
+
+    Yields:
+        str: .json file paths
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(".json"):
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def _ui_nodes(workflow, prefix=""):
+    """Yield (node_id, node) for UI-format nodes, prefixing subgraph nodes with the subgraph id."""
+    for node in workflow.get("nodes", []):
+        yield f"{prefix}{node.get('id')}", node
+    for subgraph in workflow.get("definitions", {}).get("subgraphs", []):
+        yield from _ui_nodes(subgraph, f"{prefix}{subgraph.get('id', 'subgraph')}:")
+
+
+def extract_selector_nodes(workflow):
+    """
+    Find ResolutionSelector nodes in a UI-format workflow or API-format prompt.
+
+    Args:
+        workflow (dict): Parsed workflow JSON
+
+    Returns:
+        list: (node_id, settings, node) tuples; settings maps input names to values with
+            defaults filled in, and node is the original dict (edited in place by fixes).
+            Inputs fed by links in API prompts are None, since they are unknown until run.
+    """
+    found = []
+    if isinstance(workflow.get("nodes"), list):
+        for node_id, node in _ui_nodes(workflow):
+            if node.get("type") != NODE_TYPE:
+                continue
+            values = node.get("widgets_values") or []
+            if isinstance(values, dict):
+                settings = {name: values.get(name, WIDGET_DEFAULTS[name]) for name in WIDGET_NAMES}
+            else:
+                settings = dict(WIDGET_DEFAULTS)
+                settings.update(zip(WIDGET_NAMES, values))
+            found.append((node_id, settings, node))
+        return found
+
+    prompt = workflow.get("prompt", workflow)
+    for node_id, node in prompt.items():
+        if not isinstance(node, dict) or node.get("class_type") != NODE_TYPE:
+            continue
+        settings = dict(WIDGET_DEFAULTS)
+        for name, value in node.get("inputs", {}).items():
+            settings[name] = None if isinstance(value, list) else value
+        found.append((str(node_id), settings, node))
+    return found
+
+
+def _set_resolution(node, label):
+    """Write a resolution label back into a UI or API node."""
+    if "inputs" in node and "class_type" in node:
+        node["inputs"]["resolution"] = label
+    elif isinstance(node.get("widgets_values"), dict):
+        node["widgets_values"]["resolution"] = label
+    else:
+        node["widgets_values"][WIDGET_NAMES.index("resolution")] = label
+
+
+def _finding(base, code, message, **extra):
+    """Build a report entry with the severity for its code."""
+    return {**base, "severity": SEVERITIES[code], "code": code, "message": message, **extra}
+
+
+def _multiplier(value):
+    """Parse a "2x" style multiplier, None when unknown."""
+    try:
+        return int(str(value).replace("x", ""))
+    except ValueError:
+        return None
+
+
+def lint_workflows(paths, fix=False):
+    """
+    Lint a chunk of workflow files.
+
+    Dimension checks for every node in the chunk run in one vectorized pass; messages for
+    flagged rows come from dimension_violations, so they match what the node raises.
+
+    Args:
+        paths (list): Workflow file paths
+        fix (bool): Rewrite stale labels to the nearest current preset (default: False)
+
+    Returns:
+        tuple: (findings: list of dicts, nodes: int, fixed_paths: list)
+    """
+    selectable = set(get_selectable_resolutions())
+    findings = []
+    fixed_paths = []
+    nodes = 0
+
+    # Rows for the vectorized pass: (finding base, model, width, height, code)
+    rows = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                workflow = json.load(f)
+        except (OSError, ValueError) as e:
+            findings.append(_finding({"path": path, "node_id": None}, "unreadable", str(e)))
+            continue
+        if not isinstance(workflow, dict):
+            continue
+
+        changed = False
+        for node_id, settings, node in extract_selector_nodes(workflow):
+            nodes += 1
+            base = {"path": path, "node_id": node_id}
+            model = settings["model"]
+            label = settings["resolution"]
+            source = settings["resolution_source"] if settings["resolution_source"] in RESOLUTION_SOURCES else "presets"
+
+            if model is not None and model != "All" and model not in MODEL_RESOLUTIONS:
+                findings.append(_finding(base, "unknown-model", f"Unknown model '{model}'"))
+                model = "All"
+
+            try:
+                width, height = parse_resolution_string(label) if label is not None else (None, None)
+            except ValueError:
+                width, height = None, None
+
+            if label is not None and label not in selectable:
+                message = f"Resolution '{label}' is not a current preset"
+                if fix and width is not None:
+                    _, _, replacement = nearest_resolution(model or "All", width, height)
+                    _set_resolution(node, replacement)
+                    changed = True
+                    findings.append(_finding(base, "stale-label", message, fixed_to=replacement))
+                else:
+                    findings.append(_finding(base, "stale-label", message))
+            elif (label is not None and model not in (None, "All")
+                    and label not in get_resolution_list(model, source)):
+                findings.append(_finding(base, "model-mismatch", f"Resolution '{label}' is not a {model} preset; the UI will reset it"))
+
+            multiplier = _multiplier(settings["resolution_multiplier"])
+            if model is not None and width is not None and multiplier:
+                rows.append((base, model, width * multiplier, height * multiplier, "preset-exceeds-constraints"))
+
+            custom_width, custom_height = settings["custom_width"], settings["custom_height"]
+            custom_mult = _multiplier(settings["custom_multiplier"])
+            if (model is not None and custom_width and custom_height and custom_mult
+                    and not settings["snap_to_model"]):
+                rows.append((base, model, custom_width * custom_mult, custom_height * custom_mult, "custom-dimensions"))
+
+        if changed:
+            _write_json(path, workflow)
+            fixed_paths.append(path)
+
+    if rows:
+        mask = dimension_violation_mask([row[1] for row in rows], [row[2] for row in rows], [row[3] for row in rows])
+        for (base, model, width, height, code), invalid in zip(rows, mask):
+            if invalid:
+                message = f"{width}x{height}: " + "; ".join(dimension_violations(model, width, height))
+                findings.append(_finding(base, code, message))
+
+    return findings, nodes, fixed_paths
+
+
+def _write_json(path, workflow):
+    """Atomically replace a workflow file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as f:
+        json.dump(workflow, f, indent=2)
+        temp_path = f.name
+    os.replace(temp_path, path)
+
+
+def _chunks(iterable, size):
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def lint_directory(root, fix=False, workers=None, chunk_size=64):
+    """
+    Lint every workflow under a directory in parallel, yielding results in path order.
+
+    Args:
+        root (str): Directory of workflow JSON files
+        fix (bool): Rewrite stale labels in place (default: False)
+        workers (int, optional): Process count (default: os.cpu_count()); 0 runs inline
+        chunk_size (int): Files per task (default: 64)
+
+    Yields:
+        tuple: (findings, nodes, fixed_paths, files) per chunk
+    """
+    chunks = _chunks(iter_workflow_paths(root), chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            yield (*lint_workflows(chunk, fix), len(chunk))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((executor.submit(lint_workflows, chunk, fix), len(chunk)))
+            if len(pending) >= workers * 2:
+                future, files = pending.popleft()
+                yield (*future.result(), files)
+        while pending:
+            future, files = pending.popleft()
+            yield (*future.result(), files)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lint ResolutionSelector settings in saved workflows")
+    parser.add_argument("directory", help="Directory of workflow JSON files (scanned recursively)")
+    parser.add_argument("--fix", action="store_true", help="Rewrite stale labels to the nearest current preset")
+    parser.add_argument("--format", default="json", choices=["json", "jsonl"],
+                        help="Single JSON report, or one finding per line followed by a summary line")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (0 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    all_findings = []
+    counts = Counter()
+    totals = Counter()
+    fixed = []
+    try:
+        for findings, nodes, fixed_paths, files in lint_directory(args.directory, args.fix, args.workers, args.chunk_size):
+            totals["files"] += files
+            totals["nodes"] += nodes
+            fixed.extend(fixed_paths)
+            for finding in findings:
+                counts[finding["code"]] += 1
+                totals[finding["severity"] + "s"] += 1
+                if "fixed_to" in finding:
+                    totals["fixed"] += 1
+                if args.format == "jsonl":
+                    output.write(json.dumps(finding) + "\n")
+                else:
+                    all_findings.append(finding)
+
+        summary = {
+            "files": totals["files"],
+            "nodes": totals["nodes"],
+            "errors": totals["errors"],
+            "warnings": totals["warnings"],
+            "codes": dict(counts.most_common()),
+            "fixed_files": fixed,
+        }
+        if args.format == "jsonl":
+            output.write(json.dumps({"summary": summary}) + "\n")
+        else:
+            json.dump({"summary": summary, "findings": all_findings}, output, indent=2)
+            output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    # Fixed stale labels no longer fail; any other error does
+    return 1 if totals["errors"] - totals["fixed"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
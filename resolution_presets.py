@@ -0,0 +1,1716 @@
+"""
+Torch-free core of the resolution selector: preset tables, latent geometry, label
+formatting and parsing, dimension validation, snapping and memory planning.
+
+Importing this module is cheap, so schedulers and scripts can use the preset tables
+without loading torch. Run it as a script to dump tables or validate dimensions as JSON:
+
+    python -m resolution_presets tables --model SDXL
+    python -m resolution_presets validate Flux 1000 750 --multiplier 2 --snap
+    python -m resolution_presets plan SDXL 2048 2048 --batch 16 --free-bytes 25769803776
+    python -m resolution_presets hires SDXL 1024 1024 --target 4 --max-step 1.5
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+from types import MappingProxyType
+
+
+# Public API; the names that predate the split are also re-exported by resolution_selector
+__all__ = [
+    "MODEL_RESOLUTIONS",
+    "DEFAULT_LATENT_FORMAT",
+    "DEFAULT_RESOLUTIONS",
+    "DEFAULT_SAMPLING_PROFILE",
+    "DTYPE_SIZES",
+    "LATENT_DTYPES",
+    "LATENT_DTYPE_NAMES",
+    "MEMORY_FORMATS",
+    "COMMON_RATIOS",
+    "COMMON_RATIO_LABELS",
+    "RATIO_BOUNDARIES",
+    "HiresSchedule",
+    "HiresStage",
+    "MemoryPlan",
+    "TilePlan",
+    "RESOLUTION_SOURCES",
+    "ResolutionIndex",
+    "USER_PRESETS_PATHS",
+    "USER_PRESETS_CHECK_INTERVAL",
+    "build_resolution_index",
+    "calculate_aspect_ratio",
+    "classify_aspect_ratios",
+    "dimension_violation_mask",
+    "dimension_violations",
+    "filter_resolutions",
+    "format_bytes",
+    "format_resolution",
+    "gcd",
+    "generate_buckets",
+    "get_all_resolutions",
+    "get_constraints",
+    "get_default_resolution",
+    "get_latent_bytes",
+    "get_latent_format",
+    "get_latent_shape",
+    "get_orientation",
+    "get_presets_payload",
+    "get_resolution_index",
+    "get_resolution_list",
+    "get_selectable_resolutions",
+    "get_user_presets_status",
+    "get_valid_sizes",
+    "invalidate_resolution_index",
+    "merge_user_presets",
+    "nearest_resolution",
+    "nearest_resolutions",
+    "parse_resolution_string",
+    "plan_hires_schedule",
+    "plan_latent_memory",
+    "plan_tiles",
+    "reload_user_presets",
+    "resolve_latent_dtype",
+    "settings_fingerprint",
+    "snap_dimensions",
+    "tile_blend_weights",
+    "validate_dimensions",
+]
+
+
+# Model-specific resolution presets with constraints and latent geometry
+# Includes: model-optimized sizes + photo print (4x6, 5x7, 8x10) + digital/social + canvas art ratios
+MODEL_RESOLUTIONS = {
+    "Flux": {
+        "square": [(512, 512), (768, 768), (1024, 1024), (1088, 1088), (1280, 1280), (1536, 1536), (1920, 1920), (2048, 2048)],
+        "portrait": [(688, 2048), (768, 1344), (832, 1216), (896, 1152), (928, 1664), (1024, 1536), (1024, 1792), (1024, 2048), (1088, 1920), (1152, 2048), (1200, 1792), (1360, 2048), (1456, 2048), (1536, 2048), (1616, 2048), (1632, 2048), (1712, 2048)],
+        "landscape": [(1280, 720), (1344, 768), (1216, 832), (1152, 896), (1536, 1024), (1664, 928), (1792, 1024), (1792, 1200), (1920, 1088), (2048, 688), (2048, 1024), (2048, 1152), (2048, 1360), (2048, 1456), (2048, 1536), (2048, 1616), (2048, 1632), (2048, 1712)],
+        "constraints": {"divisible_by": 16, "min": 256, "max": 2048},
+        "latent": {"channels": 16, "downscale": 8, "dtype": "float32", "memory_format": "contiguous"},
+        "sampling": {"bytes_per_latent_pixel": 192 * 1024}
+    },
+    "Qwen Image": {
+        "square": [(1024, 1024), (1080, 1080), (1280, 1280), (1328, 1328), (1536, 1536), (1920, 1920), (2048, 2048)],
+        "portrait": [(680, 2048), (928, 1664), (1024, 1536), (1024, 2048), (1080, 1920), (1140, 1472), (1152, 2048), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
+        "landscape": [(1280, 720), (1472, 1140), (1536, 1024), (1664, 928), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1152), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
+        "constraints": {"divisible_by": 8, "min": 256, "max": 2048},
+        "latent": {"channels": 16, "downscale": 8, "dtype": "float32", "memory_format": "contiguous"},
+        "sampling": {"bytes_per_latent_pixel": 256 * 1024}
+    },
+    "Z-Image": {
+        "square": [(512, 512), (768, 768), (1024, 1024), (1080, 1080), (1280, 1280), (1536, 1536), (1920, 1920), (2048, 2048)],
+        "portrait": [(680, 2048), (720, 1280), (768, 1024), (1024, 2048), (1080, 1920), (1152, 2048), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
+        "landscape": [(1024, 768), (1280, 720), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1152), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
+        "constraints": {"divisible_by": 8, "min": 256, "max": 2048},
+        "latent": {"channels": 16, "downscale": 8, "dtype": "float32", "memory_format": "contiguous"},
+        "sampling": {"bytes_per_latent_pixel": 160 * 1024}
+    },
+    "SD 1.5": {
+        "square": [(512, 512), (768, 768), (1024, 1024), (1080, 1080), (1280, 1280), (1536, 1536)],
+        "portrait": [(512, 768), (512, 682), (512, 1024), (680, 2048), (768, 1024), (768, 1344), (1024, 2048), (1080, 1920), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
+        "landscape": [(768, 512), (1024, 512), (1024, 768), (1280, 720), (1344, 768), (1536, 512), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
+        "constraints": {"divisible_by": 8, "min": 256, "max": 2048},
+        "latent": {"channels": 4, "downscale": 8, "dtype": "float32", "memory_format": "contiguous"},
+        "sampling": {"bytes_per_latent_pixel": 96 * 1024}
+    },
+    "SDXL": {
+        "square": [(1024, 1024), (1080, 1080), (1280, 1280), (1536, 1536), (1920, 1920), (2048, 2048)],
+        "portrait": [(640, 1536), (680, 2048), (768, 1344), (832, 1216), (896, 1152), (1024, 1536), (1024, 2048), (1080, 1920), (1152, 2048), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
+        "landscape": [(1152, 896), (1216, 832), (1280, 720), (1344, 768), (1536, 640), (1536, 1024), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1152), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
+        "constraints": {"divisible_by": 8, "min": 256, "max": 2048},
+        "latent": {"channels": 4, "downscale": 8, "dtype": "float32", "memory_format": "contiguous"},
+        "sampling": {"bytes_per_latent_pixel": 96 * 1024}
+    }
+}
+
+# Latent geometry used when no specific model is selected ("All") - SD-style 4 channel VAE
+DEFAULT_LATENT_FORMAT = {"channels": 4, "downscale": 8, "dtype": "float32", "memory_format": "contiguous"}
+
+# Estimated sampling working set for unknown models and "All"
+DEFAULT_SAMPLING_PROFILE = {"bytes_per_latent_pixel": 128 * 1024}
+
+# Bytes per element for the latent dtypes the registry may name
+DTYPE_SIZES = {"float32": 4, "float16": 2, "bfloat16": 2}
+
+# Node-facing latent dtype choices; "auto" uses the model's registry dtype
+LATENT_DTYPES = ["auto", "fp32", "fp16", "bf16"]
+LATENT_DTYPE_NAMES = {"fp32": "float32", "fp16": "float16", "bf16": "bfloat16"}
+
+# Registry memory layout names mapped to torch memory format attributes
+MEMORY_FORMATS = {"contiguous": "contiguous_format", "channels_last": "channels_last"}
+
+
+def gcd(a, b):
+    """
+    Calculate greatest common divisor using Euclidean algorithm.
+
+    Args:
+        a (int): First number
+        b (int): Second number
+
+    Returns:
+        int: Greatest common divisor
+    """
+    while b != 0:
+        a, b = b, a % b
+    return a
+
+
+# Common aspect ratios as exact fractions, sorted by value (width / height)
+COMMON_RATIOS = tuple(sorted(
+    (Fraction(w, h), f"{w}:{h}") for w, h in [
+        (1, 3),    # 0.333... (panoramic)
+        (5, 12),   # 0.4166...
+        (1, 2),    # 0.5
+        (9, 16),   # 0.5625
+        (5, 8),    # 0.625
+        (2, 3),    # 0.666...
+        (3, 4),    # 0.75
+        (1, 1),    # Square
+        (5, 4),    # 1.25
+        (4, 3),    # 1.333...
+        (3, 2),    # 1.5
+        (16, 10),  # 1.6
+        (16, 9),   # 1.777...
+        (2, 1),    # 2.0
+        (21, 9),   # 2.333... (ultrawide)
+        (12, 5),   # 2.4
+        (3, 1),    # 3.0
+    ]
+))
+
+COMMON_RATIO_LABELS = tuple(label for _, label in COMMON_RATIOS)
+
+# Decision boundaries between neighbouring ratios, taken at their geometric mean. That keeps
+# the boundaries symmetric under rotation, so a resolution and its rotation (e.g. 1472x1140
+# and 1140x1472) get mirrored labels wherever both ratios have their reciprocal in the table;
+# 5:4, 16:10 and 21:9 have none, so their rotations take the nearest portrait label instead
+RATIO_BOUNDARIES = tuple(
+    math.sqrt(low * high) for (low, _), (high, _) in zip(COMMON_RATIOS, COMMON_RATIOS[1:])
+)
+
+
+def calculate_aspect_ratio(width, height):
+    """
+    Calculate simplified aspect ratio from dimensions, using nearest common ratio.
+
+    Args:
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Returns:
+        str: Aspect ratio like "16:9" or "1:1"
+    """
+    # Binary search for the bucket of the nearest common ratio (log scale)
+    return COMMON_RATIO_LABELS[bisect_left(RATIO_BOUNDARIES, width / height)]
+
+
+def get_orientation(width, height):
+    """
+    Classify dimensions as square, portrait or landscape.
+
+    Args:
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Returns:
+        str: "Square", "Portrait" or "Landscape"
+    """
+    if width == height:
+        return "Square"
+    elif width < height:
+        return "Portrait"
+    return "Landscape"
+
+
+def classify_aspect_ratios(widths, heights):
+    """
+    Classify many dimensions at once in a single vectorized pass.
+
+    Args:
+        widths (array-like): Widths in pixels (list, NumPy array or torch tensor)
+        heights (array-like): Heights in pixels, same shape as widths
+
+    Returns:
+        tuple: (ratios, orientations) NumPy string arrays shaped like the inputs,
+            matching calculate_aspect_ratio and get_orientation element-wise
+    """
+    import numpy as np
+
+    # torch tensors are converted through the CPU; NumPy arrays and lists pass straight through
+    if hasattr(widths, "detach"):
+        widths = widths.detach().cpu().numpy()
+    if hasattr(heights, "detach"):
+        heights = heights.detach().cpu().numpy()
+    widths = np.asarray(widths, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+
+    buckets = np.searchsorted(np.asarray(RATIO_BOUNDARIES), widths / heights, side="left")
+    ratios = np.asarray(COMMON_RATIO_LABELS)[buckets]
+    orientations = np.where(
+        widths == heights, "Square",
+        np.where(widths < heights, "Portrait", "Landscape")
+    )
+    return ratios, orientations
+
+
+def format_resolution(width, height):
+    """
+    Format resolution tuple into display string with aspect ratio and orientation.
+    Uses fixed-width formatting for better alignment in dropdowns.
+
+    Args:
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Returns:
+        str: Formatted string like "1920x1080  (16:9 Landscape)" with consistent spacing
+    """
+    aspect_ratio = calculate_aspect_ratio(width, height)
+    orientation = get_orientation(width, height)
+
+    # Format with fixed width for better alignment (e.g., "1920x1080  ")
+    # Most resolutions are 4 digits, so we pad to 9 characters (4x4 + 'x')
+    resolution_str = f"{width}x{height}"
+    padded_resolution = resolution_str.ljust(13)  # Pad to 13 chars for alignment
+
+    return f"{padded_resolution}({aspect_ratio} {orientation})"
+
+
+def get_constraints(model_name):
+    """
+    Get a model's dimension constraints with defaults filled in.
+
+    Args:
+        model_name (str): Name of the model
+
+    Returns:
+        dict: divisible_by, min and max in pixels (None for unknown models and "All")
+    """
+    if model_name not in MODEL_RESOLUTIONS:
+        return None
+
+    constraints = MODEL_RESOLUTIONS[model_name]["constraints"]
+    return {
+        "divisible_by": constraints.get("divisible_by", 8),
+        "min": constraints.get("min", 64),
+        "max": constraints.get("max", 4096),
+    }
+
+
+def get_valid_sizes(model_name):
+    """
+    List every side length a model's constraints allow.
+
+    Args:
+        model_name (str): Name of the model
+
+    Returns:
+        tuple: Sorted side lengths in pixels (empty for unknown models and "All")
+    """
+    constraints = get_constraints(model_name)
+    if constraints is None:
+        return ()
+
+    step = constraints["divisible_by"]
+    first = -(-constraints["min"] // step) * step  # smallest multiple of step >= min
+    return tuple(range(first, constraints["max"] + 1, step))
+
+
+@lru_cache(maxsize=64)
+def generate_buckets(model_name, megapixels=None, ratio_step=0.1, tolerance=0.1, max_aspect=3.0):
+    """
+    Enumerate aspect-ratio buckets that satisfy a model's constraints at a pixel budget.
+
+    For every valid width the nearest valid heights to the budget are considered; pairs
+    within the pixel tolerance are grouped into aspect-ratio cells ratio_step apart (in
+    log space) and the pair closest to the budget wins each cell. Results are memoized
+    per argument set with LRU eviction.
+
+    Args:
+        model_name (str): Name of the model
+        megapixels (float, optional): Pixel budget in megapixels (default: the model's native resolution)
+        ratio_step (float): Minimum log aspect-ratio spacing between buckets (default: 0.1, about 10%)
+        tolerance (float): Maximum relative pixel count deviation from the budget (default: 0.1)
+        max_aspect (float): Widest allowed ratio in either orientation (default: 3.0)
+
+    Returns:
+        tuple: (width, height) buckets sorted from tallest to widest
+    """
+    sizes = get_valid_sizes(model_name)
+    if not sizes:
+        return ()
+
+    if megapixels is None:
+        native_width, native_height = DEFAULT_RESOLUTIONS.get(model_name, DEFAULT_RESOLUTIONS["All"])
+        budget = native_width * native_height
+    else:
+        budget = megapixels * 1_000_000
+
+    cells = {}
+    for width in sizes:
+        position = bisect_left(sizes, budget / width)
+        for height in sizes[max(position - 1, 0):position + 1]:
+            ratio = width / height
+            pixel_error = abs(width * height / budget - 1)
+            if pixel_error > tolerance or not 1 / max_aspect <= ratio <= max_aspect:
+                continue
+            cell = round(math.log(ratio) / ratio_step)
+            if cell not in cells or pixel_error < cells[cell][0]:
+                cells[cell] = (pixel_error, (width, height))
+
+    return tuple(dims for _, dims in sorted(cells.values(), key=lambda entry: entry[1][0] / entry[1][1]))
+
+
+# Model-specific native/optimal resolutions
+DEFAULT_RESOLUTIONS = {
+    "Flux": (1024, 1024),       # Flux native
+    "Qwen Image": (1328, 1328), # Qwen native
+    "Z-Image": (1024, 1024),    # Z-Image native
+    "SD 1.5": (512, 512),       # SD 1.5 native
+    "SDXL": (1024, 1024),       # SDXL native
+    "All": (1024, 1024),        # Default for "All"
+}
+
+# Immutable lookup tables derived from MODEL_RESOLUTIONS
+ResolutionIndex = namedtuple(
+    "ResolutionIndex",
+    ["model_labels", "all_labels", "label_dimensions", "default_labels", "valid_sizes",
+     "bucket_labels", "selectable_labels"]
+)
+
+
+def _build_model_entry(model_name):
+    """Format one model's presets and buckets: ((dims, label) pairs, bucket pairs, valid sizes)."""
+    model_data = MODEL_RESOLUTIONS[model_name]
+    # Order: square first, then portrait, then landscape
+    presets = tuple(
+        ((width, height), format_resolution(width, height))
+        for category in ["square", "portrait", "landscape"]
+        for width, height in model_data.get(category, ())
+    )
+    buckets = tuple(((width, height), format_resolution(width, height)) for width, height in generate_buckets(model_name))
+    return presets, buckets, get_valid_sizes(model_name)
+
+
+# Per-model index entries, kept across rebuilds so a change to one model only re-formats that model
+_model_entries = {}
+
+
+def build_resolution_index():
+    """
+    Format every preset once and build the lookup tables used by the node.
+
+    Per-model labels, buckets and valid sizes are reused from earlier builds unless the
+    model was invalidated; only the cross-model tables are reassembled.
+
+    Returns:
+        ResolutionIndex: model_labels (model -> tuple of labels in square, portrait,
+            landscape order), all_labels (tuple of unique labels sorted by pixels),
+            label_dimensions (label -> (width, height)), default_labels (model -> label)
+            valid_sizes (model -> sorted tuple of side lengths allowed by its constraints),
+            bucket_labels (model -> tuple of generated bucket labels at the native budget)
+            and selectable_labels (every curated and bucket label, for input validation)
+    """
+    for model_name in list(_model_entries):
+        if model_name not in MODEL_RESOLUTIONS:
+            del _model_entries[model_name]
+    entries = {}
+    for model_name in list(MODEL_RESOLUTIONS):
+        if model_name not in _model_entries:
+            _model_entries[model_name] = _build_model_entry(model_name)
+        entries[model_name] = _model_entries[model_name]
+
+    labels_by_dimensions = {}
+    model_labels = {}
+    for model_name, (presets, _, _) in entries.items():
+        for key, label in presets:
+            labels_by_dimensions.setdefault(key, label)
+        model_labels[model_name] = tuple(label for _, label in presets)
+
+    # Sort by total pixels, then by width
+    all_labels = tuple(
+        label for (width, height), label in sorted(
+            labels_by_dimensions.items(),
+            key=lambda item: (item[0][0] * item[0][1], item[0][0])
+        )
+    )
+    model_labels["All"] = all_labels
+
+    default_labels = {
+        model_name: format_resolution(width, height)
+        for model_name, (width, height) in DEFAULT_RESOLUTIONS.items()
+    }
+
+    valid_sizes = {model_name: entry[2] for model_name, entry in entries.items()}
+
+    # Generated buckets at each model's native pixel budget, labelled like presets
+    bucket_labels = {}
+    for model_name, (_, buckets, _) in entries.items():
+        for key, label in buckets:
+            labels_by_dimensions.setdefault(key, label)
+        bucket_labels[model_name] = tuple(label for _, label in buckets)
+
+    # Curated labels first so existing dropdown values keep their order
+    curated = set(all_labels)
+    generated = sorted(
+        (key for key, label in labels_by_dimensions.items() if label not in curated),
+        key=lambda key: (key[0] * key[1], key[0])
+    )
+    selectable_labels = all_labels + tuple(labels_by_dimensions[key] for key in generated)
+
+    return ResolutionIndex(
+        model_labels=MappingProxyType(model_labels),
+        all_labels=all_labels,
+        label_dimensions=MappingProxyType({label: key for key, label in labels_by_dimensions.items()}),
+        default_labels=MappingProxyType(default_labels),
+        valid_sizes=MappingProxyType(valid_sizes),
+        bucket_labels=MappingProxyType(bucket_labels),
+        selectable_labels=selectable_labels,
+    )
+
+
+# Built once at import so INPUT_TYPES and prompt validation never re-format labels
+_resolution_index = build_resolution_index()
+
+
+def get_resolution_index():
+    """
+    Get the precomputed resolution index, building it on first use.
+
+    Returns:
+        ResolutionIndex: Current lookup tables for MODEL_RESOLUTIONS
+    """
+    global _resolution_index
+    if _resolution_index is None:
+        _resolution_index = build_resolution_index()
+    return _resolution_index
+
+
+def invalidate_resolution_index(models=None):
+    """
+    Discard the precomputed index; call after modifying MODEL_RESOLUTIONS.
+
+    Args:
+        models (iterable, optional): Models whose entries changed; others are reused on
+            the next build (default: rebuild every model)
+    """
+    global _resolution_index
+    _resolution_index = None
+    if models is None:
+        _model_entries.clear()
+    else:
+        for model_name in models:
+            _model_entries.pop(model_name, None)
+    generate_buckets.cache_clear()
+
+
+_presets_payload = (None, None, None)
+
+
+def get_presets_payload():
+    """
+    Serialize the resolution index for the web extension, cached until the index changes.
+
+    Returns:
+        tuple: (body: bytes, etag: str) where body is compact JSON with models, per-model
+            resolution labels, default labels and constraints, and etag is its content hash
+    """
+    global _presets_payload
+    index = get_resolution_index()
+    cached_index, body, etag = _presets_payload
+    if cached_index is index:
+        return body, etag
+
+    payload = {
+        "models": list(index.model_labels),
+        "resolutions": {model_name: list(labels) for model_name, labels in index.model_labels.items()},
+        "buckets": {model_name: list(labels) for model_name, labels in index.bucket_labels.items()},
+        "defaults": dict(index.default_labels),
+        "constraints": {model_name: get_constraints(model_name) for model_name in MODEL_RESOLUTIONS},
+    }
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    _presets_payload = (index, body, etag)
+    return body, etag
+
+
+# User-defined models and presets, read from the node directory; the first file found wins.
+# YAML needs PyYAML.
+USER_PRESETS_PATHS = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ("user_presets.json", "user_presets.yaml", "user_presets.yml")
+)
+
+# Minimum seconds between checks of the user presets file
+USER_PRESETS_CHECK_INTERVAL = 2.0
+
+_PRESET_CATEGORIES = ("square", "portrait", "landscape")
+_USER_MODEL_KEYS = set(_PRESET_CATEGORIES) | {"constraints", "latent", "sampling", "default"}
+
+# Shipped tables, so removing a user entry restores the original model
+_BUILTIN_MODEL_RESOLUTIONS = copy.deepcopy(MODEL_RESOLUTIONS)
+_BUILTIN_DEFAULT_RESOLUTIONS = dict(DEFAULT_RESOLUTIONS)
+
+_user_presets_state = {
+    "checked": float("-inf"),
+    "signature": None,
+    "digest": None,
+    "path": None,
+    "models": (),
+    "error": None,
+}
+
+
+def _user_dimensions(value, where, problems):
+    """Parse a [width, height] pair, recording a problem when malformed."""
+    if (isinstance(value, (list, tuple)) and len(value) == 2
+            and all(isinstance(v, int) and not isinstance(v, bool) and v > 0 for v in value)):
+        return tuple(value)
+    problems.append(f"{where}: expected [width, height] positive integers, got {value!r}")
+    return None
+
+
+def _positive_int_fields(value, where, fields, problems):
+    """Check a dict has only the given keys, all positive integers."""
+    if not isinstance(value, dict):
+        problems.append(f"{where}: expected an object, got {value!r}")
+        return {}
+    for key, field in value.items():
+        if key not in fields:
+            problems.append(f"{where}: unknown key '{key}' (expected {', '.join(fields)})")
+        elif not isinstance(field, int) or isinstance(field, bool) or field <= 0:
+            problems.append(f"{where}.{key}: expected a positive integer, got {field!r}")
+    return dict(value)
+
+
+def merge_user_presets(data):
+    """
+    Validate user preset data and merge it over the built-in tables.
+
+    The data maps "models" to model entries shaped like MODEL_RESOLUTIONS values, with
+    [width, height] pairs and an optional "default". For built-in models the preset lists
+    are appended to the shipped ones and other keys replace them; new models need at least
+    one preset. Every user preset must satisfy its model's constraints.
+
+    Args:
+        data (dict): Parsed user presets file
+
+    Returns:
+        tuple: (models: dict shaped like MODEL_RESOLUTIONS, defaults: dict shaped like
+            DEFAULT_RESOLUTIONS), both including the built-in models
+
+    Raises:
+        ValueError: Listing every problem found
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("models"), dict):
+        raise ValueError('expected an object with a "models" object')
+
+    models = copy.deepcopy(_BUILTIN_MODEL_RESOLUTIONS)
+    defaults = dict(_BUILTIN_DEFAULT_RESOLUTIONS)
+    problems = []
+    for model_name, entry in data["models"].items():
+        where = f"models.{model_name}"
+        if model_name == "All":
+            problems.append(f"{where}: 'All' is reserved")
+            continue
+        if not isinstance(entry, dict):
+            problems.append(f"{where}: expected an object")
+            continue
+        for key in entry:
+            if key not in _USER_MODEL_KEYS:
+                problems.append(f"{where}: unknown key '{key}'")
+
+        merged = models.get(model_name, {"square": [], "portrait": [], "landscape": [], "constraints": {}})
+        added = []
+        for category in _PRESET_CATEGORIES:
+            for i, value in enumerate(entry.get(category, ())):
+                dims = _user_dimensions(value, f"{where}.{category}[{i}]", problems)
+                if dims is None:
+                    continue
+                if get_orientation(*dims).lower() != category:
+                    problems.append(f"{where}.{category}[{i}]: {dims[0]}x{dims[1]} is not {category}")
+                elif dims not in merged[category]:
+                    merged[category].append(dims)
+                    added.append((f"{where}.{category}[{i}]", dims))
+
+        if "constraints" in entry:
+            merged["constraints"] = _positive_int_fields(
+                entry["constraints"], f"{where}.constraints", ("divisible_by", "min", "max"), problems
+            )
+        if "sampling" in entry:
+            merged["sampling"] = _positive_int_fields(
+                entry["sampling"], f"{where}.sampling", ("bytes_per_latent_pixel",), problems
+            )
+        if "latent" in entry:
+            latent = entry["latent"]
+            if not isinstance(latent, dict):
+                problems.append(f"{where}.latent: expected an object")
+            else:
+                merged["latent"] = {**DEFAULT_LATENT_FORMAT, **latent}
+                _positive_int_fields({key: latent[key] for key in ("channels", "downscale") if key in latent},
+                                     f"{where}.latent", ("channels", "downscale"), problems)
+                if merged["latent"]["dtype"] not in DTYPE_SIZES:
+                    problems.append(f"{where}.latent.dtype: expected one of {list(DTYPE_SIZES)}")
+                if merged["latent"]["memory_format"] not in MEMORY_FORMATS:
+                    problems.append(f"{where}.latent.memory_format: expected one of {list(MEMORY_FORMATS)}")
+                for key in set(latent) - set(DEFAULT_LATENT_FORMAT):
+                    problems.append(f"{where}.latent: unknown key '{key}'")
+
+        if not any(merged[category] for category in _PRESET_CATEGORIES):
+            problems.append(f"{where}: needs at least one preset")
+
+        # Same rules the node enforces at queue time, with the model's defaults filled in
+        constraints = merged.get("constraints", {})
+        constraints = {
+            "divisible_by": constraints.get("divisible_by", 8),
+            "min": constraints.get("min", 64),
+            "max": constraints.get("max", 4096),
+        }
+        if constraints["min"] > constraints["max"]:
+            problems.append(f"{where}.constraints: min {constraints['min']} is above max {constraints['max']}")
+        for item_where, (width, height) in added:
+            for violation in _constraint_violations(model_name, constraints, width, height):
+                problems.append(f"{item_where}: {violation}")
+
+        if "default" in entry:
+            dims = _user_dimensions(entry["default"], f"{where}.default", problems)
+            if dims is not None:
+                defaults[model_name] = dims
+
+        models[model_name] = merged
+
+    if problems:
+        raise ValueError("; ".join(problems))
+    return models, defaults
+
+
+def _parse_user_presets(path, raw):
+    """Decode a user presets file as JSON, or YAML by extension."""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML is not installed; use user_presets.json instead")
+        try:
+            return yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise ValueError(f"invalid YAML: {e}")
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"invalid JSON: {e}")
+
+
+def _apply_model_tables(models, defaults):
+    """Update the live tables in place, one key at a time, and invalidate changed models."""
+    changed = {
+        model_name for model_name in set(MODEL_RESOLUTIONS) | set(models)
+        if MODEL_RESOLUTIONS.get(model_name) != models.get(model_name)
+        or DEFAULT_RESOLUTIONS.get(model_name) != defaults.get(model_name)
+    }
+    # Per-key updates keep the dicts readable from other threads throughout
+    for model_name in changed:
+        if model_name in models:
+            MODEL_RESOLUTIONS[model_name] = models[model_name]
+        else:
+            MODEL_RESOLUTIONS.pop(model_name, None)
+        if model_name in defaults:
+            DEFAULT_RESOLUTIONS[model_name] = defaults[model_name]
+        else:
+            DEFAULT_RESOLUTIONS.pop(model_name, None)
+    if changed:
+        invalidate_resolution_index(changed)
+    return frozenset(changed)
+
+
+def reload_user_presets(path=None, force=False):
+    """
+    Pick up changes to the user presets file, rebuilding only the models it changes.
+
+    Checks are throttled to one per USER_PRESETS_CHECK_INTERVAL. The file is only read
+    when its mtime or size changed, and only re-applied when its content hash changed, so
+    calling this on every INPUT_TYPES request is cheap. An invalid file leaves the current
+    tables untouched. A removed file restores the built-in tables.
+
+    Args:
+        path (str, optional): Presets file (default: first of USER_PRESETS_PATHS that exists)
+        force (bool): Skip the throttle and mtime check (default: False)
+
+    Returns:
+        tuple: (changed: frozenset of model names, error: str or None); the error is
+            only returned once per file content
+    """
+    state = _user_presets_state
+    now = time.monotonic()
+    if not force and now - state["checked"] < USER_PRESETS_CHECK_INTERVAL:
+        return frozenset(), None
+    state["checked"] = now
+
+    stat = None
+    for candidate in ([path] if path else USER_PRESETS_PATHS):
+        try:
+            stat = os.stat(candidate)
+            path = candidate
+            break
+        except OSError:
+            continue
+    signature = (path, stat.st_mtime_ns, stat.st_size) if stat else None
+    if not force and signature == state["signature"]:
+        return frozenset(), None
+    state["signature"] = signature
+
+    if stat is None:
+        if state["digest"] is None:
+            return frozenset(), None
+        state.update(digest=None, path=None, models=(), error=None)
+        return _apply_model_tables(copy.deepcopy(_BUILTIN_MODEL_RESOLUTIONS), dict(_BUILTIN_DEFAULT_RESOLUTIONS)), None
+
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        return frozenset(), f"{path}: {e}"
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest == state["digest"]:
+        return frozenset(), None
+    state["digest"] = digest
+
+    try:
+        models, defaults = merge_user_presets(_parse_user_presets(path, raw))
+    except ValueError as e:
+        state["error"] = f"{path}: {e}"
+        return frozenset(), state["error"]
+
+    state.update(path=path, models=tuple(sorted(set(models) - set(_BUILTIN_MODEL_RESOLUTIONS))), error=None)
+    return _apply_model_tables(models, defaults), None
+
+
+def get_user_presets_status():
+    """
+    Describe the user presets currently applied.
+
+    Returns:
+        dict: path (None when no file is loaded), models (user-added model names) and
+            error (why the latest file content was rejected, or None)
+    """
+    state = _user_presets_state
+    return {"path": state["path"], "models": list(state["models"]), "error": state["error"]}
+
+
+# Where resolution lists come from: curated presets, generated buckets or both
+RESOLUTION_SOURCES = ["presets", "buckets", "both"]
+
+
+def get_resolution_list(model_name, source="presets"):
+    """
+    Get ordered list of resolution strings for a specific model.
+
+    Args:
+        model_name (str): Name of the model (or "All" for all unique resolutions)
+        source (str): "presets" (curated), "buckets" (generated at the model's native
+            pixel budget) or "both" (presets followed by buckets not already listed)
+
+    Returns:
+        list: Formatted resolution strings; presets in order square, portrait, landscape,
+            buckets from tallest to widest
+    """
+    index = get_resolution_index()
+    presets = index.model_labels.get(model_name, ())
+    if source == "presets":
+        return list(presets)
+
+    buckets = index.bucket_labels.get(model_name, ())
+    if source == "buckets":
+        return list(buckets)
+
+    listed = set(presets)
+    return list(presets) + [label for label in buckets if label not in listed]
+
+
+def get_selectable_resolutions():
+    """
+    Get every resolution label the node accepts (curated presets and generated buckets).
+
+    Returns:
+        list: Curated labels sorted by pixels, followed by bucket-only labels
+    """
+    return list(get_resolution_index().selectable_labels)
+
+
+def get_default_resolution(model_name):
+    """
+    Get the default/native resolution for a specific model.
+
+    Args:
+        model_name (str): Name of the model
+
+    Returns:
+        str: Formatted resolution string for the model's native resolution
+    """
+    default_labels = get_resolution_index().default_labels
+
+    # Fallback to the "All" default (1024x1024)
+    return default_labels.get(model_name, default_labels["All"])
+
+
+def get_all_resolutions():
+    """
+    Get all unique resolution strings across all models, sorted by dimensions.
+
+    Returns:
+        list: All unique resolution strings sorted by total pixels
+    """
+    return list(get_resolution_index().all_labels)
+
+
+def get_latent_format(model_name):
+    """
+    Get the latent geometry for a specific model.
+
+    Args:
+        model_name (str): Name of the model (unknown names and "All" use the default format)
+
+    Returns:
+        dict: channels, downscale, dtype and memory_format for the model's VAE latent
+    """
+    if model_name in MODEL_RESOLUTIONS:
+        return MODEL_RESOLUTIONS[model_name].get("latent", DEFAULT_LATENT_FORMAT)
+    return DEFAULT_LATENT_FORMAT
+
+
+def resolve_latent_dtype(model_name, latent_dtype="auto"):
+    """
+    Resolve a node dtype choice to a torch dtype name.
+
+    Args:
+        model_name (str): Name of the model
+        latent_dtype (str): "auto" (registry dtype), "fp32", "fp16" or "bf16" (default: "auto")
+
+    Returns:
+        str: torch dtype attribute name, e.g. "float16"
+
+    Raises:
+        ValueError: If latent_dtype is not one of LATENT_DTYPES
+    """
+    if latent_dtype == "auto":
+        return get_latent_format(model_name)["dtype"]
+    if latent_dtype not in LATENT_DTYPE_NAMES:
+        raise ValueError(f"Unknown latent dtype '{latent_dtype}', expected one of {LATENT_DTYPES}")
+    return LATENT_DTYPE_NAMES[latent_dtype]
+
+
+def get_latent_shape(model_name, width, height, batch_size=1):
+    """
+    Calculate the empty latent shape for an image of the given size.
+
+    Args:
+        model_name (str): Name of the model
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+        batch_size (int): Number of latent samples (default: 1)
+
+    Returns:
+        list: [batch_size, channels, height // downscale, width // downscale]
+    """
+    latent_format = get_latent_format(model_name)
+    downscale = latent_format["downscale"]
+    return [batch_size, latent_format["channels"], height // downscale, width // downscale]
+
+
+def get_latent_bytes(model_name, width, height, batch_size=1, latent_dtype="auto"):
+    """
+    Calculate the memory footprint of the empty latent for an image of the given size.
+
+    Args:
+        model_name (str): Name of the model
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+        batch_size (int): Number of latent samples (default: 1)
+        latent_dtype (str): Latent dtype choice, see resolve_latent_dtype (default: "auto")
+
+    Returns:
+        int: Size of the latent tensor in bytes
+    """
+    batch, channels, latent_height, latent_width = get_latent_shape(model_name, width, height, batch_size)
+    element_size = DTYPE_SIZES[resolve_latent_dtype(model_name, latent_dtype)]
+    return batch * channels * latent_height * latent_width * element_size
+
+
+# Result of plan_latent_memory; byte counts are ints, free_bytes is None when unknown
+MemoryPlan = namedtuple(
+    "MemoryPlan",
+    ["latent_bytes", "working_set_bytes", "free_bytes", "fits", "max_batch", "batch_splits"]
+)
+
+
+def plan_latent_memory(model_name, width, height, batch_size=1, free_bytes=None, latent_dtype="auto"):
+    """
+    Estimate the memory needed to create and sample a latent, and how to split the batch.
+
+    The working set is a rough per-model estimate of denoiser activations (including
+    CFG) per latent pixel from the "sampling" registry entry, on top of the latent itself.
+    Model weights are not included. This is a pure function with no torch dependency, so
+    schedulers can call it before queueing a prompt.
+
+    Args:
+        model_name (str): Name of the model
+        width (int): Image width in pixels (after any multiplier)
+        height (int): Image height in pixels (after any multiplier)
+        batch_size (int): Number of latent samples (default: 1)
+        free_bytes (int, optional): Available memory; when None the plan assumes it fits
+        latent_dtype (str): Latent dtype choice, see resolve_latent_dtype (default: "auto")
+
+    Returns:
+        MemoryPlan: latent_bytes, working_set_bytes, free_bytes, fits, max_batch (largest
+            batch that fits, or batch_size when free memory is unknown) and batch_splits
+            (batch sizes to run sequentially, empty if a single sample does not fit)
+    """
+    sample_latent_bytes = get_latent_bytes(model_name, width, height, 1, latent_dtype)
+    _, _, latent_height, latent_width = get_latent_shape(model_name, width, height, 1)
+    sampling = MODEL_RESOLUTIONS.get(model_name, {}).get("sampling", DEFAULT_SAMPLING_PROFILE)
+    sample_working_set = sample_latent_bytes + latent_height * latent_width * sampling["bytes_per_latent_pixel"]
+
+    latent_bytes = sample_latent_bytes * batch_size
+    working_set_bytes = sample_working_set * batch_size
+
+    if free_bytes is None:
+        return MemoryPlan(latent_bytes, working_set_bytes, None, True, batch_size, [batch_size])
+
+    max_batch = min(batch_size, free_bytes // sample_working_set) if sample_working_set else batch_size
+    if max_batch <= 0:
+        return MemoryPlan(latent_bytes, working_set_bytes, free_bytes, False, 0, [])
+
+    # Spread the batch evenly over the fewest runs that each fit
+    runs = -(-batch_size // max_batch)
+    base, remainder = divmod(batch_size, runs)
+    batch_splits = [base + 1] * remainder + [base] * (runs - remainder)
+    return MemoryPlan(latent_bytes, working_set_bytes, free_bytes, max_batch == batch_size, max_batch, batch_splits)
+
+
+# Result of plan_tiles; sizes and starts are in pixels, every tile has the same size
+TilePlan = namedtuple(
+    "TilePlan",
+    ["model", "width", "height", "batch_size", "tile_width", "tile_height", "overlap",
+     "x_starts", "y_starts", "latent_shape"]
+)
+
+
+def _tile_starts(length, tile, overlap):
+    """Evenly spread the fewest tiles of a given length (with at least overlap) over a span."""
+    if tile >= length:
+        return [0]
+    count = -(-(length - overlap) // (tile - overlap))
+    span = length - tile
+    return [round(i * span / (count - 1)) for i in range(count)]
+
+
+def plan_tiles(model_name, width, height, tile_size=1024, overlap=64, batch_size=1):
+    """
+    Split an image into equal overlapping tiles that each satisfy the model's constraints.
+
+    Works in latent cells so every tile starts on a latent boundary. Tile sides are
+    multiples of both divisible_by and the VAE downscale factor, clamped to the model's
+    min/max, and tiles are spread evenly so the last one ends flush with the image edge.
+    An image no larger than a tile along an axis gets a single full-length tile on it.
+
+    Args:
+        model_name (str): Name of the model
+        width (int): Image width in pixels (after any multiplier)
+        height (int): Image height in pixels (after any multiplier)
+        tile_size (int or None): Requested tile side in pixels (default: 1024); None plans a
+            single tile covering the whole image
+        overlap (int): Minimum overlap between neighbouring tiles in pixels (default: 64)
+        batch_size (int): Number of latent samples per tile (default: 1)
+
+    Returns:
+        TilePlan: Tile grid, overlap and per-tile latent shape
+
+    Raises:
+        ValueError: If tile_size is not positive
+    """
+    latent_format = get_latent_format(model_name)
+    downscale = latent_format["downscale"]
+    if tile_size is None:
+        return TilePlan(model_name, width, height, batch_size, width // downscale * downscale,
+                        height // downscale * downscale, 0, [0], [0],
+                        get_latent_shape(model_name, width, height, batch_size))
+    if tile_size <= 0:
+        raise ValueError(f"Tile size must be positive. Got {tile_size}")
+    constraints = get_constraints(model_name) or {"divisible_by": downscale, "min": downscale, "max": tile_size}
+    unit = math.lcm(constraints["divisible_by"], downscale) // downscale
+
+    tile_cells = min(tile_size, constraints["max"]) // downscale // unit * unit
+    tile_cells = max(tile_cells, -(-constraints["min"] // downscale // unit) * unit, unit)
+    overlap_cells = min(overlap // downscale, tile_cells // 2)
+
+    tiles = []
+    for length in (width // downscale, height // downscale):
+        tile = min(tile_cells, length)
+        tiles.append((tile, _tile_starts(length, tile, overlap_cells)))
+    (tile_width, x_starts), (tile_height, y_starts) = tiles
+
+    return TilePlan(
+        model=model_name,
+        width=width,
+        height=height,
+        batch_size=batch_size,
+        tile_width=tile_width * downscale,
+        tile_height=tile_height * downscale,
+        overlap=overlap_cells * downscale,
+        x_starts=[x * downscale for x in x_starts],
+        y_starts=[y * downscale for y in y_starts],
+        latent_shape=[batch_size, latent_format["channels"], tile_height, tile_width],
+    )
+
+
+def tile_blend_weights(starts, tile, length):
+    """
+    Feathered 1-D blend weights for tiles along one axis, summing to 1 at every position.
+
+    Each tile ramps linearly across the region it shares with its neighbours (no ramp at
+    the image edges); the ramps are then normalised by their sum. The outer product of the
+    x and y weights of a tile gives its 2-D blend mask, which also sums to 1 over all tiles.
+
+    Args:
+        starts (list): Tile start offsets along the axis
+        tile (int): Tile length (same unit as starts)
+        length (int): Axis length (same unit as starts)
+
+    Returns:
+        list: One list of tile-length weights per tile
+    """
+    ramps = []
+    for i, start in enumerate(starts):
+        end = start + tile
+        left = starts[i - 1] + tile - start if i > 0 else 0
+        right = end - starts[i + 1] if i + 1 < len(starts) else 0
+        ramp = []
+        for t in range(start, end):
+            weight = 1.0
+            if left > 0:
+                weight = min(weight, (t - start + 0.5) / left)
+            if right > 0:
+                weight = min(weight, (end - t - 0.5) / right)
+            ramp.append(weight)
+        ramps.append(ramp)
+
+    totals = [0.0] * length
+    for start, ramp in zip(starts, ramps):
+        for offset, weight in enumerate(ramp):
+            totals[start + offset] += weight
+    return [[weight / totals[start + offset] for offset, weight in enumerate(ramp)] for start, ramp in zip(starts, ramps)]
+
+
+# One stage of a hires schedule; cost is relative to a full-denoise pass at the base size
+HiresStage = namedtuple(
+    "HiresStage",
+    ["scale", "width", "height", "denoise", "latent_shape", "latent_bytes", "working_set_bytes", "cost"]
+)
+
+# Result of plan_hires_schedule; direct_cost is one full-denoise pass at the final size
+HiresSchedule = namedtuple(
+    "HiresSchedule",
+    ["model", "base_width", "base_height", "target_scale", "stages", "total_cost", "direct_cost", "largest_step"]
+)
+
+
+def _stage_cost(width, height, base_width, base_height, denoise):
+    """Relative sampling cost: equal linear (convolution) and quadratic (attention) terms in pixels."""
+    ratio = (width * height) / (base_width * base_height)
+    return denoise * (ratio + ratio * ratio) / 2
+
+
+def _snap_scaled(model_name, width, height, scale):
+    """Scale dimensions, rounding each side to the model's size unit; past the model's max the
+    scale is reduced so the aspect ratio is kept."""
+    downscale = get_latent_format(model_name)["downscale"]
+    constraints = get_constraints(model_name)
+    if constraints is None:
+        unit, low, high = downscale, downscale, None
+    else:
+        unit = constraints["divisible_by"] * downscale // gcd(constraints["divisible_by"], downscale)
+        low = -(-constraints["min"] // unit) * unit
+        high = constraints["max"] // unit * unit
+        scale = min(scale, high / width, high / height)
+
+    def snap(length):
+        length = max(round(length * scale / unit) * unit, low)
+        return min(length, high) if high is not None else length
+
+    return snap(width), snap(height)
+
+
+def plan_hires_schedule(model_name, width, height, target_scale, max_step=2.0, hires_denoise=0.5,
+                        scale_step=0.25, max_stages=4, batch_size=1):
+    """
+    Find the cheapest staged upscale from a base size to a target multiplier.
+
+    Candidate stages are the base scaled by every multiple of scale_step up to the target,
+    snapped to the model's divisible_by and VAE factor and clamped to its min/max (so a
+    target past the model's max ends at the max). The first stage is a full-denoise pass at
+    the base size; each later stage re-samples at hires_denoise. Stage cost grows with both
+    the pixel count (convolutions) and its square (attention), relative to the base pass.
+    A shortest-path search then picks the cheapest chain that ends at the final size in at
+    most max_stages stages and never upscales by more than max_step between stages, which
+    is the quality target: smaller steps keep more detail but cost more.
+
+    Args:
+        model_name (str): Name of the model
+        width (int): Base width in pixels
+        height (int): Base height in pixels
+        target_scale (float): Final size as a multiple of the base (>= 1)
+        max_step (float): Largest allowed upscale between consecutive stages (default: 2.0)
+        hires_denoise (float): Denoise strength of stages after the first (default: 0.5)
+        scale_step (float): Spacing of candidate stage scales (default: 0.25)
+        max_stages (int): Most stages, including the base pass (default: 4)
+        batch_size (int): Number of latent samples, for the memory estimates (default: 1)
+
+    Returns:
+        HiresSchedule: stages (tuple of HiresStage, base first), total_cost, direct_cost
+            and largest_step (the biggest upscale actually taken)
+
+    Raises:
+        ValueError: If the arguments are out of range or no schedule meets max_step
+            within max_stages
+    """
+    if target_scale < 1:
+        raise ValueError(f"target_scale must be at least 1, got {target_scale}")
+    if max_step <= 1:
+        raise ValueError(f"max_step must be above 1, got {max_step}")
+    if scale_step <= 0 or max_stages < 1:
+        raise ValueError("scale_step must be positive and max_stages at least 1")
+
+    # Candidate sizes in increasing order, dropping scales that snap to an earlier size
+    scales = [1 + i * scale_step for i in range(int((target_scale - 1) / scale_step + 1e-9) + 1)]
+    if scales[-1] < target_scale:
+        scales.append(target_scale)
+    candidates = [(width, height)]
+    for scale in scales[1:]:
+        dims = _snap_scaled(model_name, width, height, scale)
+        if dims[0] * dims[1] > candidates[-1][0] * candidates[-1][1]:
+            candidates.append(dims)
+
+    def step(i, j):
+        return max(candidates[j][0] / candidates[i][0], candidates[j][1] / candidates[i][1])
+
+    def cost(i):
+        return _stage_cost(*candidates[i], width, height, 1.0 if i == 0 else hires_denoise)
+
+    # best[k][i]: cheapest (cost, path) reaching candidate i in k + 1 stages
+    last = len(candidates) - 1
+    best = [{0: (cost(0), (0,))}]
+    for _ in range(max_stages - 1):
+        layer = {}
+        for i, (total, path) in best[-1].items():
+            for j in range(i + 1, last + 1):
+                if step(i, j) > max_step + 1e-9:
+                    break
+                option = (total + cost(j), path + (j,))
+                if j not in layer or option[0] < layer[j][0]:
+                    layer[j] = option
+        best.append(layer)
+    reached = [layer[last] for layer in best if last in layer]
+    if not reached:
+        raise ValueError(
+            f"No schedule reaches {candidates[last][0]}x{candidates[last][1]} from {width}x{height} "
+            f"in {max_stages} stages with steps of at most {max_step}x; raise max_step or max_stages"
+        )
+    total_cost, path = min(reached)
+
+    stages = []
+    for index in path:
+        stage_width, stage_height = candidates[index]
+        plan = plan_latent_memory(model_name, stage_width, stage_height, batch_size)
+        stages.append(HiresStage(
+            scale=round(stage_width / width, 4),
+            width=stage_width,
+            height=stage_height,
+            denoise=1.0 if index == 0 else hires_denoise,
+            latent_shape=get_latent_shape(model_name, stage_width, stage_height, batch_size),
+            latent_bytes=plan.latent_bytes,
+            working_set_bytes=plan.working_set_bytes,
+            cost=round(cost(index), 4),
+        ))
+
+    return HiresSchedule(
+        model=model_name,
+        base_width=width,
+        base_height=height,
+        target_scale=target_scale,
+        stages=tuple(stages),
+        total_cost=round(total_cost, 4),
+        direct_cost=round(_stage_cost(*candidates[last], width, height, 1.0), 4),
+        largest_step=round(max((step(i, j) for i, j in zip(path, path[1:])), default=1.0), 4),
+    )
+
+
+def parse_resolution_string(resolution_str):
+    """
+    Parse formatted resolution string back to width, height integers.
+
+    Args:
+        resolution_str (str): Format "1920x1080  (16:9 Landscape)" with possible padding
+
+    Returns:
+        tuple: (width, height)
+
+    Raises:
+        ValueError: If string format is invalid
+    """
+    # Fast path: labels produced by this module
+    dimensions = get_resolution_index().label_dimensions.get(resolution_str)
+    if dimensions is not None:
+        return dimensions
+
+    try:
+        # Format: "1920x1080  (16:9 Landscape)" - may have padding spaces
+        # Extract the dimension part (before the opening parenthesis)
+        dimension_part = resolution_str.split("(")[0].strip()
+
+        if not dimension_part or 'x' not in dimension_part:
+            raise ValueError(f"No dimension part found in: {resolution_str}")
+
+        # Split on 'x' and convert to integers
+        width, height = map(int, dimension_part.split("x"))
+
+        return (width, height)
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"Invalid resolution format: {resolution_str}")
+
+
+def _nearest_sizes(sizes, value):
+    """Return the valid sizes immediately below and above value."""
+    position = bisect_left(sizes, value)
+    return sizes[max(position - 1, 0):position + 1]
+
+
+def snap_dimensions(model_name, width, height, ratio_tolerance=0.05, pixel_tolerance=0.15):
+    """
+    Snap dimensions to the nearest size allowed by a model's constraints.
+
+    Dimensions outside the model's min/max are first scaled uniformly into range, then
+    the closest valid (width, height) pair is chosen by combined aspect ratio and pixel
+    count error (in log space) using the model's precomputed valid sizes.
+
+    Args:
+        model_name (str): Name of the model
+        width (int): Requested width in pixels
+        height (int): Requested height in pixels
+        ratio_tolerance (float): Maximum relative aspect ratio error (default: 0.05)
+        pixel_tolerance (float): Maximum relative pixel count error after range scaling (default: 0.15)
+
+    Returns:
+        tuple: (width, height) satisfying the model's constraints; unchanged for unknown models
+
+    Raises:
+        ValueError: If no valid size is within tolerance of the requested dimensions
+    """
+    sizes = get_resolution_index().valid_sizes.get(model_name)
+    if not sizes or width <= 0 or height <= 0:
+        return (width, height)
+
+    # Scale uniformly into [min, max] so the aspect ratio survives out-of-range requests
+    scale = min(1.0, sizes[-1] / width, sizes[-1] / height)
+    scale = max(scale, sizes[0] / width, sizes[0] / height)
+    target_width = width * scale
+    target_height = height * scale
+    target_ratio = width / height
+    target_pixels = target_width * target_height
+
+    candidates = set()
+    for candidate_width in _nearest_sizes(sizes, target_width):
+        for candidate_height in _nearest_sizes(sizes, candidate_width / target_ratio):
+            candidates.add((candidate_width, candidate_height))
+    for candidate_height in _nearest_sizes(sizes, target_height):
+        for candidate_width in _nearest_sizes(sizes, candidate_height * target_ratio):
+            candidates.add((candidate_width, candidate_height))
+
+    def error(candidate):
+        ratio_error = abs(math.log(candidate[0] / candidate[1] / target_ratio))
+        pixel_error = abs(math.log(candidate[0] * candidate[1] / target_pixels))
+        return (ratio_error + pixel_error, candidate)
+
+    best_width, best_height = min(candidates, key=error)
+
+    ratio_error = abs(best_width / best_height / target_ratio - 1)
+    pixel_error = abs(best_width * best_height / target_pixels - 1)
+    if ratio_error > ratio_tolerance or pixel_error > pixel_tolerance:
+        raise ValueError(
+            f"Cannot snap {width}x{height} to {model_name} constraints: nearest valid size "
+            f"{best_width}x{best_height} is off by {ratio_error:.1%} aspect ratio, {pixel_error:.1%} pixels"
+        )
+
+    return (best_width, best_height)
+
+
+def format_bytes(num_bytes):
+    """
+    Format a byte count for messages.
+
+    Args:
+        num_bytes (int): Size in bytes
+
+    Returns:
+        str: Human readable size like "1.50 GiB"
+    """
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    for unit in ["KiB", "MiB", "GiB"]:
+        num_bytes /= 1024
+        if num_bytes < 1024 or unit == "GiB":
+            return f"{num_bytes:.2f} {unit}"
+
+
+def dimension_violations(model_name, width, height):
+    """
+    List every way dimensions violate a model's constraints.
+
+    Args:
+        model_name (str): Model name
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Returns:
+        list: Error messages, empty when valid or the model has no constraints
+    """
+    constraints = get_constraints(model_name)
+    if constraints is None:
+        return []
+    return _constraint_violations(model_name, constraints, width, height)
+
+
+def _constraint_violations(model_name, constraints, width, height):
+    """Messages for dimensions breaking a filled-in constraints dict (see dimension_violations)."""
+    divisible_by = constraints["divisible_by"]
+    min_dim = constraints["min"]
+    max_dim = constraints["max"]
+    violations = []
+
+    # Check divisibility
+    if width % divisible_by != 0:
+        violations.append(
+            f"{model_name} requires width divisible by {divisible_by}. "
+            f"Got {width} (remainder: {width % divisible_by})"
+        )
+
+    if height % divisible_by != 0:
+        violations.append(
+            f"{model_name} requires height divisible by {divisible_by}. "
+            f"Got {height} (remainder: {height % divisible_by})"
+        )
+
+    # Check bounds
+    if width < min_dim or width > max_dim:
+        violations.append(
+            f"{model_name} requires width between {min_dim} and {max_dim}. Got {width}"
+        )
+
+    if height < min_dim or height > max_dim:
+        violations.append(
+            f"{model_name} requires height between {min_dim} and {max_dim}. Got {height}"
+        )
+
+    return violations
+
+
+def dimension_violation_mask(model_names, widths, heights):
+    """
+    Flag constraint violations for many dimensions at once in a single vectorized pass.
+
+    Applies the same divisibility and bounds rules as dimension_violations element-wise;
+    use that function on flagged rows to get the messages.
+
+    Args:
+        model_names (sequence): Model name per row (unknown names and "All" are unconstrained)
+        widths (array-like): Widths in pixels
+        heights (array-like): Heights in pixels, same length as widths
+
+    Returns:
+        numpy.ndarray: Boolean array, True where dimension_violations would be non-empty
+    """
+    import numpy as np
+
+    widths = np.asarray(widths, dtype=np.int64)
+    heights = np.asarray(heights, dtype=np.int64)
+    unconstrained = (1, 0, np.iinfo(np.int64).max)
+    table = {}
+    for model_name in set(model_names):
+        constraints = get_constraints(model_name)
+        table[model_name] = (
+            (constraints["divisible_by"], constraints["min"], constraints["max"]) if constraints else unconstrained
+        )
+    limits = np.array([table[model_name] for model_name in model_names], dtype=np.int64).reshape(-1, 3)
+    divisible_by, min_dim, max_dim = limits[:, 0], limits[:, 1], limits[:, 2]
+
+    return (
+        (widths % divisible_by != 0) | (heights % divisible_by != 0)
+        | (widths < min_dim) | (widths > max_dim)
+        | (heights < min_dim) | (heights > max_dim)
+    )
+
+
+def validate_dimensions(model_name, width, height):
+    """
+    Validate dimensions against model-specific constraints.
+
+    Args:
+        model_name (str): Model name
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Raises:
+        ValueError: If dimensions violate model constraints (first violation)
+    """
+    violations = dimension_violations(model_name, width, height)
+    if violations:
+        raise ValueError(violations[0])
+
+
+def filter_resolutions(model_name, orientation="All", aspect_ratios=None, min_pixels=0, max_pixels=None):
+    """
+    Select preset resolutions for a model by orientation, aspect ratio and pixel count.
+
+    Args:
+        model_name (str): Name of the model (or "All")
+        orientation (str): "All", "Square", "Portrait" or "Landscape" (default: "All")
+        aspect_ratios (iterable, optional): Ratio labels to keep, e.g. {"16:9", "3:2"}; None keeps all
+        min_pixels (int): Minimum width * height (default: 0)
+        max_pixels (int, optional): Maximum width * height; None for no limit
+
+    Returns:
+        list: (width, height) tuples in the model's preset order
+    """
+    index = get_resolution_index()
+    aspect_ratios = set(aspect_ratios) if aspect_ratios else None
+    selected = []
+
+    for label in index.model_labels.get(model_name, ()):
+        width, height = index.label_dimensions[label]
+        pixels = width * height
+        if orientation != "All" and get_orientation(width, height) != orientation:
+            continue
+        if aspect_ratios is not None and calculate_aspect_ratio(width, height) not in aspect_ratios:
+            continue
+        if pixels < min_pixels or (max_pixels is not None and pixels > max_pixels):
+            continue
+        selected.append((width, height))
+
+    return selected
+
+
+def nearest_resolution(model_name, width, height, source="presets", pixel_weight=0.1):
+    """
+    Find the preset closest to arbitrary dimensions, by aspect ratio first and size second.
+
+    Args:
+        model_name (str): Name of the model (or "All")
+        width (int): Source width in pixels
+        height (int): Source height in pixels
+        source (str): Resolution list to search, see get_resolution_list (default: "presets")
+        pixel_weight (float): Weight of log pixel-count error relative to log aspect-ratio
+            error (default: 0.1, so aspect ratio dominates and size breaks near-ties)
+
+    Returns:
+        tuple or None: (width, height, label) of the nearest preset, None if the model has none
+    """
+    label_dimensions = get_resolution_index().label_dimensions
+    log_ratio = math.log(width / height)
+    log_pixels = math.log(width * height)
+
+    best = None
+    for label in get_resolution_list(model_name, source):
+        preset_width, preset_height = label_dimensions[label]
+        score = (
+            abs(math.log(preset_width / preset_height) - log_ratio)
+            + pixel_weight * abs(math.log(preset_width * preset_height) - log_pixels)
+        )
+        if best is None or score < best[0]:
+            best = (score, (preset_width, preset_height, label))
+
+    return best[1] if best else None
+
+
+# (index, {(model, source): (labels, dimensions, log ratios, log pixels)}), rebuilt with the index
+_preset_arrays = (None, {})
+
+
+def _preset_table(model_name, source):
+    """Preset labels with numpy arrays of their dimensions, log aspect ratios and log pixel counts."""
+    import numpy as np
+
+    global _preset_arrays
+    index = get_resolution_index()
+    if _preset_arrays[0] is not index:
+        _preset_arrays = (index, {})
+    tables = _preset_arrays[1]
+    key = (model_name, source)
+    if key not in tables:
+        labels = tuple(get_resolution_list(model_name, source))
+        dimensions = np.array([index.label_dimensions[label] for label in labels], dtype=np.int64).reshape(-1, 2)
+        tables[key] = (
+            labels,
+            dimensions,
+            np.log(dimensions[:, 0] / dimensions[:, 1]),
+            np.log(dimensions[:, 0] * dimensions[:, 1]),
+        )
+    return tables[key]
+
+
+def nearest_resolutions(model_name, widths, heights, source="presets", pixel_weight=0.1):
+    """
+    Find the nearest preset for many dimensions in one vectorized pass.
+
+    Scores every (query, preset) pair like nearest_resolution, against per-model arrays
+    that are built once per resolution index.
+
+    Args:
+        model_name (str): Name of the model (or "All")
+        widths (array-like): Source widths in pixels
+        heights (array-like): Source heights in pixels, same length as widths
+        source (str): Resolution list to search, see get_resolution_list (default: "presets")
+        pixel_weight (float): Weight of log pixel-count error relative to log aspect-ratio
+            error (default: 0.1)
+
+    Returns:
+        list: (width, height, label) of the nearest preset per query; empty if the model
+            has no presets
+    """
+    import numpy as np
+
+    labels, dimensions, log_ratios, log_pixels = _preset_table(model_name, source)
+    if not labels:
+        return []
+    widths = np.asarray(widths, dtype=np.float64).reshape(-1, 1)
+    heights = np.asarray(heights, dtype=np.float64).reshape(-1, 1)
+    scores = (
+        np.abs(log_ratios - np.log(widths / heights))
+        + pixel_weight * np.abs(log_pixels - np.log(widths * heights))
+    )
+    best = scores.argmin(axis=1)
+    return [(int(dimensions[i, 0]), int(dimensions[i, 1]), labels[i]) for i in best]
+
+
+def settings_fingerprint(settings):
+    """
+    Hash a dict of node settings into a stable fingerprint.
+
+    Args:
+        settings (dict): JSON-serializable settings; key order does not matter
+
+    Returns:
+        str: Hex digest identifying the settings
+    """
+    body = json.dumps(settings, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+
+def _describe_resolution(label):
+    """Describe a preset label as a JSON-friendly dict."""
+    width, height = parse_resolution_string(label)
+    return {
+        "label": label,
+        "width": width,
+        "height": height,
+        "aspect_ratio": calculate_aspect_ratio(width, height),
+        "orientation": get_orientation(width, height),
+    }
+
+
+def main(argv=None):
+    """
+    Command line entry point printing JSON for shell pipelines.
+
+    Args:
+        argv (list, optional): Arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Exit status (1 when validation fails)
+    """
+    parser = argparse.ArgumentParser(prog="python -m resolution_presets", description=__doc__.strip().split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    tables = subparsers.add_parser("tables", help="Dump resolution tables")
+    tables.add_argument("--model", help="Only this model (\"All\" for the deduplicated list)")
+
+    validate = subparsers.add_parser("validate", help="Validate dimensions against a model's constraints")
+    validate.add_argument("model")
+    validate.add_argument("width", type=int)
+    validate.add_argument("height", type=int)
+    validate.add_argument("--multiplier", type=int, default=1, help="Multiplier applied first (default: 1)")
+    validate.add_argument("--snap", action="store_true", help="Also report the nearest valid size")
+
+    plan = subparsers.add_parser("plan", help="Estimate latent and sampling memory")
+    plan.add_argument("model")
+    plan.add_argument("width", type=int)
+    plan.add_argument("height", type=int)
+    plan.add_argument("--batch", type=int, default=1)
+    plan.add_argument("--free-bytes", type=int, help="Available memory to plan batch splits against")
+
+    hires = subparsers.add_parser("hires", help="Plan a staged hires-fix upscale")
+    hires.add_argument("model")
+    hires.add_argument("width", type=int)
+    hires.add_argument("height", type=int)
+    hires.add_argument("--target", type=float, default=2.0, help="Target multiplier (default: 2)")
+    hires.add_argument("--max-step", type=float, default=2.0, help="Largest upscale between stages (default: 2)")
+    hires.add_argument("--denoise", type=float, default=0.5, help="Denoise of stages after the first (default: 0.5)")
+    hires.add_argument("--max-stages", type=int, default=4)
+
+    args = parser.parse_args(argv)
+    status = 0
+
+    if args.command == "tables":
+        index = get_resolution_index()
+        models = [args.model] if args.model else list(index.model_labels)
+        result = {
+            model_name: [_describe_resolution(label) for label in index.model_labels.get(model_name, ())]
+            for model_name in models
+        }
+    elif args.command == "validate":
+        width = args.width * args.multiplier
+        height = args.height * args.multiplier
+        violations = dimension_violations(args.model, width, height)
+        result = {
+            "model": args.model,
+            "width": width,
+            "height": height,
+            "valid": not violations,
+            "errors": violations,
+            "latent_shape": get_latent_shape(args.model, width, height),
+            "latent_bytes": get_latent_bytes(args.model, width, height),
+        }
+        if args.snap:
+            try:
+                result["snapped"] = list(snap_dimensions(args.model, width, height))
+            except ValueError as e:
+                result["snapped"] = None
+                result["errors"].append(str(e))
+        status = 0 if result["valid"] else 1
+    elif args.command == "hires":
+        schedule = plan_hires_schedule(args.model, args.width, args.height, args.target, args.max_step,
+                                       args.denoise, max_stages=args.max_stages)
+        result = {**schedule._asdict(), "stages": [stage._asdict() for stage in schedule.stages]}
+    else:
+        result = plan_latent_memory(args.model, args.width, args.height, args.batch, args.free_bytes)._asdict()
+
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return status
+
+
+# Apply any user presets at import so scripts and the node start from the same tables.
+# This stays at the end of the module: validation needs every helper above.
+reload_user_presets()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
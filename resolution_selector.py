@@ -1,257 +1,1078 @@
-import torch
+import concurrent.futures
+import functools
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Preset tables and torch-free helpers live in resolution_presets. The second import keeps the
+# public names that were defined here before the split importable from this module
+try:
+    from .resolution_presets import (
+        DTYPE_SIZES, LATENT_DTYPES, MEMORY_FORMATS, MODEL_RESOLUTIONS, RESOLUTION_SOURCES,
+        filter_resolutions, format_bytes, format_resolution, get_latent_bytes, get_latent_format,
+        get_latent_shape, get_presets_payload, get_selectable_resolutions, get_user_presets_status,
+        nearest_resolutions, parse_resolution_string, plan_hires_schedule, plan_latent_memory,
+        plan_tiles, reload_user_presets, resolve_latent_dtype, settings_fingerprint,
+        snap_dimensions, tile_blend_weights, validate_dimensions,
+    )
+    from .resolution_presets import (  # noqa: F401
+        DEFAULT_LATENT_FORMAT, DEFAULT_RESOLUTIONS, DEFAULT_SAMPLING_PROFILE, COMMON_RATIOS,
+        COMMON_RATIO_LABELS, RATIO_BOUNDARIES, MemoryPlan, ResolutionIndex, build_resolution_index,
+        calculate_aspect_ratio, classify_aspect_ratios, gcd, get_all_resolutions, get_constraints,
+        get_default_resolution, get_orientation, get_resolution_index, get_resolution_list,
+        invalidate_resolution_index,
+    )
+except ImportError:
+    # Only the script case (tests, benchmark) has no parent package; anything else is a real error
+    if __package__:
+        raise
+    from resolution_presets import (
+        DTYPE_SIZES, LATENT_DTYPES, MEMORY_FORMATS, MODEL_RESOLUTIONS, RESOLUTION_SOURCES,
+        filter_resolutions, format_bytes, format_resolution, get_latent_bytes, get_latent_format,
+        get_latent_shape, get_presets_payload, get_selectable_resolutions, get_user_presets_status,
+        nearest_resolutions, parse_resolution_string, plan_hires_schedule, plan_latent_memory,
+        plan_tiles, reload_user_presets, resolve_latent_dtype, settings_fingerprint,
+        snap_dimensions, tile_blend_weights, validate_dimensions,
+    )
+    from resolution_presets import (  # noqa: F401
+        DEFAULT_LATENT_FORMAT, DEFAULT_RESOLUTIONS, DEFAULT_SAMPLING_PROFILE, COMMON_RATIOS,
+        COMMON_RATIO_LABELS, RATIO_BOUNDARIES, MemoryPlan, ResolutionIndex, build_resolution_index,
+        calculate_aspect_ratio, classify_aspect_ratios, gcd, get_all_resolutions, get_constraints,
+        get_default_resolution, get_orientation, get_resolution_index, get_resolution_list,
+        invalidate_resolution_index,
+    )
 
 try:
-    import comfy.model_management
-    COMFY_AVAILABLE = True
+    from aiohttp import web
 except ImportError:
-    COMFY_AVAILABLE = False
-
-
-# Model-specific resolution presets with constraints
-# Includes: model-optimized sizes + photo print (4x6, 5x7, 8x10) + digital/social + canvas art ratios
-MODEL_RESOLUTIONS = {
-    "Flux": {
-        "square": [(512, 512), (768, 768), (1024, 1024), (1088, 1088), (1280, 1280), (1536, 1536), (1920, 1920), (2048, 2048)],
-        "portrait": [(688, 2048), (768, 1344), (832, 1216), (896, 1152), (928, 1664), (1024, 1536), (1024, 1792), (1024, 2048), (1088, 1920), (1152, 2048), (1200, 1792), (1360, 2048), (1456, 2048), (1536, 2048), (1616, 2048), (1632, 2048), (1712, 2048)],
-        "landscape": [(1280, 720), (1344, 768), (1216, 832), (1152, 896), (1536, 1024), (1664, 928), (1792, 1024), (1792, 1200), (1920, 1088), (2048, 688), (2048, 1024), (2048, 1152), (2048, 1360), (2048, 1456), (2048, 1536), (2048, 1616), (2048, 1632), (2048, 1712)],
-        "constraints": {"divisible_by": 16, "min": 256, "max": 2048}
-    },
-    "Qwen Image": {
-        "square": [(1024, 1024), (1080, 1080), (1280, 1280), (1328, 1328), (1536, 1536), (1920, 1920), (2048, 2048)],
-        "portrait": [(680, 2048), (928, 1664), (1024, 1536), (1024, 2048), (1080, 1920), (1140, 1472), (1152, 2048), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
-        "landscape": [(1280, 720), (1472, 1140), (1536, 1024), (1664, 928), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1152), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
-        "constraints": {"divisible_by": 8, "min": 256, "max": 2048}
-    },
-    "Z-Image": {
-        "square": [(512, 512), (768, 768), (1024, 1024), (1080, 1080), (1280, 1280), (1536, 1536), (1920, 1920), (2048, 2048)],
-        "portrait": [(680, 2048), (720, 1280), (768, 1024), (1024, 2048), (1080, 1920), (1152, 2048), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
-        "landscape": [(1024, 768), (1280, 720), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1152), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
-        "constraints": {"divisible_by": 8, "min": 256, "max": 2048}
-    },
-    "SD 1.5": {
-        "square": [(512, 512), (768, 768), (1024, 1024), (1080, 1080), (1280, 1280), (1536, 1536)],
-        "portrait": [(512, 768), (512, 682), (512, 1024), (680, 2048), (768, 1024), (768, 1344), (1024, 2048), (1080, 1920), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
-        "landscape": [(768, 512), (1024, 512), (1024, 768), (1280, 720), (1344, 768), (1536, 512), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
-        "constraints": {"divisible_by": 8, "min": 256, "max": 2048}
-    },
-    "SDXL": {
-        "square": [(1024, 1024), (1080, 1080), (1280, 1280), (1536, 1536), (1920, 1920), (2048, 2048)],
-        "portrait": [(640, 1536), (680, 2048), (768, 1344), (832, 1216), (896, 1152), (1024, 1536), (1024, 2048), (1080, 1920), (1152, 2048), (1200, 1800), (1368, 2048), (1464, 2048), (1536, 2048), (1608, 2048), (1640, 2048), (1704, 2048)],
-        "landscape": [(1152, 896), (1216, 832), (1280, 720), (1344, 768), (1536, 640), (1536, 1024), (1800, 1200), (1920, 1080), (2048, 680), (2048, 1024), (2048, 1152), (2048, 1368), (2048, 1464), (2048, 1536), (2048, 1608), (2048, 1640), (2048, 1704)],
-        "constraints": {"divisible_by": 8, "min": 256, "max": 2048}
-    }
-}
+    web = None
 
+try:
+    from server import PromptServer
+except ImportError:
+    PromptServer = None
 
-def gcd(a, b):
-    """
-    Calculate greatest common divisor using Euclidean algorithm.
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
-    Args:
-        a (int): First number
-        b (int): Second number
+logger = logging.getLogger(__name__)
+
+# One JSON line per instrumented select_resolution call
+stats_logger = logging.getLogger(__name__ + ".stats")
+
+# Route serving the preset index to the web extension
+PRESETS_ROUTE = "/resolution_selector/presets"
+
+# Route serving instrumentation counters (see enable_stats)
+STATS_ROUTE = "/resolution_selector/stats"
+
+# Set to 1/true/yes/on to instrument the node at import; when unset nothing is wrapped
+STATS_ENV_VAR = "RESOLUTION_SELECTOR_STATS"
+
+# Latency histogram size: bucket i counts calls under 2**i microseconds, the last is open-ended
+LATENCY_BUCKETS = 24
+
+# How empty latents are allocated: "pooled" shares zero-filled buffers across prompts,
+# "eager" zero-fills a private buffer on every call and "lazy" returns a zero-stride view
+# of a single zero element (no per-pixel memory). Nothing is materialised: in-place writes to a
+# lazy latent raise RuntimeError, so consumers must .clone() it before modifying it in place
+ALLOCATION_STRATEGIES = ["pooled", "eager", "lazy"]
+
+# Result of allocate_latent; logical_bytes is the dense tensor size, allocated_bytes what
+# this call actually reserved (0 for pool hits and lazy views)
+LatentAllocation = namedtuple(
+    "LatentAllocation",
+    ["shape", "dtype", "device", "strategy", "pinned", "logical_bytes", "allocated_bytes", "seconds"]
+)
+
+# What latent outputs contain: zeros, or deterministic Gaussian noise for the given seed
+LATENT_MODES = ["empty", "noise"]
+
+# Result of NoisePrefetcher.get; saved_seconds is generation time taken off the critical path
+NoiseReport = namedtuple("NoiseReport", ["seed", "hit", "generate_seconds", "wait_seconds", "saved_seconds"])
+
+# Output slots of ResolutionSelector that carry latents, built only when connected
+LATENT_OUTPUT_SLOTS = {"latent": 2, "custom_latent": 5}
+
+# Single-tile plans kept for untiled runs before the cache is reset
+SINGLE_TILE_PLAN_CACHE_SIZE = 256
+
+# Placeholder latents kept for unconnected outputs before the cache is reset
+PLACEHOLDER_CACHE_SIZE = 256
+
+# Minimum seconds between OS probes of available CPU memory outside ComfyUI; reading it
+# costs more than the rest of a cached run, and the fail-fast check needs no fresher value
+CPU_MEMORY_CHECK_INTERVAL = 1.0
+
+# torch and comfy.model_management are imported on first use so that loading the node
+# (and the preset tables) stays fast; see resolution_presets for the torch-free core
+_torch = None
+_model_management = None
+_cpu_memory_state = {"checked": float("-inf"), "available": None}
+
+
+def import_torch():
+    """
+    Import torch on first use.
 
     Returns:
-        int: Greatest common divisor
+        module: The torch module
     """
-    while b != 0:
-        a, b = b, a % b
-    return a
+    global _torch
+    if _torch is None:
+        import torch
+        _torch = torch
+    return _torch
 
 
-def calculate_aspect_ratio(width, height):
+@functools.lru_cache(maxsize=None)
+def torch_name(value):
     """
-    Calculate simplified aspect ratio from dimensions, using nearest common ratio.
+    Name a torch dtype or device for reports, caching it since str() on them is slow.
 
     Args:
-        width (int): Width in pixels
-        height (int): Height in pixels
+        value (torch.dtype or torch.device): Value to name
 
     Returns:
-        str: Aspect ratio like "16:9" or "1:1"
-    """
-    # Calculate actual ratio as decimal
-    actual_ratio = width / height
-
-    # Common aspect ratios (ratio_value, "width:height" string)
-    common_ratios = [
-        (1.0, "1:1"),      # Square
-        (1.25, "5:4"),     # 1.25
-        (1.33, "4:3"),     # 1.333...
-        (1.5, "3:2"),      # 1.5
-        (1.6, "16:10"),    # 1.6
-        (1.78, "16:9"),    # 1.777...
-        (2.0, "2:1"),      # 2.0
-        (2.35, "21:9"),    # 2.333... (ultrawide)
-        (2.4, "12:5"),     # 2.4
-        (3.0, "3:1"),      # 3.0
-        # Portrait ratios
-        (0.75, "3:4"),     # 0.75
-        (0.67, "2:3"),     # 0.666...
-        (0.625, "5:8"),    # 0.625
-        (0.56, "9:16"),    # 0.5625
-        (0.5, "1:2"),      # 0.5
-        (0.42, "5:12"),    # 0.4166...
-        (0.33, "1:3"),     # 0.333... (panoramic)
-    ]
-
-    # Find closest common ratio by absolute difference
-    closest_ratio = min(common_ratios, key=lambda r: abs(actual_ratio - r[0]))
-    return closest_ratio[1]
-
-
-def format_resolution(width, height):
-    """
-    Format resolution tuple into display string with aspect ratio and orientation.
-    Uses fixed-width formatting for better alignment in dropdowns.
+        str: The name without the "torch." prefix, e.g. "float16" or "cpu"
+    """
+    return str(value).replace("torch.", "", 1)
 
-    Args:
-        width (int): Width in pixels
-        height (int): Height in pixels
+
+def get_model_management():
+    """
+    Import comfy.model_management on first use.
 
     Returns:
-        str: Formatted string like "1920x1080  (16:9 Landscape)" with consistent spacing
+        module or None: comfy.model_management, or None outside ComfyUI
     """
-    aspect_ratio = calculate_aspect_ratio(width, height)
+    global _model_management
+    if _model_management is None:
+        try:
+            import comfy.model_management
+            _model_management = comfy.model_management
+        except ImportError:
+            _model_management = False
+    return _model_management or None
 
-    if width == height:
-        orientation = "Square"
-    elif width < height:
-        orientation = "Portrait"
-    else:
-        orientation = "Landscape"
 
-    # Format with fixed width for better alignment (e.g., "1920x1080  ")
-    # Most resolutions are 4 digits, so we pad to 9 characters (4x4 + 'x')
-    resolution_str = f"{width}x{height}"
-    padded_resolution = resolution_str.ljust(13)  # Pad to 13 chars for alignment
+def check_user_presets():
+    """
+    Reload the user presets file if it changed, logging what happened.
+
+    Throttled by reload_user_presets, so it is cheap enough to call from INPUT_TYPES.
+    """
+    changed, error = reload_user_presets()
+    if error:
+        logger.warning("ResolutionSelector: ignoring invalid user presets, keeping previous tables: %s", error)
+    elif changed:
+        logger.info("ResolutionSelector: reloaded user presets for %s", ", ".join(sorted(changed)))
 
-    return f"{padded_resolution}({aspect_ratio} {orientation})"
 
+# The import-time load in resolution_presets has no logger; report its outcome here
+if get_user_presets_status()["error"]:
+    logger.warning("ResolutionSelector: ignoring invalid user presets: %s", get_user_presets_status()["error"])
 
-def get_resolution_list(model_name):
+
+def get_free_memory(device):
     """
-    Generate ordered list of resolution strings for a specific model.
+    Probe free memory on a device, using ComfyUI's model management when available.
 
     Args:
-        model_name (str): Name of the model (or "All" for all unique resolutions)
+        device (torch.device): Device to probe
 
     Returns:
-        list: Formatted resolution strings in order: square, portrait, landscape
+        int or None: Free bytes, or None when it cannot be determined
     """
-    if model_name == "All":
-        return get_all_resolutions()
-
-    if model_name not in MODEL_RESOLUTIONS:
-        return []
-
-    model_data = MODEL_RESOLUTIONS[model_name]
-    resolutions = []
+    model_management = get_model_management()
+    if model_management is not None:
+        return model_management.get_free_memory(device)
+
+    # CPU fallback without ComfyUI, re-probed at most once per CPU_MEMORY_CHECK_INTERVAL
+    if getattr(device, "type", "cpu") != "cpu":
+        return None
+    state = _cpu_memory_state
+    now = time.monotonic()
+    if now - state["checked"] >= CPU_MEMORY_CHECK_INTERVAL:
+        state["available"] = get_available_cpu_memory()
+        state["checked"] = now
+    return state["available"]
+
+
+def get_available_cpu_memory():
+    """
+    Probe memory the OS can hand out without swapping, including reclaimable page cache.
 
-    # Order: square first, then portrait, then landscape
-    for category in ["square", "portrait", "landscape"]:
-        for width, height in model_data[category]:
-            resolutions.append(format_resolution(width, height))
+    Uses psutil when installed, then MemAvailable from /proc/meminfo. sysconf's free pages
+    leave out the page cache, so they are only the last resort.
 
-    return resolutions
+    Returns:
+        int or None: Available bytes, or None when it cannot be determined
+    """
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
 
 
-def get_default_resolution(model_name):
+def get_connected_outputs(prompt, node_id):
     """
-    Get the default/native resolution for a specific model.
+    Find which output slots of a node are consumed in an API-format prompt.
 
     Args:
-        model_name (str): Name of the model
+        prompt (dict): Prompt graph, node id -> {"class_type": ..., "inputs": {...}} where
+            linked inputs are [source_node_id, output_slot]
+        node_id (str): Id of the node whose outputs to look up
 
     Returns:
-        str: Formatted resolution string for the model's native resolution
+        frozenset or None: Connected output slot indices, or None when the prompt or id is
+            unavailable (callers should then assume every output is used)
+    """
+    if not prompt or node_id is None:
+        return None
+    node_id = str(node_id)
+    connected = set()
+    for node in prompt.values():
+        for value in node.get("inputs", {}).values():
+            if isinstance(value, list) and len(value) == 2 and str(value[0]) == node_id:
+                connected.add(value[1])
+    return frozenset(connected)
+
+
+class LatentPool:
     """
-    # Model-specific native/optimal resolutions
-    default_resolutions = {
-        "Flux": (1024, 1024),      # Flux native
-        "Qwen Image": (1328, 1328), # Qwen native
-        "Z-Image": (1024, 1024),    # Z-Image native
-        "SD 1.5": (512, 512),       # SD 1.5 native
-        "SDXL": (1024, 1024),       # SDXL native
-        "All": (1024, 1024),        # Default for "All"
-    }
+    Bounded, thread-safe pool of zero-filled latent tensors.
+
+    Buffers are keyed by (batch, channels, height, width, dtype, device) and evicted
+    least-recently-used first once the pool exceeds its byte budget. The same tensor is
+    handed to every caller requesting that shape, which matches how ComfyUI already shares
+    cached node outputs between prompts. If a consumer writes to a pooled buffer in place,
+    the change is detected through the tensor version counter and the buffer is re-zeroed
+    before it is handed out again.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, max_entries=64):
+        """
+        Args:
+            max_bytes (int): Total byte budget for pooled tensors
+            max_entries (int): Maximum number of distinct shapes kept in the pool
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rezeroed = 0
+
+    def acquire(self, shape, dtype=None, device=None, memory_format=None, pin_memory=False):
+        """
+        Return a shared zero-filled tensor of the requested shape.
 
-    if model_name in default_resolutions:
-        width, height = default_resolutions[model_name]
-        return format_resolution(width, height)
+        Args:
+            shape (list): Tensor shape, e.g. [batch, channels, height, width]
+            dtype (torch.dtype, optional): Tensor dtype (default: torch.float32)
+            device (torch.device, optional): Tensor device (default: CPU)
+            memory_format (torch.memory_format, optional): Layout (default: torch.contiguous_format)
+            pin_memory (bool): Allocate page-locked host memory (CPU tensors only, default: False)
+
+        Returns:
+            torch.Tensor: Zero-filled tensor; treat as read-only
+
+        Raises:
+            RuntimeError: If pinned memory is requested but no accelerator is available
+        """
+        torch = import_torch()
+        dtype = dtype if dtype is not None else torch.float32
+        device = device if device is not None else torch.device("cpu")
+        memory_format = memory_format if memory_format is not None else torch.contiguous_format
+        # torch dtypes, devices and memory formats hash by value, so they key the pool directly
+        key = (*shape, dtype, device, memory_format, bool(pin_memory))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                tensor, version = entry
+                if tensor._version != version:
+                    # Someone wrote into the shared buffer; restore the zero contract
+                    tensor.zero_()
+                    self._entries[key] = (tensor, tensor._version)
+                    self.rezeroed += 1
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return tensor
+
+            tensor = torch.empty(
+                list(shape), dtype=dtype, device=device, memory_format=memory_format, pin_memory=pin_memory
+            ).zero_()
+            self.misses += 1
+            nbytes = tensor.numel() * tensor.element_size()
+            if nbytes > self.max_bytes:
+                # Too large to keep around, hand out an unpooled buffer
+                return tensor
+
+            self._entries[key] = (tensor, tensor._version)
+            self._total_bytes += nbytes
+            self._evict()
+            return tensor
+
+    def _evict(self):
+        """Drop least-recently-used entries until the pool fits its budgets."""
+        while self._entries and (
+            self._total_bytes > self.max_bytes or len(self._entries) > self.max_entries
+        ):
+            _, (tensor, _) = self._entries.popitem(last=False)
+            self._total_bytes -= tensor.numel() * tensor.element_size()
+
+    def clear(self):
+        """Release every pooled tensor."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Get pool usage counters.
 
-    # Fallback to 1024x1024
-    return format_resolution(1024, 1024)
+        Returns:
+            dict: entries, bytes, hits, misses and rezeroed counts
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rezeroed": self.rezeroed,
+            }
 
 
-def get_all_resolutions():
+def allocate_latent(shape, dtype=None, device=None, strategy="pooled", pin_memory=False,
+                    memory_format=None, pool=None):
     """
-    Get all unique resolution strings across all models, sorted by dimensions.
+    Allocate an empty latent tensor with the given strategy and report what it cost.
+
+    Pinned memory only applies to CPU tensors and needs an accelerator to pin against;
+    on CPU-only builds (or for other devices) the request falls back to pageable memory
+    and the returned allocation reports pinned=False.
+
+    Args:
+        shape (list): Tensor shape, e.g. [batch, channels, height, width]
+        dtype (torch.dtype, optional): Tensor dtype (default: torch.float32)
+        device (torch.device, optional): Tensor device (default: CPU)
+        strategy (str): One of ALLOCATION_STRATEGIES (default: "pooled")
+        pin_memory (bool): Request page-locked host memory (default: False)
+        memory_format (torch.memory_format, optional): Layout for pooled and eager buffers
+        pool (LatentPool, optional): Pool for the "pooled" strategy (default: ResolutionSelector's)
 
     Returns:
-        list: All unique resolution strings sorted by total pixels
-    """
-    unique_resolutions = {}
-
-    # Collect all unique width×height pairs
-    for model_name in MODEL_RESOLUTIONS.keys():
-        model_data = MODEL_RESOLUTIONS[model_name]
-        for category in ["square", "portrait", "landscape"]:
-            for width, height in model_data[category]:
-                key = (width, height)
-                if key not in unique_resolutions:
-                    unique_resolutions[key] = format_resolution(width, height)
-
-    # Sort by total pixels, then by width
-    sorted_resolutions = sorted(
-        unique_resolutions.items(),
-        key=lambda item: (item[0][0] * item[0][1], item[0][0])
+        tuple: (tensor: torch.Tensor, allocation: LatentAllocation)
+
+    Raises:
+        ValueError: If strategy is not one of ALLOCATION_STRATEGIES
+    """
+    if strategy not in ALLOCATION_STRATEGIES:
+        raise ValueError(f"Unknown allocation strategy '{strategy}', expected one of {ALLOCATION_STRATEGIES}")
+
+    torch = import_torch()
+    dtype = dtype if dtype is not None else torch.float32
+    if not isinstance(device, torch.device):
+        device = torch.device(device if device is not None else "cpu")
+    memory_format = memory_format if memory_format is not None else torch.contiguous_format
+    pool = pool if pool is not None else ResolutionSelector._latent_pool
+    pin_memory = bool(pin_memory) and device.type == "cpu" and strategy != "lazy"
+
+    started = time.perf_counter()
+    if strategy == "lazy":
+        # Every element aliases one zero; consumers that need to write must copy first
+        tensor = torch.zeros((), dtype=dtype, device=device).expand(list(shape))
+    else:
+        misses = pool.misses
+        try:
+            if strategy == "pooled":
+                tensor = pool.acquire(shape, dtype, device, memory_format, pin_memory)
+            else:
+                tensor = torch.empty(
+                    list(shape), dtype=dtype, device=device, memory_format=memory_format, pin_memory=pin_memory
+                ).zero_()
+        except RuntimeError:
+            if not pin_memory:
+                raise
+            # No accelerator to pin against (e.g. CPU-only torch); use pageable memory
+            logger.debug("ResolutionSelector: pinned memory unavailable, using pageable memory")
+            pin_memory = False
+            if strategy == "pooled":
+                tensor = pool.acquire(shape, dtype, device, memory_format)
+            else:
+                tensor = torch.empty(list(shape), dtype=dtype, device=device, memory_format=memory_format).zero_()
+        reused = strategy == "pooled" and pool.misses == misses
+    seconds = time.perf_counter() - started
+
+    logical_bytes = tensor.numel() * tensor.element_size()
+    # Lazy views and pool hits reserve no new memory
+    allocated_bytes = 0 if strategy == "lazy" or reused else logical_bytes
+    # Positional fields: keyword construction costs about a microsecond on every call
+    allocation = LatentAllocation(
+        shape, torch_name(dtype), torch_name(device), strategy, pin_memory, logical_bytes, allocated_bytes, seconds
     )
+    return tensor, allocation
+
+
+class NoisePrefetcher:
+    """
+    Generates seeded noise latents, pre-generating upcoming seeds on background threads.
+
+    Noise for a seed is torch.randn from a private CPU generator seeded with it, which is
+    bit-identical to torch.manual_seed(seed) followed by torch.randn on the CPU, so results
+    do not depend on whether they came from the buffer, on thread scheduling or on the
+    global RNG state. Pending results are bounded by a byte budget; the oldest are dropped
+    first when it is exceeded. Following seeds are only pre-generated once consecutive
+    requests for a shape count up by one, so randomized seeds never waste work.
+    """
+
+    def __init__(self, max_workers=2, max_bytes=1024 * 1024 * 1024):
+        """
+        Args:
+            max_workers (int): Background generation threads
+            max_bytes (int): Byte budget for pre-generated noise waiting to be used
+        """
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self._executor = None
+        self._pending = OrderedDict()
+        self._pending_bytes = 0
+        self._last_seeds = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def generate(seed, shape, dtype):
+        """
+        Generate noise for one seed on the calling thread.
+
+        Args:
+            seed (int): Seed (taken modulo 2**64)
+            shape (list): Tensor shape
+            dtype (torch.dtype): Tensor dtype
+
+        Returns:
+            tuple: (noise: torch.Tensor on CPU, seconds: float)
+        """
+        torch = import_torch()
+        started = time.perf_counter()
+        generator = torch.Generator(device="cpu").manual_seed(seed % 2**64)
+        noise = torch.randn(list(shape), dtype=dtype, generator=generator)
+        return noise, time.perf_counter() - started
+
+    def get(self, seed, shape, dtype, prefetch=0):
+        """
+        Get noise for a seed, from the buffer when it was pre-generated.
+
+        Args:
+            seed (int): Seed
+            shape (list): Tensor shape
+            dtype (torch.dtype): Tensor dtype
+            prefetch (int): Number of following seeds to pre-generate afterwards, when the
+                previous request for this shape and dtype was seed - 1 (default: 0)
+
+        Returns:
+            tuple: (noise: torch.Tensor on CPU, report: NoiseReport)
+        """
+        key = (seed % 2**64, tuple(shape), str(dtype))
+        with self._lock:
+            entry = self._pending.pop(key, None)
+            if entry is not None:
+                self._pending_bytes -= entry[1]
+
+        started = time.perf_counter()
+        if entry is not None:
+            noise, generate_seconds = entry[0].result()
+            wait_seconds = time.perf_counter() - started
+            saved_seconds = max(generate_seconds - wait_seconds, 0.0)
+        else:
+            noise, generate_seconds = self.generate(seed, shape, dtype)
+            wait_seconds = generate_seconds
+            saved_seconds = 0.0
+
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.saved_seconds += saved_seconds
+            previous = self._last_seeds.get(key[1:])
+            self._last_seeds[key[1:]] = seed
+
+        if prefetch > 0 and previous == seed - 1:
+            self.schedule(range(seed + 1, seed + 1 + prefetch), shape, dtype)
+        return noise, NoiseReport(seed, entry is not None, generate_seconds, wait_seconds, saved_seconds)
+
+    def schedule(self, seeds, shape, dtype):
+        """
+        Queue background generation for seeds that are not already pending.
+
+        Args:
+            seeds (iterable): Seeds to pre-generate, in the order they will be used
+            shape (list): Tensor shape
+            dtype (torch.dtype): Tensor dtype
+        """
+        nbytes = math.prod(shape) * DTYPE_SIZES.get(str(dtype).replace("torch.", ""), 4)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="noise-prefetch")
+            for seed in seeds:
+                key = (seed % 2**64, tuple(shape), str(dtype))
+                if key in self._pending:
+                    self._pending.move_to_end(key)
+                    continue
+                while self._pending and self._pending_bytes + nbytes > self.max_bytes:
+                    _, (future, dropped_bytes) = self._pending.popitem(last=False)
+                    future.cancel()
+                    self._pending_bytes -= dropped_bytes
+                    self.wasted += 1
+                self._pending[key] = (self._executor.submit(self.generate, seed, shape, dtype), nbytes)
+                self._pending_bytes += nbytes
+
+    def wait(self, timeout=None):
+        """
+        Block until every pending seed has been generated.
+
+        Args:
+            timeout (float, optional): Seconds to wait at most (default: no limit)
+        """
+        with self._lock:
+            futures = [future for future, _ in self._pending.values()]
+        concurrent.futures.wait(futures, timeout)
+
+    def clear(self):
+        """Drop all pending noise."""
+        with self._lock:
+            for future, _ in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._pending_bytes = 0
+            self._last_seeds.clear()
+
+    def stats(self):
+        """
+        Get prefetch counters.
+
+        Returns:
+            dict: pending, pending_bytes, hits, misses, wasted and saved_seconds
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "pending_bytes": self._pending_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "wasted": self.wasted,
+                "saved_seconds": self.saved_seconds,
+            }
 
-    return [res_str for _, res_str in sorted_resolutions]
 
+class SelectorStats:
+    """
+    Instrumentation counters, sharded per thread.
 
-def parse_resolution_string(resolution_str):
+    Each thread records into its own shard, so concurrent prompts never contend on a lock;
+    the lock is only taken when a thread records for the first time and when snapshotting.
+    Snapshots merge the shards without stopping writers, so a snapshot taken mid-call may
+    be off by that call.
     """
-    Parse formatted resolution string back to width, height integers.
 
-    Args:
-        resolution_str (str): Format "1920x1080  (16:9 Landscape)" with possible padding
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {"calls": {}, "errors": Counter(), "bytes": Counter(), "cache": Counter(), "selections": Counter()}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def record_call(self, name, seconds, error=False):
+        """
+        Record one call's latency.
 
-    Returns:
-        tuple: (width, height)
+        Args:
+            name (str): Instrumented function name
+            seconds (float): Wall time of the call
+            error (bool): Whether the call raised (default: False)
+        """
+        shard = self._shard()
+        entry = shard["calls"].get(name)
+        if entry is None:
+            entry = shard["calls"][name] = [0, 0.0, [0] * LATENCY_BUCKETS]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2][min(int(seconds * 1_000_000).bit_length(), LATENCY_BUCKETS - 1)] += 1
+        if error:
+            shard["errors"][name] += 1
+
+    def record_allocation(self, allocation):
+        """
+        Record a latent allocation's bytes per device and whether the pool served it.
 
-    Raises:
-        ValueError: If string format is invalid
+        Args:
+            allocation (LatentAllocation): Report from allocate_latent
+        """
+        shard = self._shard()
+        shard["bytes"][(allocation.device, "logical")] += allocation.logical_bytes
+        shard["bytes"][(allocation.device, "allocated")] += allocation.allocated_bytes
+        if allocation.strategy == "pooled":
+            shard["cache"][("latent_pool", allocation.allocated_bytes == 0)] += 1
+
+    def record_cache(self, cache, hit):
+        """
+        Record a cache lookup.
+
+        Args:
+            cache (str): Cache name
+            hit (bool): Whether the lookup hit
+        """
+        self._shard()["cache"][(cache, bool(hit))] += 1
+
+    def record_selection(self, model, resolution, multiplier, batch_size):
+        """
+        Count one selected model/resolution/multiplier/batch combination.
+
+        Args:
+            model (str): Model name
+            resolution (str): Resolution label
+            multiplier (str): Resolution multiplier
+            batch_size (int): Batch size
+        """
+        self._shard()["selections"][(model, resolution, multiplier, batch_size)] += 1
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            for shard in self._shards:
+                for counters in shard.values():
+                    counters.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """
+        Merge all shards into a JSON-friendly summary.
+
+        Returns:
+            dict: uptime_seconds, calls (per function: count, errors, total_ms, mean_us,
+                p50_us and p99_us as histogram bucket bounds, histogram_us as [bound, count]
+                pairs), bytes_per_device, cache (hits, misses, hit_rate) and selections
+                (most frequent first)
+        """
+        with self._lock:
+            shards = list(self._shards)
+
+        calls = {}
+        errors = Counter()
+        byte_counts = Counter()
+        cache = Counter()
+        selections = Counter()
+        for shard in shards:
+            for name, (count, seconds, buckets) in list(shard["calls"].items()):
+                merged = calls.setdefault(name, [0, 0.0, [0] * LATENCY_BUCKETS])
+                merged[0] += count
+                merged[1] += seconds
+                merged[2] = [a + b for a, b in zip(merged[2], buckets)]
+            errors.update(dict(shard["errors"]))
+            byte_counts.update(dict(shard["bytes"]))
+            cache.update(dict(shard["cache"]))
+            selections.update(dict(shard["selections"]))
+
+        def percentile(buckets, count, fraction):
+            target = fraction * count
+            seen = 0
+            for i, bucket in enumerate(buckets):
+                seen += bucket
+                if seen >= target:
+                    return 2 ** i
+            return 2 ** (LATENCY_BUCKETS - 1)
+
+        bytes_per_device = {}
+        for (device, kind), value in byte_counts.items():
+            bytes_per_device.setdefault(device, {"logical": 0, "allocated": 0})[kind] = value
+
+        caches = {}
+        for (name, hit), value in cache.items():
+            caches.setdefault(name, {"hits": 0, "misses": 0})["hits" if hit else "misses"] = value
+        for entry in caches.values():
+            entry["hit_rate"] = round(entry["hits"] / (entry["hits"] + entry["misses"]), 4)
+
+        return {
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "calls": {
+                name: {
+                    "count": count,
+                    "errors": errors[name],
+                    "total_ms": round(seconds * 1000, 3),
+                    "mean_us": round(seconds * 1_000_000 / count, 3) if count else 0,
+                    "p50_us": percentile(buckets, count, 0.5),
+                    "p99_us": percentile(buckets, count, 0.99),
+                    "histogram_us": [[2 ** i, n] for i, n in enumerate(buckets) if n],
+                }
+                for name, (count, seconds, buckets) in calls.items()
+            },
+            "bytes_per_device": bytes_per_device,
+            "cache": caches,
+            "selections": [
+                {"model": model, "resolution": resolution, "multiplier": multiplier, "batch_size": batch_size, "count": n}
+                for (model, resolution, multiplier, batch_size), n in selections.most_common()
+            ],
+        }
+
+
+class TiledLatent:
     """
-    try:
-        # Format: "1920x1080  (16:9 Landscape)" - may have padding spaces
-        # Extract the dimension part (before the opening parenthesis)
-        dimension_part = resolution_str.split("(")[0].strip()
+    Tile plan for a large latent whose per-tile latents are only built on demand.
+
+    Passed between nodes as the TILE_PLAN type. Every tile has the same shape, so with the
+    pooled strategy all tiles share one buffer and peak memory scales with the tile size
+    rather than with the full image. Blend weights sum to 1 over all tiles at every latent
+    position, so a tiled sampler can accumulate tile * weight into its output.
+    """
+
+    def __init__(self, plan, latent_dtype="auto", allocation="pooled", pin_memory=False, device=None, pool=None):
+        """
+        Args:
+            plan (TilePlan): Grid from plan_tiles
+            latent_dtype (str): "auto", "fp32", "fp16" or "bf16" (default: "auto")
+            allocation (str): One of ALLOCATION_STRATEGIES (default: "pooled")
+            pin_memory (bool): Request pinned host memory on CPU (default: False)
+            device (torch.device, optional): Device for tile latents (default: CPU)
+            pool (LatentPool, optional): Pool for the "pooled" strategy
+        """
+        self.plan = plan
+        self.latent_dtype = latent_dtype
+        self.allocation = allocation
+        self.pin_memory = pin_memory
+        self.device = device
+        self.pool = pool
+        self.downscale = get_latent_format(plan.model)["downscale"]
+        self._weights = None
+
+    def __len__(self):
+        return len(self.plan.x_starts) * len(self.plan.y_starts)
+
+    def tile_box(self, index):
+        """
+        Get a tile's position in the image.
+
+        Args:
+            index (int): Tile index, row-major
+
+        Returns:
+            tuple: (x, y, width, height) in pixels
+        """
+        row, column = divmod(index, len(self.plan.x_starts))
+        return (self.plan.x_starts[column], self.plan.y_starts[row], self.plan.tile_width, self.plan.tile_height)
+
+    def latent_box(self, index):
+        """
+        Get a tile's position in the full latent.
+
+        Args:
+            index (int): Tile index, row-major
+
+        Returns:
+            tuple: (x, y, width, height) in latent cells
+        """
+        return tuple(value // self.downscale for value in self.tile_box(index))
+
+    def tile_latent(self, index):
+        """
+        Build the empty latent for one tile.
+
+        Args:
+            index (int): Tile index, row-major
+
+        Returns:
+            dict: LATENT dict with 'samples' shaped like plan.latent_shape
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Tile {index} out of range for {len(self)} tiles")
+        torch = import_torch()
+        tensor, _ = allocate_latent(
+            self.plan.latent_shape,
+            dtype=getattr(torch, resolve_latent_dtype(self.plan.model, self.latent_dtype)),
+            device=self.device,
+            strategy=self.allocation,
+            pin_memory=self.pin_memory,
+            pool=self.pool
+        )
+        return {"samples": tensor}
+
+    def blend_weights(self, index):
+        """
+        Get a tile's feathered blend mask.
+
+        Args:
+            index (int): Tile index, row-major
+
+        Returns:
+            torch.Tensor: float32 weights shaped [1, 1, tile_height, tile_width] in latent cells
+        """
+        torch = import_torch()
+        if self._weights is None:
+            downscale = self.downscale
+            self._weights = (
+                tile_blend_weights([x // downscale for x in self.plan.x_starts],
+                                   self.plan.tile_width // downscale, self.plan.width // downscale),
+                tile_blend_weights([y // downscale for y in self.plan.y_starts],
+                                   self.plan.tile_height // downscale, self.plan.height // downscale),
+            )
+        row, column = divmod(index, len(self.plan.x_starts))
+        x_weights = torch.tensor(self._weights[0][column], dtype=torch.float32, device=self.device)
+        y_weights = torch.tensor(self._weights[1][row], dtype=torch.float32, device=self.device)
+        return torch.outer(y_weights, x_weights)[None, None]
+
+    def __iter__(self):
+        """Yield (tile_box, tile_latent) pairs, building each latent as it is reached."""
+        for index in range(len(self)):
+            yield self.tile_box(index), self.tile_latent(index)
+
+    def to_dict(self):
+        """
+        Describe the plan as JSON-friendly data.
+
+        Returns:
+            dict: TilePlan fields plus the tile count
+        """
+        return {**self.plan._asdict(), "tiles": len(self)}
+
+
+class LatentNodeBase:
+    """
+    Device lookup and empty-latent helpers shared by the nodes in this module.
+    Defines no inputs or IS_CHANGED, so each node is cached on its own inputs.
+    """
+
+    # Shared across node instances so repeated shapes reuse the same zero buffers
+    _latent_pool = LatentPool()
+
+    # Zero-stride placeholders and torch layouts are immutable, so they are built once per key
+    _placeholders = {}
+    _latent_layouts = {}
+
+    def __init__(self):
+        """Defer device lookup (and the torch import) until a latent is first needed."""
+        self._device = None
+
+    @property
+    def device(self):
+        """torch.device: Device for latent tensor generation."""
+        if self._device is None:
+            model_management = get_model_management()
+            if model_management is not None:
+                self._device = model_management.intermediate_device()
+            else:
+                self._device = import_torch().device("cpu")
+        return self._device
+
+    def _placeholder_latent(self, width, height, batch_size=1, model="All", latent_dtype="auto"):
+        """
+        Stand in for a latent output nothing consumes, without allocating it.
+
+        Args:
+            width (int): Image width in pixels
+            height (int): Image height in pixels
+            batch_size (int): Number of latent samples (default: 1)
+            model (str): Model whose latent geometry to use (default: "All")
+            latent_dtype (str): Latent dtype choice (default: "auto")
+
+        Returns:
+            dict: LATENT dict whose 'samples' is a shared read-only zero-stride view
+        """
+        key = (model, width, height, batch_size, latent_dtype, self.device)
+        latent_format = get_latent_format(model)
+        cached = self._placeholders.get(key)
+        if cached is None or cached[0] is not latent_format:
+            latent, _ = self._generate_empty_latent(width, height, batch_size, model, latent_dtype, allocation="lazy")
+            if len(self._placeholders) >= PLACEHOLDER_CACHE_SIZE:
+                self._placeholders.clear()
+            cached = self._placeholders[key] = (latent_format, latent["samples"])
+        return {"samples": cached[1]}
+
+    def _latent_layout(self, model, latent_dtype="auto"):
+        """
+        Resolve a model's latent dtype and memory format to torch objects.
+
+        Args:
+            model (str): Model whose latent format to use
+            latent_dtype (str): Latent dtype choice (default: "auto")
 
-        if not dimension_part or 'x' not in dimension_part:
-            raise ValueError(f"No dimension part found in: {resolution_str}")
+        Returns:
+            tuple: (dtype: torch.dtype, memory_format: torch.memory_format)
+        """
+        latent_format = get_latent_format(model)
+        cached = self._latent_layouts.get((model, latent_dtype))
+        if cached is None or cached[0] is not latent_format:
+            torch = import_torch()
+            cached = self._latent_layouts[(model, latent_dtype)] = (latent_format, (
+                getattr(torch, resolve_latent_dtype(model, latent_dtype)),
+                getattr(torch, MEMORY_FORMATS[latent_format["memory_format"]]),
+            ))
+        return cached[1]
+
+    def _generate_empty_latent(self, width, height, batch_size=1, model="All", latent_dtype="auto",
+                               allocation="pooled", pin_memory=False):
+        """
+        Generate empty latent tensor for VAE input.
+
+        Args:
+            width (int): Image width in pixels
+            height (int): Image height in pixels
+            batch_size (int): Number of latent samples (default: 1)
+            model (str): Model whose latent geometry to use (default: "All", SD-style 4 channels)
+            latent_dtype (str): "auto" (model default), "fp32", "fp16" or "bf16" (default: "auto")
+            allocation (str): One of ALLOCATION_STRATEGIES (default: "pooled")
+            pin_memory (bool): Request pinned host memory on CPU (default: False)
 
-        # Split on 'x' and convert to integers
-        width, height = map(int, dimension_part.split("x"))
+        Returns:
+            tuple: (latent: dict, allocation: LatentAllocation); the LATENT dict's 'samples'
+                tensor is read-only unless allocation is "eager"
+        """
+        dtype, memory_format = self._latent_layout(model, latent_dtype)
+
+        # Shape: [batch_size, channels, height//downscale, width//downscale]
+        latent_tensor, latent_allocation = allocate_latent(
+            get_latent_shape(model, width, height, batch_size),
+            dtype=dtype,
+            device=self.device,
+            strategy=allocation,
+            pin_memory=pin_memory,
+            memory_format=memory_format,
+            pool=self._latent_pool
+        )
 
-        return (width, height)
-    except (ValueError, IndexError) as e:
-        raise ValueError(f"Invalid resolution format: {resolution_str}")
+        return {"samples": latent_tensor}, latent_allocation
+
+
+# Optional ResolutionSelector inputs; static, so INPUT_TYPES copies them instead of rebuilding
+_SELECTOR_OPTIONAL_INPUTS = {
+    "custom_width": ("INT", {
+        "default": 0,
+        "min": 0,
+        "max": 4096,
+        "step": 8,
+        "display": "number"
+    }),
+    "custom_height": ("INT", {
+        "default": 0,
+        "min": 0,
+        "max": 4096,
+        "step": 8,
+        "display": "number"
+    }),
+    "custom_multiplier": (["1x", "2x", "3x", "4x"], {
+        "default": "1x"
+    }),
+    "custom_batch": ("INT", {
+        "default": 1,
+        "min": 1,
+        "max": 64,
+        "step": 1,
+        "display": "number"
+    }),
+    "snap_to_model": ("BOOLEAN", {
+        "default": False
+    }),
+    "resolution_source": (RESOLUTION_SOURCES, {
+        "default": "presets"
+    }),
+    "latent_dtype": (LATENT_DTYPES, {
+        "default": "auto"
+    }),
+    "allocation": (ALLOCATION_STRATEGIES, {
+        "default": "pooled",
+        "tooltip": "pooled shares zero buffers between prompts, eager allocates a private buffer each run, "
+                   "lazy returns a read-only zero-stride view that must be .clone()d before any in-place use"
+    }),
+    "pin_memory": ("BOOLEAN", {
+        "default": False
+    }),
+    "tile_size": ("INT", {
+        "default": 0,
+        "min": 0,
+        "max": 4096,
+        "step": 64,
+        "display": "number",
+        "tooltip": "Above 0, emit the preset latent as a tile plan. Tiles are empty latents; in noise "
+                   "mode the latent output is still full-size noise"
+    }),
+    "tile_overlap": ("INT", {
+        "default": 64,
+        "min": 0,
+        "max": 1024,
+        "step": 8,
+        "display": "number"
+    }),
+    "latent_mode": (LATENT_MODES, {
+        "default": "empty"
+    }),
+    "noise_prefetch": ("INT", {
+        "default": 0,
+        "min": 0,
+        "max": 64,
+        "step": 1,
+        "display": "number"
+    }),
+    # Not named "seed": the frontend gives seed widgets a control_after_generate
+    # (randomize by default) that would change the inputs, and so miss the cache,
+    # on every queue even in empty mode
+    "latent_seed": ("INT", {
+        "default": 0,
+        "min": 0,
+        "max": 0xffffffffffffffff,
+        "control_after_generate": False
+    }),
+}
 
 
-class ResolutionSelector:
+class ResolutionSelector(LatentNodeBase):
     """
     Enhanced resolution selector supporting multiple image generation models.
     Provides model-specific resolution presets, custom dimension inputs, and empty latent output.
     """
 
-    def __init__(self):
-        """Initialize device for latent tensor generation."""
-        if COMFY_AVAILABLE:
-            self.device = comfy.model_management.intermediate_device()
-        else:
-            self.device = torch.device("cpu")
+    # Latents not built because their output was unconnected or had zero dimensions
+    skipped_allocations = 0
+
+    # Shared so a seed sweep across prompts finds the next seed's noise already generated
+    _noise_prefetcher = NoisePrefetcher()
+
+    # Untiled runs emit a single-tile plan that only depends on the inputs, so each is built once
+    _single_tile_plans = {}
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -261,10 +1082,12 @@ class ResolutionSelector:
         Returns:
             dict: Input configuration with required and optional fields
         """
+        check_user_presets()
         model_list = ["All"] + list(MODEL_RESOLUTIONS.keys())
 
-        # Get all possible resolutions across all models (JavaScript will filter dynamically)
-        all_resolutions = get_all_resolutions()
+        # Get all possible resolutions across all models, including generated buckets
+        # (JavaScript will filter dynamically)
+        all_resolutions = get_selectable_resolutions()
 
         return {
             "required": {
@@ -285,40 +1108,46 @@ class ResolutionSelector:
                     "display": "number"
                 }),
             },
-            "optional": {
-                "custom_width": ("INT", {
-                    "default": 0,
-                    "min": 0,
-                    "max": 4096,
-                    "step": 8,
-                    "display": "number"
-                }),
-                "custom_height": ("INT", {
-                    "default": 0,
-                    "min": 0,
-                    "max": 4096,
-                    "step": 8,
-                    "display": "number"
-                }),
-                "custom_multiplier": (["1x", "2x", "3x", "4x"], {
-                    "default": "1x"
-                }),
-                "custom_batch": ("INT", {
-                    "default": 1,
-                    "min": 1,
-                    "max": 64,
-                    "step": 1,
-                    "display": "number"
-                }),
+            "optional": dict(_SELECTOR_OPTIONAL_INPUTS),
+            "hidden": {
+                "prompt": "PROMPT",
+                "unique_id": "UNIQUE_ID",
             }
         }
 
-    RETURN_TYPES = ("INT", "INT", "LATENT", "INT", "INT", "LATENT")
-    RETURN_NAMES = ("width", "height", "latent", "custom_width", "custom_height", "custom_latent")
+    @classmethod
+    def IS_CHANGED(cls, model, resolution, resolution_multiplier="1x", batch_size=1, custom_width=0, custom_height=0, custom_multiplier="1x", custom_batch=1, snap_to_model=False, resolution_source="presets", latent_dtype="auto", allocation="pooled", pin_memory=False, tile_size=0, tile_overlap=64, latent_mode="empty", noise_prefetch=0, latent_seed=0, **kwargs):
+        """
+        Fingerprint the inputs that affect the outputs, for ComfyUI's execution cache.
+
+        Custom settings are ignored while custom dimensions are unset and resolution_source
+        only affects the web UI. ComfyUI calls this without the hidden prompt, so which
+        outputs are connected cannot be part of the fingerprint; see select_resolution for
+        how skipped outputs stay valid when the cached result is reused.
+
+        Returns:
+            str: Stable fingerprint of the effective inputs
+        """
+        has_custom = custom_width > 0 and custom_height > 0
+        return settings_fingerprint({
+            "model": model,
+            "resolution": resolution,
+            "resolution_multiplier": resolution_multiplier,
+            "batch_size": batch_size,
+            "custom": [custom_width, custom_height, custom_multiplier, custom_batch, snap_to_model] if has_custom else None,
+            "latent_dtype": latent_dtype,
+            "allocation": allocation,
+            "pin_memory": pin_memory,
+            "tiling": [tile_size, tile_overlap] if tile_size > 0 else None,
+            "noise_seed": latent_seed if latent_mode == "noise" else None,
+        })
+
+    RETURN_TYPES = ("INT", "INT", "LATENT", "INT", "INT", "LATENT", "INT", "INT", "INT", "INT", "TILE_PLAN")
+    RETURN_NAMES = ("width", "height", "latent", "custom_width", "custom_height", "custom_latent", "latent_bytes", "custom_latent_bytes", "requested_width", "requested_height", "tile_plan")
     FUNCTION = "select_resolution"
     CATEGORY = "utils"
 
-    def select_resolution(self, model, resolution, resolution_multiplier="1x", batch_size=1, custom_width=0, custom_height=0, custom_multiplier="1x", custom_batch=1):
+    def select_resolution(self, model, resolution, resolution_multiplier="1x", batch_size=1, custom_width=0, custom_height=0, custom_multiplier="1x", custom_batch=1, snap_to_model=False, resolution_source="presets", latent_dtype="auto", allocation="pooled", pin_memory=False, tile_size=0, tile_overlap=64, latent_mode="empty", noise_prefetch=0, latent_seed=0, prompt=None, unique_id=None):
         """
         Select and validate resolution, generate outputs.
 
@@ -331,9 +1160,36 @@ class ResolutionSelector:
             custom_height (int, optional): Custom height override
             custom_multiplier (str, optional): Multiplier for custom dimensions (1x-4x)
             custom_batch (int, optional): Number of latent samples for custom resolution (default: 1)
+            snap_to_model (bool, optional): Snap custom dimensions to the nearest valid size
+                for the model instead of raising on constraint violations (default: False)
+            resolution_source (str, optional): Which lists the dropdown shows: "presets",
+                "buckets" or "both"; only used by the web extension (default: "presets")
+            latent_dtype (str, optional): "auto" (model default), "fp32", "fp16" or "bf16"
+            allocation (str, optional): "pooled", "eager" or "lazy", see ALLOCATION_STRATEGIES
+                (default: "pooled")
+            pin_memory (bool, optional): Use pinned host memory when the intermediate device
+                is the CPU, falling back to pageable memory if pinning is unavailable (default: False)
+            tile_size (int, optional): Tile side in pixels; when above 0 the preset latent is
+                emitted as a lazy tile plan instead of one tensor. In noise mode the latent output
+                is still built at full size and the plan's tiles stay empty (default: 0, off)
+            tile_overlap (int, optional): Minimum overlap between tiles in pixels (default: 64)
+            latent_mode (str, optional): "empty" for zero latents or "noise" for seeded Gaussian
+                noise, identical to torch.manual_seed(latent_seed) + torch.randn on the CPU; with
+                tiling the latent output holds the full noise but tile latents stay empty
+                (default: "empty")
+            noise_prefetch (int, optional): In noise mode, how many following seeds to
+                pre-generate in the background once the seed is seen counting up (default: 0)
+            latent_seed (int, optional): Noise seed (default: 0)
+            prompt (dict, optional): Hidden API-format prompt, used to skip unconnected latents
+            unique_id (str, optional): Hidden id of this node in the prompt
 
         Returns:
-            tuple: (width: int, height: int, latent: dict, custom_width: int, custom_height: int, custom_latent: dict)
+            dict: "result" holds (width: int, height: int, latent: dict, custom_width: int, custom_height: int,
+                  custom_latent: dict, latent_bytes: int, custom_latent_bytes: int, requested_width: int,
+                  requested_height: int, tile_plan: TiledLatent); "ui" holds one allocation report per built latent.
+                  Unconnected latent outputs are returned as zero-stride placeholders that
+                  use no per-pixel memory but have the same shape and values as the empty
+                  latent, so a cached result stays valid when an output is connected later.
         """
         # Parse multipliers (e.g., "2x" -> 2)
         multiplier = int(resolution_multiplier.replace("x", ""))
@@ -346,28 +1202,146 @@ class ResolutionSelector:
         width *= multiplier
         height *= multiplier
 
-        # Generate latent for preset resolution with batch size
-        latent = self._generate_empty_latent(width, height, batch_size)
+        # Placeholders are zeros, so they only stand in for empty latents; noise outputs are
+        # always built, since ComfyUI may reuse this result after another output is connected
+        connected = get_connected_outputs(prompt, unique_id) if latent_mode == "empty" else None
+        allocations = {}
+        noise_reports = {}
+        skipped = 0
+
+        # Tiling mode replaces the monolithic latent with a plan whose tiles are built on
+        # demand (in noise mode the latent output still carries the full noise, since a zero
+        # placeholder would silently stand in for it); otherwise the plan is a reused single
+        # tile covering the image
+        if tile_size > 0:
+            plan = plan_tiles(model, width, height, tile_size, tile_overlap, batch_size)
+            tile_plan = TiledLatent(plan, latent_dtype, allocation, pin_memory, device=self.device, pool=self._latent_pool)
+        else:
+            tile_plan = self._single_tile_plan(model, width, height, batch_size, latent_dtype, allocation, pin_memory)
+
+        # Generate latent for preset resolution with batch size, failing fast before
+        # allocating anything that cannot fit
+        latent_bytes = get_latent_bytes(model, width, height, batch_size, latent_dtype)
+        if tile_size > 0 and latent_mode == "empty":
+            self._check_memory(model, plan.tile_width, plan.tile_height, batch_size, latent_dtype)
+            latent = self._placeholder_latent(width, height, batch_size, model, latent_dtype)
+            skipped += 1
+        elif connected is None or LATENT_OUTPUT_SLOTS["latent"] in connected:
+            self._check_memory(model, width, height, batch_size, latent_dtype)
+            latent, allocations["latent"], noise_reports["latent"] = self._generate_latent(
+                width, height, batch_size, model, latent_mode, latent_seed, noise_prefetch, latent_dtype, allocation, pin_memory
+            )
+        else:
+            latent = self._placeholder_latent(width, height, batch_size, model, latent_dtype)
+            skipped += 1
 
         # Determine final custom dimensions
         if custom_width > 0 and custom_height > 0:
             # Use custom dimensions with custom multiplier
-            final_custom_width = custom_width * custom_mult
-            final_custom_height = custom_height * custom_mult
-
-            # Validate against model constraints (if not "All" model)
+            requested_width = custom_width * custom_mult
+            requested_height = custom_height * custom_mult
+
+            # Snap or validate against model constraints (if not "All" model)
+            if snap_to_model:
+                final_custom_width, final_custom_height = snap_dimensions(model, requested_width, requested_height)
+            else:
+                final_custom_width, final_custom_height = requested_width, requested_height
             if model != "All":
                 self._validate_dimensions(model, final_custom_width, final_custom_height)
 
             # Generate custom latent with custom batch size
-            custom_latent = self._generate_empty_latent(final_custom_width, final_custom_height, custom_batch)
-
-            return (width, height, latent, final_custom_width, final_custom_height, custom_latent)
+            custom_latent_bytes = get_latent_bytes(model, final_custom_width, final_custom_height, custom_batch, latent_dtype)
+            if connected is None or LATENT_OUTPUT_SLOTS["custom_latent"] in connected:
+                self._check_memory(model, final_custom_width, final_custom_height, custom_batch, latent_dtype)
+                custom_latent, allocations["custom_latent"], noise_reports["custom_latent"] = self._generate_latent(
+                    final_custom_width, final_custom_height, custom_batch, model, latent_mode, latent_seed, noise_prefetch,
+                    latent_dtype, allocation, pin_memory
+                )
+            else:
+                custom_latent = self._placeholder_latent(final_custom_width, final_custom_height, custom_batch, model, latent_dtype)
+                skipped += 1
+
+            result = (width, height, latent, final_custom_width, final_custom_height, custom_latent,
+                      latent_bytes, custom_latent_bytes, requested_width, requested_height, tile_plan)
         else:
-            # No custom dimensions, return zeros and minimal empty custom latent
-            custom_latent = self._generate_empty_latent(1, 1, 1)
+            # No custom dimensions, return zeros and a zero-element placeholder latent
+            custom_latent = self._placeholder_latent(1, 1, 1, model, latent_dtype)
+            skipped += 1
+
+            result = (width, height, latent, 0, 0, custom_latent, latent_bytes, 0, 0, 0, tile_plan)
+
+        ResolutionSelector.skipped_allocations += skipped
+        ui = self._report_allocations(**allocations)
+        ui["skipped_allocations"] = [skipped]
+        if tile_size > 0:
+            ui["tile_plan"] = [tile_plan.to_dict()]
+        if latent_mode == "noise":
+            ui["noise"] = self._report_noise(**noise_reports)
+        return {"ui": ui, "result": result}
+
+    def _single_tile_plan(self, model, width, height, batch_size, latent_dtype="auto", allocation="pooled", pin_memory=False):
+        """
+        Get the tile plan emitted when tiling is off, building it once per set of inputs.
+
+        Args:
+            model (str): Model whose latent geometry to use
+            width (int): Image width in pixels
+            height (int): Image height in pixels
+            batch_size (int): Number of latent samples
+            latent_dtype (str): Latent dtype choice (default: "auto")
+            allocation (str): One of ALLOCATION_STRATEGIES (default: "pooled")
+            pin_memory (bool): Request pinned host memory on CPU (default: False)
 
-            return (width, height, latent, 0, 0, custom_latent)
+        Returns:
+            TiledLatent: Shared single-tile plan covering the image; treat it as read-only
+        """
+        key = (model, width, height, batch_size, latent_dtype, allocation, pin_memory, self.device, self._latent_pool)
+        latent_format = get_latent_format(model)
+        cached = self._single_tile_plans.get(key)
+        # Reloaded user presets replace the format dict, which invalidates plans built from it
+        if cached is not None and cached[0] is latent_format:
+            return cached[1]
+
+        tile_plan = TiledLatent(plan_tiles(model, width, height, None, batch_size=batch_size), latent_dtype,
+                                allocation, pin_memory, device=self.device, pool=self._latent_pool)
+        if len(self._single_tile_plans) >= SINGLE_TILE_PLAN_CACHE_SIZE:
+            self._single_tile_plans.clear()
+        self._single_tile_plans[key] = (latent_format, tile_plan)
+        return tile_plan
+
+    def _report_allocations(self, **allocations):
+        """
+        Log latent allocations and build the UI report shown on the node.
+
+        Args:
+            **allocations (LatentAllocation): Allocation per output name
+
+        Returns:
+            dict: {"allocations": [...]} with one JSON-friendly entry per output
+        """
+        report = []
+        log_enabled = logger.isEnabledFor(logging.DEBUG)
+        for output, allocation in allocations.items():
+            if log_enabled:
+                logger.debug(
+                    "ResolutionSelector: %s %s %s on %s via %s%s: %s logical, %s allocated in %.3f ms",
+                    output, allocation.shape, allocation.dtype, allocation.device, allocation.strategy,
+                    " (pinned)" if allocation.pinned else "", format_bytes(allocation.logical_bytes),
+                    format_bytes(allocation.allocated_bytes), allocation.seconds * 1000
+                )
+            report.append({
+                "output": output,
+                "shape": allocation.shape,
+                "dtype": allocation.dtype,
+                "device": allocation.device,
+                "strategy": allocation.strategy,
+                "pinned": allocation.pinned,
+                "logical_bytes": allocation.logical_bytes,
+                "allocated_bytes": allocation.allocated_bytes,
+                "seconds": allocation.seconds,
+                "ms": round(allocation.seconds * 1000, 3),
+            })
+        return {"allocations": report}
 
     def _validate_dimensions(self, model, width, height):
         """
@@ -381,67 +1355,676 @@ class ResolutionSelector:
         Raises:
             ValueError: If dimensions violate model constraints
         """
-        if model not in MODEL_RESOLUTIONS:
-            return
+        validate_dimensions(model, width, height)
+
+    def _check_memory(self, model, width, height, batch_size, latent_dtype="auto"):
+        """
+        Check a latent and its estimated sampling working set against free memory.
 
-        constraints = MODEL_RESOLUTIONS[model]["constraints"]
-        divisible_by = constraints.get("divisible_by", 8)
-        min_dim = constraints.get("min", 64)
-        max_dim = constraints.get("max", 4096)
+        Args:
+            model (str): Model name
+            width (int): Width in pixels
+            height (int): Height in pixels
+            batch_size (int): Number of latent samples
+            latent_dtype (str): Latent dtype choice, see resolve_latent_dtype (default: "auto")
 
-        # Check divisibility
-        if width % divisible_by != 0:
+        Raises:
+            ValueError: If the empty latent itself cannot fit on the intermediate device
+        """
+        # Only the latent itself has to fit here, so skip the full plan on this per-call check
+        latent_bytes = get_latent_bytes(model, width, height, batch_size, latent_dtype)
+        free_bytes = get_free_memory(self.device)
+        if free_bytes is not None and latent_bytes > free_bytes:
             raise ValueError(
-                f"{model} requires width divisible by {divisible_by}. "
-                f"Got {width} (remainder: {width % divisible_by})"
+                f"{width}x{height} x{batch_size} latent needs {format_bytes(latent_bytes)} "
+                f"but only {format_bytes(free_bytes)} is free on {self.device}. "
+                f"Reduce batch size or multiplier."
             )
 
-        if height % divisible_by != 0:
-            raise ValueError(
-                f"{model} requires height divisible by {divisible_by}. "
-                f"Got {height} (remainder: {height % divisible_by})"
+        model_management = get_model_management()
+        if model_management is None:
+            return
+
+        # Sampling happens on the torch device; warn rather than fail since this is an estimate
+        sampling_device = model_management.get_torch_device()
+        plan = plan_latent_memory(model, width, height, batch_size, get_free_memory(sampling_device), latent_dtype)
+        if not plan.fits:
+            logger.warning(
+                "ResolutionSelector: %dx%d x%d needs an estimated %s to sample but %s is free on %s; "
+                "recommended batch split: %s",
+                width, height, batch_size, format_bytes(plan.working_set_bytes),
+                format_bytes(plan.free_bytes), sampling_device, plan.batch_splits or "does not fit at batch 1"
             )
 
-        # Check bounds
-        if width < min_dim or width > max_dim:
-            raise ValueError(
-                f"{model} requires width between {min_dim} and {max_dim}. Got {width}"
+    def _report_noise(self, **reports):
+        """
+        Log noise generation and build its UI report.
+
+        Args:
+            **reports (NoiseReport): Report per output name
+
+        Returns:
+            list: One JSON-friendly entry per noise latent, with times in milliseconds
+        """
+        entries = []
+        for output, report in reports.items():
+            logger.debug(
+                "ResolutionSelector: %s noise seed %d %s, generated in %.3f ms, waited %.3f ms, saved %.3f ms",
+                output, report.seed, "prefetched" if report.hit else "generated inline",
+                report.generate_seconds * 1000, report.wait_seconds * 1000, report.saved_seconds * 1000
             )
+            entries.append({
+                "output": output,
+                "seed": report.seed,
+                "prefetched": report.hit,
+                "generate_ms": round(report.generate_seconds * 1000, 3),
+                "wait_ms": round(report.wait_seconds * 1000, 3),
+                "saved_ms": round(report.saved_seconds * 1000, 3),
+            })
+        return entries
+
+    def _generate_latent(self, width, height, batch_size, model, latent_mode, seed, noise_prefetch, latent_dtype="auto",
+                         allocation="pooled", pin_memory=False):
+        """
+        Generate an empty or seeded noise latent.
+
+        Args:
+            width (int): Image width in pixels
+            height (int): Image height in pixels
+            batch_size (int): Number of latent samples
+            model (str): Model whose latent geometry to use
+            latent_mode (str): "empty" or "noise"
+            seed (int): Noise seed
+            noise_prefetch (int): Following seeds to pre-generate in noise mode
+            latent_dtype (str): Latent dtype choice (default: "auto")
+            allocation (str): One of ALLOCATION_STRATEGIES for empty latents (default: "pooled")
+            pin_memory (bool): Request pinned host memory for empty latents on CPU (default: False)
+
+        Returns:
+            tuple: (latent: dict, allocation: LatentAllocation, noise_report: NoiseReport or None)
+        """
+        if latent_mode == "empty":
+            latent, latent_allocation = self._generate_empty_latent(
+                width, height, batch_size, model, latent_dtype, allocation, pin_memory
+            )
+            return latent, latent_allocation, None
+        if latent_mode != "noise":
+            raise ValueError(f"Unknown latent mode '{latent_mode}', expected one of {LATENT_MODES}")
+
+        shape = get_latent_shape(model, width, height, batch_size)
+        dtype, _ = self._latent_layout(model, latent_dtype)
+        noise, report = self._noise_prefetcher.get(seed, shape, dtype, noise_prefetch)
+        if self.device.type != "cpu":
+            noise = noise.to(self.device)
+
+        nbytes = noise.numel() * noise.element_size()
+        # Positional fields, as in allocate_latent
+        noise_allocation = LatentAllocation(shape, torch_name(dtype), torch_name(self.device), "noise", False,
+                                            nbytes, nbytes, report.wait_seconds)
+        return {"samples": noise}, noise_allocation, report
+
+
+class ResolutionSweep(LatentNodeBase):
+    """
+    Emit a list of preset resolutions and empty latents for one model in a single node.
+    All latents are views into one contiguous arena allocation.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        """
+        Return a dictionary which contains config for all input fields.
+
+        Returns:
+            dict: Input configuration with required fields
+        """
+        check_user_presets()
+        return {
+            "required": {
+                "model": (["All"] + list(MODEL_RESOLUTIONS.keys()), {
+                    "default": "SDXL"
+                }),
+                "orientation": (["All", "Square", "Portrait", "Landscape"], {
+                    "default": "All"
+                }),
+                "aspect_ratios": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": "e.g. 16:9, 3:2 (empty for all)"
+                }),
+                "min_megapixels": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 16.0,
+                    "step": 0.05
+                }),
+                "max_megapixels": ("FLOAT", {
+                    "default": 16.0,
+                    "min": 0.0,
+                    "max": 16.0,
+                    "step": 0.05
+                }),
+                "resolution_multiplier": (["1x", "2x", "3x", "4x"], {
+                    "default": "1x"
+                }),
+                "batch_size": ("INT", {
+                    "default": 1,
+                    "min": 1,
+                    "max": 64,
+                    "step": 1,
+                    "display": "number"
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("INT", "INT", "LATENT", "STRING")
+    RETURN_NAMES = ("width", "height", "latent", "resolution")
+    OUTPUT_IS_LIST = (True, True, True, True)
+    FUNCTION = "sweep_resolutions"
+    CATEGORY = "utils"
+
+    def sweep_resolutions(self, model, orientation="All", aspect_ratios="", min_megapixels=0.0, max_megapixels=16.0, resolution_multiplier="1x", batch_size=1):
+        """
+        Select matching presets and generate one empty latent per resolution.
 
-        if height < min_dim or height > max_dim:
+        Args:
+            model (str): Selected model name
+            orientation (str): "All", "Square", "Portrait" or "Landscape"
+            aspect_ratios (str): Comma-separated ratio labels to keep (empty for all)
+            min_megapixels (float): Minimum preset size in megapixels (before multiplier)
+            max_megapixels (float): Maximum preset size in megapixels (before multiplier)
+            resolution_multiplier (str): Multiplier for resolution (1x-4x)
+            batch_size (int): Number of latent samples per resolution
+
+        Returns:
+            tuple: (widths: list, heights: list, latents: list, resolutions: list)
+
+        Raises:
+            ValueError: If no preset matches or the arena cannot fit in free memory
+        """
+        multiplier = int(resolution_multiplier.replace("x", ""))
+        ratios = [ratio.strip() for ratio in aspect_ratios.split(",") if ratio.strip()]
+        resolutions = filter_resolutions(
+            model, orientation, ratios,
+            min_pixels=min_megapixels * 1_000_000,
+            max_pixels=max_megapixels * 1_000_000
+        )
+        if not resolutions:
             raise ValueError(
-                f"{model} requires height between {min_dim} and {max_dim}. Got {height}"
+                f"No {model} resolutions match orientation={orientation}, aspect_ratios='{aspect_ratios}', "
+                f"{min_megapixels}-{max_megapixels} MP"
             )
 
-    def _generate_empty_latent(self, width, height, batch_size=1):
+        labels = [format_resolution(width, height) for width, height in resolutions]
+        widths = [width * multiplier for width, _ in resolutions]
+        heights = [height * multiplier for _, height in resolutions]
+        latents = self._generate_latent_arena(model, widths, heights, batch_size)
+
+        return (widths, heights, latents, labels)
+
+    def _generate_latent_arena(self, model, widths, heights, batch_size):
         """
-        Generate empty latent tensor for VAE input.
+        Carve empty latents for several resolutions out of one contiguous allocation.
 
         Args:
-            width (int): Image width in pixels
-            height (int): Image height in pixels
-            batch_size (int): Number of latent samples (default: 1)
+            model (str): Model whose latent geometry to use
+            widths (list): Image widths in pixels
+            heights (list): Image heights in pixels
+            batch_size (int): Number of latent samples per resolution
 
         Returns:
-            dict: LATENT dict with 'samples' key containing empty tensor
+            list: LATENT dicts whose 'samples' are views into a shared zero arena (read-only)
         """
-        # Latent space is 1/8 the image dimensions for SD-based models
-        latent_width = width // 8
-        latent_height = height // 8
+        torch = import_torch()
+        shapes = [get_latent_shape(model, width, height, batch_size) for width, height in zip(widths, heights)]
+        sizes = [math.prod(shape) for shape in shapes]
 
-        # Shape: [batch_size, channels=4, height//8, width//8]
-        latent_tensor = torch.zeros(
-            [batch_size, 4, latent_height, latent_width],
+        arena_bytes = sum(get_latent_bytes(model, w, h, batch_size) for w, h in zip(widths, heights))
+        free_bytes = get_free_memory(self.device)
+        if free_bytes is not None and arena_bytes > free_bytes:
+            raise ValueError(
+                f"Sweep of {len(shapes)} latents needs {format_bytes(arena_bytes)} "
+                f"but only {format_bytes(free_bytes)} is free on {self.device}. "
+                f"Narrow the filter or reduce batch size or multiplier."
+            )
+
+        # One pooled 1-D buffer; each latent is a contiguous view at its own offset
+        arena = self._latent_pool.acquire(
+            [sum(sizes)],
+            dtype=getattr(torch, get_latent_format(model)["dtype"]),
             device=self.device
         )
 
-        return {"samples": latent_tensor}
+        latents = []
+        offset = 0
+        for shape, size in zip(shapes, sizes):
+            latents.append({"samples": arena[offset:offset + size].view(shape)})
+            offset += size
+        return latents
+
+
+class ResolutionHiresSchedule(LatentNodeBase):
+    """
+    Plan a staged hires-fix upscale from a preset to a target multiplier.
+
+    Emits one width, height and latent per stage as lists, plus the schedule with its cost
+    estimates as JSON. Stage latents are zero-stride views, so no stage allocates latent
+    memory until a sampler writes to it.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        """
+        Return a dictionary which contains config for all input fields.
+
+        Returns:
+            dict: Input configuration with required fields
+        """
+        check_user_presets()
+        return {
+            "required": {
+                "model": (["All"] + list(MODEL_RESOLUTIONS.keys()), {
+                    "default": "SDXL"
+                }),
+                "resolution": (get_selectable_resolutions(), {
+                    "default": "1024x1024 (1:1 Square)"
+                }),
+                "target_multiplier": ("FLOAT", {
+                    "default": 2.0,
+                    "min": 1.0,
+                    "max": 4.0,
+                    "step": 0.25
+                }),
+                "max_step": ("FLOAT", {
+                    "default": 2.0,
+                    "min": 1.05,
+                    "max": 4.0,
+                    "step": 0.05
+                }),
+                "hires_denoise": ("FLOAT", {
+                    "default": 0.5,
+                    "min": 0.05,
+                    "max": 1.0,
+                    "step": 0.05
+                }),
+                "max_stages": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 8,
+                    "step": 1,
+                    "display": "number"
+                }),
+                "batch_size": ("INT", {
+                    "default": 1,
+                    "min": 1,
+                    "max": 64,
+                    "step": 1,
+                    "display": "number"
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("INT", "INT", "LATENT", "FLOAT", "STRING")
+    RETURN_NAMES = ("width", "height", "latent", "denoise", "schedule")
+    OUTPUT_IS_LIST = (True, True, True, True, False)
+    FUNCTION = "plan_schedule"
+    CATEGORY = "utils"
+
+    def plan_schedule(self, model, resolution, target_multiplier=2.0, max_step=2.0, hires_denoise=0.5, max_stages=4, batch_size=1):
+        """
+        Compute the cheapest stage schedule and build a lazy latent per stage.
+
+        Args:
+            model (str): Selected model name
+            resolution (str): Base preset label
+            target_multiplier (float): Final size as a multiple of the preset
+            max_step (float): Largest upscale between consecutive stages (the quality target)
+            hires_denoise (float): Denoise strength for stages after the first
+            max_stages (int): Most stages, including the base pass
+            batch_size (int): Number of latent samples per stage
+
+        Returns:
+            dict: {"ui": {"hires_schedule": [...]}, "result": (widths, heights, latents,
+                denoises, schedule JSON)}
+
+        Raises:
+            ValueError: If the preset is invalid or no schedule meets max_step
+        """
+        width, height = parse_resolution_string(resolution)
+        schedule = plan_hires_schedule(
+            model, width, height, target_multiplier, max_step, hires_denoise,
+            max_stages=max_stages, batch_size=batch_size
+        )
+
+        latents = []
+        for stage in schedule.stages:
+            latent, _ = self._generate_empty_latent(stage.width, stage.height, batch_size, model, allocation="lazy")
+            latents.append(latent)
+
+        summary = {**schedule._asdict(), "stages": [stage._asdict() for stage in schedule.stages]}
+        logger.debug(
+            "ResolutionHiresSchedule: %s, cost %.2f vs %.2f direct",
+            " -> ".join(f"{stage.width}x{stage.height}" for stage in schedule.stages),
+            schedule.total_cost, schedule.direct_cost
+        )
+        return {
+            "ui": {"hires_schedule": [summary]},
+            "result": (
+                [stage.width for stage in schedule.stages],
+                [stage.height for stage in schedule.stages],
+                latents,
+                [stage.denoise for stage in schedule.stages],
+                json.dumps(summary),
+            ),
+        }
+
+
+def _fit_region(width, height, target_width, target_height, fit):
+    """
+    Centered region that brings an image to a target aspect ratio.
+
+    Returns:
+        tuple: (x, y, w, h); for "crop" the part of the image to keep, for "pad" the
+            canvas size (w, h) and where the image sits in it (x, y)
+    """
+    wider = width * target_height > height * target_width
+    if fit == "crop":
+        if wider:
+            w, h = min(round(height * target_width / target_height), width), height
+        else:
+            w, h = width, min(round(width * target_height / target_width), height)
+        return (width - w) // 2, (height - h) // 2, w, h
+    if wider:
+        w, h = width, max(round(width * target_height / target_width), height)
+    else:
+        w, h = max(round(height * target_width / target_height), width), height
+    return (w - width) // 2, (h - height) // 2, w, h
+
+
+class ResolutionMatcher(LatentNodeBase):
+    """
+    Match an image batch to the nearest preset and fit it to that preset's aspect ratio.
+
+    Cropping returns a strided view of the input (no copy). Padding writes the image into
+    one new canvas. With resize on, the fitted image is resampled to exactly the preset
+    size: cropping then costs one allocation and padding two.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        """
+        Return a dictionary which contains config for all input fields.
+
+        Returns:
+            dict: Input configuration with required and optional fields
+        """
+        check_user_presets()
+        return {
+            "required": {
+                "image": ("IMAGE",),
+                "model": (["All"] + list(MODEL_RESOLUTIONS.keys()), {
+                    "default": "SDXL"
+                }),
+                "fit": (["crop", "pad"], {
+                    "default": "crop"
+                }),
+                "resize": ("BOOLEAN", {
+                    "default": False
+                }),
+            },
+            "optional": {
+                "resolution_source": (RESOLUTION_SOURCES, {
+                    "default": "presets"
+                }),
+                "pad_value": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 1.0,
+                    "step": 0.01
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "INT", "INT", "LATENT", "STRING")
+    RETURN_NAMES = ("image", "width", "height", "latent", "resolution")
+    FUNCTION = "match_image"
+    CATEGORY = "utils"
+
+    def match_image(self, image, model, fit="crop", resize=False, resolution_source="presets", pad_value=0.0):
+        """
+        Find the nearest preset for an image batch, fit the image to it and build its latent.
+
+        Args:
+            image (torch.Tensor): IMAGE batch [batch, height, width, channels]
+            model (str): Model whose presets to match against
+            fit (str): "crop" to cut the image to the preset's aspect ratio (center) or
+                "pad" to extend it with pad_value
+            resize (bool): Resample the fitted image to exactly the preset size
+            resolution_source (str): Resolution list to match against (default: "presets")
+            pad_value (float): Fill value for padding (default: 0.0, black)
+
+        Returns:
+            tuple: (image, width, height, latent, resolution label)
+
+        Raises:
+            ValueError: If the model has no presets
+        """
+        batch_size, height, width, channels = image.shape
+        matches = nearest_resolutions(model, [width], [height], resolution_source)
+        if not matches:
+            raise ValueError(f"No {resolution_source} resolutions for model '{model}'")
+        target_width, target_height, label = matches[0]
+
+        x, y, w, h = _fit_region(width, height, target_width, target_height, fit)
+        if fit == "crop":
+            fitted = image[:, y:y + h, x:x + w, :]
+            if resize and (w, h) != (target_width, target_height):
+                fitted = self._resample(fitted, target_width, target_height)
+        elif not resize:
+            if (w, h) == (width, height):
+                fitted = image
+            else:
+                fitted = image.new_full((batch_size, h, w, channels), pad_value)
+                fitted[:, y:y + height, x:x + width, :] = image
+        else:
+            # Scale to fit inside the preset, then place it on a preset-sized canvas
+            scale = min(target_width / width, target_height / height)
+            scaled_width = min(max(round(width * scale), 1), target_width)
+            scaled_height = min(max(round(height * scale), 1), target_height)
+            scaled = self._resample(image, scaled_width, scaled_height)
+            fitted = image.new_full((batch_size, target_height, target_width, channels), pad_value)
+            x, y = (target_width - scaled_width) // 2, (target_height - scaled_height) // 2
+            fitted[:, y:y + scaled_height, x:x + scaled_width, :] = scaled
+
+        latent, allocation = self._generate_empty_latent(target_width, target_height, batch_size, model)
+        logger.debug(
+            "ResolutionMatcher: %dx%d -> %s via %s%s, latent %s",
+            width, height, label.split("(")[0].strip(), fit, " + resize" if resize else "",
+            format_bytes(allocation.allocated_bytes)
+        )
+        return (fitted, target_width, target_height, latent, label)
+
+    @staticmethod
+    def _resample(image, width, height):
+        """Resample an IMAGE batch (possibly a strided view) into one new tensor."""
+        torch = import_torch()
+        # NHWC viewed as NCHW is channels_last, which interpolate keeps, so the result
+        # permutes back to a contiguous NHWC tensor without another copy
+        resized = torch.nn.functional.interpolate(
+            image.permute(0, 3, 1, 2), size=(height, width), mode="bilinear", align_corners=False, antialias=True
+        )
+        return resized.permute(0, 2, 3, 1)
+
+
+# Instrumentation is installed by wrapping methods, so the uninstrumented node runs its
+# original code with no checks at all
+_stats = None
+_uninstrumented = {}
+
+
+def _instrument(stats, name, func, observe=None):
+    """Wrap a function to record its latency, then pass (args, kwargs, result, seconds) to observe."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            stats.record_call(name, time.perf_counter() - started, error=True)
+            raise
+        seconds = time.perf_counter() - started
+        stats.record_call(name, seconds)
+        if observe is not None:
+            observe(args, kwargs, result, seconds)
+        return result
+    return wrapper
+
+
+def enable_stats():
+    """
+    Instrument ResolutionSelector: INPUT_TYPES, select_resolution, _validate_dimensions and
+    _generate_empty_latent record latency histograms, and select_resolution also records
+    the selection, allocated bytes per device, cache hits and a structured log line.
+
+    Called at import when the RESOLUTION_SELECTOR_STATS environment variable is set.
+
+    Returns:
+        SelectorStats: The active counters (the same object if already enabled)
+    """
+    global _stats
+    if _stats is not None:
+        return _stats
+    stats = SelectorStats()
+    # Map call arguments to names without inspect.Signature.bind, which costs more than the call
+    parameters = list(inspect.signature(ResolutionSelector.select_resolution).parameters.values())[1:]
+    select_defaults = {parameter.name: parameter.default for parameter in parameters}
+    select_positions = [parameter.name for parameter in parameters]
+
+    def observe_selection(args, kwargs, result, seconds):
+        call = dict(select_defaults)
+        call.update(zip(select_positions, args[1:]))
+        call.update(kwargs)
+        stats.record_selection(call["model"], call["resolution"], call["resolution_multiplier"], call["batch_size"])
+        ui = result["ui"]
+        for report in ui.get("noise", ()):
+            stats.record_cache("noise_prefetch", report["prefetched"])
+        if stats_logger.isEnabledFor(logging.INFO):
+            stats_logger.info(json.dumps({
+                "event": "select_resolution",
+                "node_id": call["unique_id"],
+                "model": call["model"],
+                "resolution": call["resolution"],
+                "multiplier": call["resolution_multiplier"],
+                "batch_size": call["batch_size"],
+                "width": result["result"][0],
+                "height": result["result"][1],
+                "ms": round(seconds * 1000, 3),
+                "latent_bytes": result["result"][6],
+                "allocated_bytes": sum(entry["allocated_bytes"] for entry in ui["allocations"]),
+                "skipped_allocations": ui["skipped_allocations"][0],
+            }))
+
+    def observe_allocation(args, kwargs, result, seconds):
+        stats.record_allocation(result[1])
+
+    # getattr_static follows the MRO without binding, so inherited helpers are found too;
+    # the wrappers are set on ResolutionSelector only, leaving the other nodes untouched
+    _uninstrumented.update({name: inspect.getattr_static(ResolutionSelector, name) for name in
+                            ("INPUT_TYPES", "select_resolution", "_validate_dimensions", "_generate_empty_latent")})
+    ResolutionSelector.INPUT_TYPES = classmethod(
+        _instrument(stats, "INPUT_TYPES", _uninstrumented["INPUT_TYPES"].__func__)
+    )
+    ResolutionSelector.select_resolution = _instrument(
+        stats, "select_resolution", _uninstrumented["select_resolution"], observe_selection
+    )
+    ResolutionSelector._validate_dimensions = _instrument(
+        stats, "_validate_dimensions", _uninstrumented["_validate_dimensions"]
+    )
+    ResolutionSelector._generate_empty_latent = _instrument(
+        stats, "_generate_empty_latent", _uninstrumented["_generate_empty_latent"], observe_allocation
+    )
+    _stats = stats
+    logger.info("ResolutionSelector: instrumentation enabled, stats at %s", STATS_ROUTE)
+    return stats
+
+
+def disable_stats():
+    """Remove the instrumentation wrappers, restoring the original methods."""
+    global _stats
+    for name, original in _uninstrumented.items():
+        if getattr(LatentNodeBase, name, None) is original:
+            delattr(ResolutionSelector, name)
+        else:
+            setattr(ResolutionSelector, name, original)
+    _uninstrumented.clear()
+    _stats = None
+
+
+def get_stats():
+    """
+    Get the active instrumentation counters.
+
+    Returns:
+        SelectorStats or None: Counters, or None when instrumentation is off
+    """
+    return _stats
+
+
+async def stats_handler(request):
+    """
+    Serve instrumentation counters as JSON; ?reset=1 zeroes them after the snapshot.
+
+    Args:
+        request (aiohttp.web.Request): Incoming request
+
+    Returns:
+        aiohttp.web.Response: {"enabled": false} when off, otherwise the snapshot
+    """
+    stats = _stats
+    if stats is None:
+        return web.json_response({"enabled": False, "env": STATS_ENV_VAR})
+    snapshot = {"enabled": True, **stats.snapshot()}
+    if request.query.get("reset") in ("1", "true"):
+        stats.reset()
+    return web.json_response(snapshot)
+
+
+async def presets_handler(request):
+    """
+    Serve the preset index as JSON, answering 304 when the client already has it.
+
+    Args:
+        request (aiohttp.web.Request): Incoming request
+
+    Returns:
+        aiohttp.web.Response: JSON body with ETag, or empty 304 response
+    """
+    check_user_presets()
+    body, etag = get_presets_payload()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+# Register routes when loaded inside a running ComfyUI server
+if getattr(PromptServer, "instance", None) is not None:
+    PromptServer.instance.routes.get(PRESETS_ROUTE)(presets_handler)
+    PromptServer.instance.routes.get(STATS_ROUTE)(stats_handler)
 
+if os.environ.get(STATS_ENV_VAR, "").lower() in ("1", "true", "yes", "on"):
+    enable_stats()
 
 NODE_CLASS_MAPPINGS = {
     "ResolutionSelector": ResolutionSelector,
+    "ResolutionSweep": ResolutionSweep,
+    "ResolutionHiresSchedule": ResolutionHiresSchedule,
+    "ResolutionMatcher": ResolutionMatcher,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "ResolutionSelector": "Resolution Selector Plus",
+    "ResolutionSweep": "Resolution Sweep",
+    "ResolutionHiresSchedule": "Hires Schedule",
+    "ResolutionMatcher": "Resolution Matcher",
 }
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script for the dataset bucketing CLI
+"""
+
+import contextlib
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+from bucket_images import assign_bucket, bucket_images, iter_image_paths, main, read_image_size
+
+
+def png_bytes(width, height):
+    """Minimal PNG signature and IHDR chunk"""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + b"\x00" * 4
+
+
+def exif_segment(orientation, endian="<"):
+    """APP1 EXIF segment whose IFD0 holds a Software tag and then Orientation"""
+    order = b"II" if endian == "<" else b"MM"
+    ifd = struct.pack(endian + "H", 2)
+    ifd += struct.pack(endian + "HHI4s", 0x0131, 2, 4, b"abc\x00")
+    ifd += struct.pack(endian + "HHIH2s", 0x0112, 3, 1, orientation, b"\x00\x00")
+    tiff = order + struct.pack(endian + "HI", 42, 8) + ifd + struct.pack(endian + "I", 0)
+    payload = b"Exif\x00\x00" + tiff
+    return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+
+def jpeg_bytes(width, height, orientation=None, endian="<"):
+    """JPEG with an APP0 segment, optional EXIF orientation, fill bytes and a progressive SOF2 frame"""
+    app0 = b"JFIF\x00" + b"\x00" * 9
+    sof = struct.pack(">BHHB", 8, height, width, 3) + b"\x00" * 9
+    return (
+        b"\xff\xd8"
+        + b"\xff\xe0" + struct.pack(">H", len(app0) + 2) + app0
+        + (exif_segment(orientation, endian) if orientation is not None else b"")
+        + b"\xff\xff"
+        + b"\xff\xc2" + struct.pack(">H", len(sof) + 2) + sof
+        + b"\xff\xd9"
+    )
+
+
+def webp_bytes(width, height, chunk):
+    """WebP RIFF container with a VP8, VP8L or VP8X first chunk"""
+    if chunk == b"VP8X":
+        payload = b"\x00" * 4 + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    elif chunk == b"VP8L":
+        bits = (width - 1) | ((height - 1) << 14)
+        payload = b"\x2f" + bits.to_bytes(4, "little")
+    else:
+        payload = b"\x00" * 3 + b"\x9d\x01\x2a" + struct.pack("<HH", width, height)
+    body = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body + b"\x00" * 8
+
+
+def write_dataset(root):
+    """Write one file per format into a nested directory tree"""
+    files = {
+        "a.png": (png_bytes(3000, 2000), (3000, 2000)),
+        "b.jpg": (jpeg_bytes(1080, 1920), (1080, 1920)),
+        "sub/c.webp": (webp_bytes(1024, 1024, b"VP8 "), (1024, 1024)),
+        "sub/d.webp": (webp_bytes(4000, 3000, b"VP8L"), (4000, 3000)),
+        "sub/deep/e.webp": (webp_bytes(2560, 1440, b"VP8X"), (2560, 1440)),
+        "sub/deep/broken.png": (b"\x89PNG\r\n\x1a\n", None),
+        "notes.txt": (b"not an image", None),
+    }
+    for name, (data, _) in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return files
+
+
+def test_read_image_size():
+    """Test header-only size parsing for each supported format"""
+    print("Testing header parsing:")
+    with tempfile.TemporaryDirectory() as root:
+        files = write_dataset(root)
+        for name, (_, expected) in files.items():
+            size = read_image_size(os.path.join(root, name))
+            assert size == expected, f"{name}: expected {expected}, got {size}"
+            print(f"  ✓ {name} -> {size}")
+
+
+def test_truncated_headers():
+    """Test headers cut short anywhere are reported per file instead of raising"""
+    print("\nTesting truncated headers:")
+    samples = {
+        "png": png_bytes(3000, 2000),
+        "jpg": jpeg_bytes(1080, 1920, orientation=6),
+        "vp8.webp": webp_bytes(1024, 1024, b"VP8 "),
+        "vp8l.webp": webp_bytes(4000, 3000, b"VP8L"),
+        "vp8x.webp": webp_bytes(2560, 1440, b"VP8X"),
+    }
+    with tempfile.TemporaryDirectory() as root:
+        for name, data in samples.items():
+            for length in range(len(data)):
+                path = os.path.join(root, f"{length}.{name}")
+                with open(path, "wb") as f:
+                    f.write(data[:length])
+                row = assign_bucket(path, "SDXL")
+                assert row["error"] or row["bucket"], f"{name} cut at {length} bytes gave no bucket or error"
+        path = os.path.join(root, "zero-length.jpg")
+        with open(path, "wb") as f:
+            f.write(b"\xff\xd8\xff\xe0\x00\x00\xff\xc0")
+        assert assign_bucket(path, "SDXL")["error"], "A segment length below 2 should be reported"
+    print(f"  ✓ Every truncation of {len(samples)} headers was reported")
+
+
+def test_exif_orientation():
+    """Test JPEG EXIF orientations that rotate by 90 degrees swap width and height"""
+    print("\nTesting EXIF orientation:")
+    with tempfile.TemporaryDirectory() as root:
+        for orientation in range(1, 9):
+            for endian in "<>":
+                path = os.path.join(root, f"{orientation}{endian == '<'}.jpg")
+                with open(path, "wb") as f:
+                    f.write(jpeg_bytes(1920, 1080, orientation, endian))
+                expected = (1080, 1920) if orientation >= 5 else (1920, 1080)
+                size = read_image_size(path)
+                assert size == expected, f"Orientation {orientation} ({endian}): expected {expected}, got {size}"
+        row = assign_bucket(path, "SDXL")
+        assert row["bucket_height"] > row["bucket_width"], f"A rotated landscape JPEG is portrait: {row}"
+    print("  ✓ EXIF orientation tests passed")
+
+
+def test_assign_bucket():
+    """Test bucket choice and crop/pad amounts"""
+    print("\nTesting bucket assignment:")
+    with tempfile.TemporaryDirectory() as root:
+        write_dataset(root)
+        row = assign_bucket(os.path.join(root, "a.png"), "SDXL", "crop")
+        assert row["aspect_ratio"] == "3:2" and row["bucket_width"] / row["bucket_height"] > 1.4, f"Bad bucket: {row}"
+        assert row["pad_x"] == row["pad_y"] == 0, "Crop mode should never pad"
+        assert row["crop_x"] >= 0 and row["crop_y"] >= 0, "Crop amounts should be non-negative"
+
+        row = assign_bucket(os.path.join(root, "b.jpg"), "Flux", "pad")
+        assert row["bucket_height"] > row["bucket_width"], f"Portrait image should get a portrait bucket: {row}"
+        assert row["crop_x"] == row["crop_y"] == 0, "Pad mode should never crop"
+
+        row = assign_bucket(os.path.join(root, "sub/deep/broken.png"), "SDXL")
+        assert row["error"] and row["bucket"] is None, "Malformed headers should be reported, not raised"
+    print("  ✓ Bucket assignment tests passed")
+
+
+def test_parallel_matches_inline():
+    """Test the process pool yields the same rows in the same order"""
+    print("\nTesting parallel bucketing:")
+    with tempfile.TemporaryDirectory() as root:
+        write_dataset(root)
+        paths = list(iter_image_paths(root))
+        assert len(paths) == 6, f"Expected 6 image paths, got {len(paths)}"
+        inline = list(bucket_images(paths, "Flux", workers=0))
+        parallel = list(bucket_images(iter(paths), "Flux", workers=2, chunk_size=2))
+        assert inline == parallel, "Parallel rows should match inline rows in order"
+    print("  ✓ Parallel bucketing tests passed")
+
+
+def test_cli():
+    """Test JSONL output and the stderr summary"""
+    print("\nTesting CLI:")
+    with tempfile.TemporaryDirectory() as root:
+        write_dataset(root)
+        output = os.path.join(root, "out.jsonl")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            assert main([root, "--model", "SDXL", "--workers", "0", "-o", output]) == 0
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+        summary = json.loads(stderr.getvalue())
+        assert len(rows) == summary["files"] == 6, f"Unexpected row count: {summary}"
+        assert summary["errors"] == 1 and sum(summary["buckets"].values()) == 5, f"Bad summary: {summary}"
+
+        csv_output = os.path.join(root, "out.csv")
+        with contextlib.redirect_stderr(io.StringIO()):
+            main([root, "--format", "csv", "--fit", "pad", "--workers", "0", "-o", csv_output])
+        with open(csv_output) as f:
+            assert f.readline().startswith("path,width,height"), "CSV should start with a header"
+    print("  ✓ CLI tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Bucket Images Tests")
+    print("=" * 60)
+
+    try:
+        test_read_image_size()
+        test_truncated_headers()
+        test_exif_orientation()
+        test_assign_bucket()
+        test_parallel_matches_inline()
+        test_cli()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
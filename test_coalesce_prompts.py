@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test script for the prompt queue coalescer
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, '.')
+
+from coalesce_prompts import Job, batch_cap, coalesce_jobs, latent_target, load_jobs, main, run_prompts
+
+
+def api_prompt(seed=1, text="a cat", slot=2, **selector):
+    """API-format prompt: a ResolutionSelector feeding a KSampler through one latent output"""
+    inputs = {"model": "SDXL", "resolution": "1024x1024    (1:1 Square)", "resolution_multiplier": "1x",
+              "batch_size": 1, "latent_seed": 0}
+    inputs.update(selector)
+    return {
+        "3": {"class_type": "ResolutionSelector", "inputs": inputs},
+        "5": {"class_type": "CLIPTextEncode", "inputs": {"text": text}},
+        "6": {"class_type": "KSampler", "inputs": {"seed": seed, "steps": 20, "latent_image": ["3", slot],
+                                                    "positive": ["5", 0]}},
+    }
+
+
+def write_queue(root):
+    """Write a mixed queue: JSON files, a wrapped prompt and a JSONL file"""
+    files = {
+        "a.json": api_prompt(seed=1),
+        "b.json": {"prompt": api_prompt(seed=2), "extra_data": {"user": "b"}},
+        "c.json": api_prompt(seed=3, resolution="512x512      (1:1 Square)", resolution_multiplier="2x"),
+    }
+    for name, value in files.items():
+        with open(os.path.join(root, name), "w") as f:
+            json.dump(value, f)
+    with open(os.path.join(root, "queue.jsonl"), "w") as f:
+        f.write(json.dumps({"id": "dog", "prompt": api_prompt(seed=4, text="a dog")}) + "\n")
+        f.write(json.dumps({"id": "big", "prompt": api_prompt(seed=5, batch_size=3)}) + "\n")
+        f.write("\n")
+
+
+def test_latent_target():
+    """Test the sampled latent and its size are resolved from the connected output"""
+    print("Testing latent targets:")
+    target = latent_target(api_prompt(resolution="512x512      (1:1 Square)", resolution_multiplier="2x"))
+    assert (target["width"], target["height"], target["batch_input"]) == (1024, 1024, "batch_size"), f"Bad target: {target}"
+    assert target["shape"] == [4, 128, 128], f"Unexpected latent shape: {target['shape']}"
+
+    target = latent_target(api_prompt(slot=5, custom_width=640, custom_height=480, custom_multiplier="2x", custom_batch=2))
+    assert (target["width"], target["height"], target["batch"]) == (1280, 960, 2), f"Custom latent should be used: {target}"
+
+    assert latent_target(api_prompt(batch_size=["9", 0])) is None, "Linked batch sizes cannot be merged"
+    assert latent_target(api_prompt(tile_size=512)) is None, "Tiled selectors are left alone"
+    prompt = api_prompt()
+    prompt["7"] = {"class_type": "VAEDecode", "inputs": {"samples": ["3", 5]}}
+    assert latent_target(prompt) is None, "Both latents in use is ambiguous"
+    print("  ✓ Latent target tests passed")
+
+
+def test_coalesce_groups():
+    """Test grouping, batch offsets and passthrough of prompts that differ beyond seeds"""
+    print("\nTesting grouping:")
+    with tempfile.TemporaryDirectory() as root:
+        write_queue(root)
+        jobs = load_jobs([root])
+        assert [job.id.rsplit(os.sep, 1)[-1] for job in jobs] == ["a.json", "b.json", "c.json", "dog", "big"], \
+            f"Jobs should load in sorted file order: {[job.id for job in jobs]}"
+        assert jobs[1].extra == {"extra_data": {"user": "b"}}, "Wrapper keys should be kept"
+
+    prompts, mapping = coalesce_jobs(jobs)
+    assert len(prompts) == 2, f"Expected the cat jobs merged and the dog job alone, got {len(prompts)}"
+    cat = mapping[prompts[0].id]
+    assert [entry["batch_offset"] for entry in cat["jobs"]] == [0, 1, 2, 3], f"Bad offsets: {cat}"
+    assert [entry["batch_count"] for entry in cat["jobs"]] == [1, 1, 1, 3], "Job batch sizes should be kept"
+    assert cat["batch_size"] == 6 and prompts[0].prompt["3"]["inputs"]["batch_size"] == 6, "Batch should be summed"
+    assert cat["jobs"][2]["seeds"] == {"3": {"latent_seed": 0}, "6": {"seed": 3}}, "Original seeds should be recorded"
+    assert jobs[0].prompt["3"]["inputs"]["batch_size"] == 1, "Input prompts must not be modified"
+    assert mapping[prompts[1].id]["jobs"][0]["id"] == "dog", "Different text should not merge"
+
+    passthrough = Job("plain", {"1": {"class_type": "KSampler", "inputs": {"seed": 1}}}, {})
+    prompts, mapping = coalesce_jobs([passthrough, passthrough])
+    assert len(prompts) == 2 and all(entry["node_id"] is None for entry in mapping.values()), \
+        "Prompts without a selector should pass through one by one"
+    print("  ✓ Grouping tests passed")
+
+
+def test_memory_budget_caps_batches():
+    """Test the memory budget splits a group into batches that fit"""
+    print("\nTesting memory budget:")
+    jobs = [Job(str(i), api_prompt(seed=i), {}) for i in range(10)]
+    target = latent_target(jobs[0].prompt)
+    cap = batch_cap(target, memory_budget=None)
+    assert cap == 64, f"Without a budget only the node limit applies, got {cap}"
+
+    assert batch_cap(target, memory_budget=0) == 0, "A budget below one sample allows nothing"
+    budget = 1
+    while batch_cap(target, budget) < 4:
+        budget *= 2
+    cap = batch_cap(target, budget)
+    prompts, mapping = coalesce_jobs(jobs, memory_budget=budget)
+    sizes = [entry["batch_size"] for entry in mapping.values()]
+    assert all(size <= cap for size in sizes) and sum(sizes) == 10, f"Batches {sizes} should respect cap {cap}"
+    assert len(prompts) == -(-10 // cap), f"Expected {-(-10 // cap)} prompts, got {len(prompts)}"
+
+    prompts, mapping = coalesce_jobs(jobs, max_batch=3)
+    assert [entry["batch_size"] for entry in mapping.values()] == [3, 3, 3, 1], "max_batch should cap merged batches"
+    print(f"  ✓ {len(jobs)} jobs -> batches of at most {cap} under a {budget} byte budget")
+
+
+class FakeComfy(BaseHTTPRequestHandler):
+    """Minimal /prompt, /free and /history endpoints; every prompt finishes immediately,
+    and prompts with an "Invalid" node are rejected the way ComfyUI rejects them"""
+    queued = []
+    events = []
+
+    def _reply(self, value, status=200):
+        body = json.dumps(value).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/free":
+            self.events.append("free")
+            self._reply({})
+            return
+        invalid = [node_id for node_id, node in payload["prompt"].items() if node["class_type"] == "Invalid"]
+        if invalid:
+            self._reply({"error": {"type": "prompt_outputs_failed_validation"},
+                         "node_errors": {node_id: {"errors": ["bad input"]} for node_id in invalid}}, status=400)
+            return
+        self.queued.append(payload)
+        self.events.append("prompt")
+        self._reply({"prompt_id": f"server-{len(self.queued)}"})
+
+    def do_GET(self):
+        prompt_id = self.path.rsplit("/", 1)[-1]
+        self._reply({prompt_id: {"status": {"completed": True}}})
+
+    def log_message(self, *args):
+        pass
+
+
+def test_cli_and_submit():
+    """Test CLI output, the mapping file and benchmark mode against a fake server"""
+    print("\nTesting CLI:")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeComfy)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            write_queue(root)
+            output = os.path.join(root, "merged.jsonl")
+            mapping_path = os.path.join(root, "mapping.json")
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                status = main([root, "-o", output, "--mapping", mapping_path, "--submit", url, "--benchmark"])
+            assert status == 0
+            with open(output) as f:
+                merged = [json.loads(line) for line in f]
+            with open(mapping_path) as f:
+                mapping = json.load(f)
+            summary = json.loads(stderr.getvalue())
+
+            assert summary["jobs"] == 5 and summary["prompts"] == 2 and summary["largest_batch"] == 6, f"Bad summary: {summary}"
+            assert [entry["id"] for entry in merged] == list(mapping), "Mapping keys should match merged prompt ids"
+            assert merged[0]["prompt"]["3"]["inputs"]["batch_size"] == 6, "Merged prompt should carry the summed batch"
+            assert len(FakeComfy.queued) == 14, f"Expected 2 rounds of 5 original + 2 merged, got {len(FakeComfy.queued)}"
+            assert summary["original"]["jobs_per_minute"] and "speedup" in summary, f"Benchmark missing: {summary}"
+            runs = "".join("F" if event == "free" else "p" for event in FakeComfy.events)
+            assert runs == "Fppppp" "Fpp" "Fpp" "Fppppp", f"Each run should start freed, in alternating order: {runs}"
+            assert [entry["prompt_id"] for entry in mapping.values()] == ["server-8", "server-9"], \
+                f"Mapping should record the last merged run's server prompt ids: {mapping}"
+
+            # A prompt the server rejects is reported with its node errors; the others still run
+            queue = os.path.join(root, "queue")
+            os.makedirs(queue)
+            write_queue(queue)
+            with open(os.path.join(queue, "bad.json"), "w") as f:
+                json.dump({**api_prompt(text="bad"), "9": {"class_type": "Invalid", "inputs": {}}}, f)
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                status = main([queue, "-o", output, "--mapping", mapping_path, "--submit", url])
+            with open(mapping_path) as f:
+                mapping = json.load(f)
+            summary = json.loads(stderr.getvalue())
+            assert status == 1, "Rejected prompts should fail the run"
+            (rejected_id, error), = summary["rejected"]["coalesced"].items()
+            assert error["status"] == 400 and error["node_errors"] == {"9": {"errors": ["bad input"]}}, error
+            assert mapping[rejected_id]["error"] == error and "prompt_id" not in mapping[rejected_id], mapping
+            assert sum("prompt_id" in entry for entry in mapping.values()) == 2, "The valid prompts should still run"
+
+        result = run_prompts(url, [])
+        assert result.seconds >= 0 and result.prompt_ids == result.errors == {}, "An empty queue should finish immediately"
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("  ✓ CLI tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Prompt Coalescer Tests")
+    print("=" * 60)
+
+    try:
+        test_latent_target()
+        test_coalesce_groups()
+        test_memory_budget_caps_batches()
+        test_cli_and_submit()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
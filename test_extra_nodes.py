@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the hires schedule, matcher and sweep nodes
+"""
+
+import json
+import sys
+sys.path.insert(0, '.')
+
+import torch
+
+from resolution_selector import LatentPool, ResolutionHiresSchedule, ResolutionMatcher, ResolutionSweep
+
+
+def isolated_node(node_class):
+    """Node instance with its own latent pool, so pool counters only see this test"""
+    node = node_class()
+    node._latent_pool = LatentPool()
+    return node
+
+
+def test_hires_schedule_node():
+    """Test the hires schedule node emits per-stage sizes and lazy latents"""
+    print("Testing hires schedule node:")
+    node = isolated_node(ResolutionHiresSchedule)
+    output = node.plan_schedule("SDXL", "832x1216     (2:3 Portrait)", 2.0, max_step=1.5, batch_size=2)
+    widths, heights, latents, denoises, summary = output["result"]
+    assert len(widths) == len(latents) == len(denoises) >= 3, "2x with 1.5x steps needs at least 3 stages"
+    for width, height, latent in zip(widths, heights, latents):
+        assert latent["samples"].shape == (2, 4, height // 8, width // 8), f"Bad stage latent {latent['samples'].shape}"
+        assert latent["samples"].stride() == (0, 0, 0, 0), "Stage latents should be lazy"
+    assert json.loads(summary)["stages"][-1]["width"] == widths[-1], "Summary should describe the same stages"
+    assert output["ui"]["hires_schedule"][0]["total_cost"] < output["ui"]["hires_schedule"][0]["direct_cost"]
+    print("  ✓ Hires schedule node tests passed")
+
+
+def test_resolution_matcher():
+    """Test image matching crops with a view, pads with one allocation and builds the latent"""
+    print("\nTesting resolution matcher:")
+    node = isolated_node(ResolutionMatcher)
+    image = torch.rand(2, 1000, 1600, 3)
+
+    cropped, width, height, latent, label = node.match_image(image, "SDXL", "crop")
+    assert (width, height) == (1536, 1024) and label.startswith("1536x1024"), f"Unexpected match {label}"
+    assert cropped.shape == (2, 1000, 1500, 3), f"Crop should reach 3:2, got {tuple(cropped.shape)}"
+    assert cropped.untyped_storage().data_ptr() == image.untyped_storage().data_ptr(), "Crop should be a view"
+    assert torch.equal(cropped, image[:, :, 50:1550]), "Crop should be centered"
+    assert latent["samples"].shape == (2, 4, 128, 192), "Latent should match the preset and image batch"
+
+    padded = node.match_image(image, "SDXL", "pad", pad_value=1.0)[0]
+    assert padded.shape == (2, 1067, 1600, 3) and padded.is_contiguous(), f"Bad pad shape {tuple(padded.shape)}"
+    assert torch.equal(padded[:, 33:1033], image) and bool((padded[:, :33] == 1).all()), "Image should sit centered"
+
+    for fit in ("crop", "pad"):
+        resized = node.match_image(image, "SDXL", fit, resize=True)[0]
+        assert resized.shape == (2, 1024, 1536, 3) and resized.is_contiguous(), f"{fit} + resize should hit the preset"
+    print("  ✓ Resolution matcher tests passed")
+
+
+def test_sweep_arena():
+    """Test the sweep node carves all latents from one arena"""
+    print("\nTesting resolution sweep arena:")
+    node = isolated_node(ResolutionSweep)
+    widths, heights, latents, labels = node.sweep_resolutions("Flux", "Landscape", "16:9, 3:2", 0.0, 16.0, "2x", 2)
+
+    assert len(widths) == len(heights) == len(latents) == len(labels) > 1, "Sweep should emit aligned lists"
+    assert node._latent_pool.stats()["misses"] == 1, "All latents should come from one allocation"
+    base = latents[0]["samples"].untyped_storage().data_ptr()
+    for width, height, latent in zip(widths, heights, latents):
+        samples = latent["samples"]
+        assert samples.shape == (2, 16, height // 8, width // 8), f"Bad shape for {width}x{height}"
+        assert samples.untyped_storage().data_ptr() == base, "Latents should share the arena storage"
+        assert samples.is_contiguous() and torch.count_nonzero(samples) == 0, "Latents should be zero views"
+
+    try:
+        node.sweep_resolutions("Flux", "Square", "21:9")
+        assert False, "Empty selections should raise"
+    except ValueError:
+        pass
+    print(f"  ✓ {len(latents)} latents carved from one arena")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Extra Node Tests")
+    print("=" * 60)
+
+    try:
+        test_hires_schedule_node()
+        test_resolution_matcher()
+        test_sweep_arena()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for opt-in call and allocation instrumentation
+"""
+
+import json
+import logging
+import sys
+import threading
+sys.path.insert(0, '.')
+
+from resolution_selector import LatentPool, ResolutionSelector
+
+
+def test_instrumentation():
+    """Test opt-in instrumentation wraps only when enabled and shards counters per thread"""
+    print("Testing instrumentation:")
+    import asyncio
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+    import resolution_selector
+
+    original = ResolutionSelector.__dict__["select_resolution"]
+    assert resolution_selector.get_stats() is None, "Instrumentation should be off by default"
+    assert not hasattr(original, "__wrapped__"), "Disabled instrumentation should leave the methods untouched"
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    resolution_selector.stats_logger.addHandler(handler)
+    resolution_selector.stats_logger.setLevel(logging.INFO)
+    stats = resolution_selector.enable_stats()
+    try:
+        assert resolution_selector.enable_stats() is stats, "Enabling twice should keep the same counters"
+        ResolutionSelector.INPUT_TYPES()
+        node = ResolutionSelector()
+        node._latent_pool = LatentPool()
+
+        def run(count):
+            for _ in range(count):
+                node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "2x", 2)
+
+        threads = [threading.Thread(target=run, args=(25,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            node.select_resolution("Flux", "1024x1024    (1:1 Square)", custom_width=1000, custom_height=750)
+        except ValueError:
+            pass
+
+        snapshot = stats.snapshot()
+        calls = snapshot["calls"]
+        assert calls["select_resolution"]["count"] == 101 and calls["select_resolution"]["errors"] == 1, calls
+        assert calls["_validate_dimensions"]["errors"] == 1, "Validation failures should be counted"
+        # The unset custom latent's placeholder is shared, so at most the racing threads build it
+        assert calls["INPUT_TYPES"]["count"] == 1 and 101 <= calls["_generate_empty_latent"]["count"] <= 105
+        assert sum(n for _, n in calls["select_resolution"]["histogram_us"]) == 101, "Histogram should cover every call"
+        latent_bytes = 2 * 4 * 256 * 256 * 4
+        pool = snapshot["cache"]["latent_pool"]
+        assert pool["hits"] + pool["misses"] == 101 and pool["hits"] >= 96, f"Pool should mostly hit: {pool}"
+        cpu = snapshot["bytes_per_device"]["cpu"]
+        assert cpu["logical"] >= 100 * latent_bytes, f"Logical bytes should cover every latent: {cpu}"
+        assert cpu["allocated"] < cpu["logical"] / 20, f"Pool hits should allocate nothing: {cpu}"
+        assert snapshot["selections"][0] == {"model": "SDXL", "resolution": "1024x1024    (1:1 Square)",
+                                             "multiplier": "2x", "batch_size": 2, "count": 100}
+        line = json.loads(records[0].getMessage())
+        assert line["event"] == "select_resolution" and line["width"] == 2048, f"Unexpected log line: {line}"
+
+        async def fetch():
+            app = web.Application()
+            app.router.add_get(resolution_selector.STATS_ROUTE, resolution_selector.stats_handler)
+            async with TestClient(TestServer(app)) as client:
+                response = await client.get(resolution_selector.STATS_ROUTE + "?reset=1")
+                return await response.json()
+
+        served = asyncio.run(fetch())
+        assert served["enabled"] and served["calls"]["select_resolution"]["count"] == 101, "Route should serve the snapshot"
+        assert not stats.snapshot()["calls"], "?reset=1 should zero the counters"
+    finally:
+        resolution_selector.disable_stats()
+        resolution_selector.stats_logger.removeHandler(handler)
+    assert ResolutionSelector.__dict__["select_resolution"] is original, "Disabling should restore the originals"
+    assert "_generate_empty_latent" not in ResolutionSelector.__dict__, "Inherited helpers should be inherited again"
+    print("  ✓ Instrumentation tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Instrumentation Tests")
+    print("=" * 60)
+
+    try:
+        test_instrumentation()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
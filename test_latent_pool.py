@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared empty-latent pool
+"""
+
+import sys
+import threading
+sys.path.insert(0, '.')
+
+import torch
+
+from resolution_selector import LatentPool, ResolutionSelector, allocate_latent
+
+
+def test_pool_reuses_buffers():
+    """Test repeated shapes return the same zero buffer"""
+    print("Testing pool reuse:")
+    pool = LatentPool()
+    first = pool.acquire([1, 4, 128, 128])
+    second = pool.acquire([1, 4, 128, 128])
+    assert first is second, "Same shape should return the pooled tensor"
+    assert torch.count_nonzero(first) == 0, "Pooled tensor should be zero-filled"
+
+    other = pool.acquire([2, 4, 128, 128])
+    assert other is not first, "Different batch should get its own buffer"
+    half = pool.acquire([1, 4, 128, 128], dtype=torch.float16)
+    assert half is not first and half.dtype == torch.float16, "dtype is part of the key"
+
+    stats = pool.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3, f"Unexpected stats: {stats}"
+    print("  ✓ Pool reuse tests passed")
+
+
+def test_pool_rezeroes_mutated_buffers():
+    """Test in-place writes are detected and undone before reuse"""
+    print("\nTesting mutation detection:")
+    pool = LatentPool()
+    tensor = pool.acquire([1, 4, 8, 8])
+    tensor.add_(1.0)
+    again = pool.acquire([1, 4, 8, 8])
+    assert again is tensor, "Mutated buffer should still be reused"
+    assert torch.count_nonzero(again) == 0, "Mutated buffer should be re-zeroed"
+    assert pool.stats()["rezeroed"] == 1, "Re-zero should be counted"
+    print("  ✓ Mutation detection tests passed")
+
+
+def test_pool_budget_and_lru():
+    """Test byte budget and LRU eviction"""
+    print("\nTesting byte budget and LRU eviction:")
+    one_mib = 1024 * 1024
+    # [1, 4, 256, 256] float32 is exactly 1 MiB
+    pool = LatentPool(max_bytes=2 * one_mib)
+    a = pool.acquire([1, 4, 256, 256])
+    b = pool.acquire([2, 4, 128, 256])
+    pool.acquire([1, 4, 256, 256])  # touch a so b is least recently used
+    pool.acquire([4, 4, 128, 128])  # forces an eviction
+    stats = pool.stats()
+    assert stats["bytes"] <= 2 * one_mib, f"Pool should respect its budget: {stats}"
+    assert pool.acquire([1, 4, 256, 256]) is a, "Recently used entry should survive"
+    assert pool.acquire([2, 4, 128, 256]) is not b, "LRU entry should have been evicted"
+
+    huge = pool.acquire([1, 4, 1024, 1024])
+    assert huge.shape == (1, 4, 1024, 1024), "Oversized requests are still served"
+    assert pool.stats()["bytes"] <= 2 * one_mib, "Oversized requests are not pooled"
+    print("  ✓ Budget and LRU tests passed")
+
+
+def test_pool_thread_safety():
+    """Test concurrent acquires of one shape share a single buffer"""
+    print("\nTesting thread safety:")
+    pool = LatentPool()
+    results = []
+
+    def worker():
+        for _ in range(50):
+            results.append(pool.acquire([1, 4, 64, 64]))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(t) for t in results}) == 1, "All threads should share one buffer"
+    assert pool.stats()["misses"] == 1, "Only the first acquire should allocate"
+    print("  ✓ Thread safety tests passed")
+
+
+def test_node_uses_shared_pool():
+    """Test node instances share latents for repeated shapes"""
+    print("\nTesting node latent sharing:")
+    first = ResolutionSelector().select_resolution("SDXL", "1024x1024    (1:1 Square)")["result"]
+    second = ResolutionSelector().select_resolution("SDXL", "1024x1024    (1:1 Square)")["result"]
+    assert first[2]["samples"].shape == (1, 4, 128, 128), "Preset latent shape should be unchanged"
+    assert first[2]["samples"] is second[2]["samples"], "Node instances should share pooled latents"
+    assert first[5]["samples"].shape == (1, 4, 0, 0), "Empty custom latent shape should be unchanged"
+    print("  ✓ Node latent sharing tests passed")
+
+
+def test_node_model_latent_geometry():
+    """Test the node emits latents shaped for the selected model's VAE"""
+    print("\nTesting model latent geometry:")
+    node = ResolutionSelector()
+    result = node.select_resolution("Flux", "1024x1024    (1:1 Square)", "1x", 2, 512, 768, "1x", 1)["result"]
+    assert result[2]["samples"].shape == (2, 16, 128, 128), "Flux latent should have 16 channels"
+    assert result[5]["samples"].shape == (1, 16, 96, 64), "Custom Flux latent should have 16 channels"
+    assert result[6] == result[2]["samples"].numel() * 4, "latent_bytes should match the tensor"
+    assert result[7] == result[5]["samples"].numel() * 4, "custom_latent_bytes should match the tensor"
+
+    result = node.select_resolution("SD 1.5", "512x512      (1:1 Square)")["result"]
+    assert result[2]["samples"].shape == (1, 4, 64, 64), "SD 1.5 latent should have 4 channels"
+    assert result[7] == 0, "Unset custom dimensions should report zero bytes"
+    print("  ✓ Model latent geometry tests passed")
+
+
+def test_node_snap_to_model():
+    """Test the node snaps custom dimensions instead of failing the prompt"""
+    print("\nTesting node snapping mode:")
+    node = ResolutionSelector()
+    try:
+        node.select_resolution("Flux", "1024x1024    (1:1 Square)", "1x", 1, 1000, 750, "1x", 1)
+        assert False, "Invalid Flux dimensions should raise without snapping"
+    except ValueError:
+        pass
+
+    result = node.select_resolution("Flux", "1024x1024    (1:1 Square)", "1x", 1, 1000, 750, "1x", 1, snap_to_model=True)["result"]
+    assert result[3:5] == (1008, 752), "Custom dimensions should be snapped"
+    assert result[8:10] == (1000, 750), "Requested dimensions should be reported"
+    assert result[5]["samples"].shape == (1, 16, 94, 126), "Custom latent should use snapped dimensions"
+    print("  ✓ Node snapping tests passed")
+
+
+def test_node_fails_fast_on_memory():
+    """Test oversized latents are rejected before allocation"""
+    print("\nTesting memory fail-fast:")
+    node = ResolutionSelector()
+    node._latent_pool = LatentPool()
+    import resolution_selector
+    original = resolution_selector.get_free_memory
+    resolution_selector.get_free_memory = lambda device: 1024 * 1024
+    try:
+        node.select_resolution("SDXL", "2048x2048    (1:1 Square)", "4x", 64)
+        assert False, "Latent larger than free memory should raise"
+    except ValueError as e:
+        assert "free" in str(e), f"Error should mention free memory: {e}"
+    finally:
+        resolution_selector.get_free_memory = original
+    assert node._latent_pool.stats()["misses"] == 0, "Nothing should be allocated"
+    print("  ✓ Memory fail-fast tests passed")
+
+
+def test_free_memory_cpu_fallback():
+    """Test the CPU free-memory probe prefers psutil, then MemAvailable, and is throttled"""
+    print("\nTesting CPU free-memory fallback:")
+    import os
+    import types
+    import resolution_selector
+    original = resolution_selector.psutil
+    try:
+        resolution_selector.psutil = types.SimpleNamespace(
+            virtual_memory=lambda: types.SimpleNamespace(available=12345))
+        assert resolution_selector.get_available_cpu_memory() == 12345, "psutil should be used when importable"
+
+        resolution_selector.psutil = None
+        if os.path.exists("/proc/meminfo"):
+            with open("/proc/meminfo") as f:
+                available = next(int(line.split()[1]) * 1024 for line in f if line.startswith("MemAvailable:"))
+            probed = resolution_selector.get_available_cpu_memory()
+            assert abs(probed - available) < 256 * 1024 * 1024, f"Should read MemAvailable: {probed} vs {available}"
+    finally:
+        resolution_selector.psutil = original
+
+    # Repeated calls reuse the last probe within the check interval
+    state = resolution_selector._cpu_memory_state
+    state["checked"] = float("-inf")
+    cpu = torch.device("cpu")
+    resolution_selector.get_free_memory(cpu)
+    state["available"] = 42
+    assert resolution_selector.get_free_memory(cpu) == 42, "Probe should be throttled"
+    state["checked"] = float("-inf")
+    assert resolution_selector.get_free_memory(cpu) != 42, "Probe should run again after the interval"
+    assert resolution_selector.get_free_memory(torch.device("meta")) is None, "Non-CPU devices are unknown"
+    print("  ✓ CPU free-memory fallback tests passed")
+
+
+def test_allocation_strategies():
+    """Test pooled, eager and lazy allocation and the pinned-memory fallback"""
+    print("\nTesting allocation strategies:")
+    pool = LatentPool()
+    shape = [2, 4, 64, 64]
+    pooled, first = allocate_latent(shape, strategy="pooled", pool=pool)
+    again, second = allocate_latent(shape, strategy="pooled", pool=pool)
+    assert again is pooled, "Pooled strategy should reuse buffers"
+    assert first.allocated_bytes == first.logical_bytes == 2 * 4 * 64 * 64 * 4, f"Bad first report: {first}"
+    assert second.allocated_bytes == 0, "Pool hits should report no new allocation"
+
+    eager, report = allocate_latent(shape, dtype=torch.float16, strategy="eager", pool=pool)
+    assert eager is not pooled and eager.dtype == torch.float16, "Eager strategy should allocate privately"
+    assert report.allocated_bytes == eager.numel() * 2, "Eager report should count fp16 bytes"
+    eager.add_(1.0)  # private buffers are writable
+
+    lazy, report = allocate_latent(shape, dtype=torch.bfloat16, strategy="lazy")
+    assert lazy.shape == tuple(shape) and lazy.stride() == (0, 0, 0, 0), "Lazy strategy should be a zero-stride view"
+    assert lazy.untyped_storage().nbytes() == 2 and torch.count_nonzero(lazy) == 0, "Lazy view should alias one zero"
+    assert report.allocated_bytes == 0 and report.logical_bytes == lazy.numel() * 2, f"Bad lazy report: {report}"
+
+    pinned, report = allocate_latent(shape, strategy="eager", pin_memory=True)
+    assert report.pinned == pinned.is_pinned(), "Pinned flag should match the tensor"
+    if not torch.cuda.is_available():
+        assert not report.pinned, "CPU-only builds should fall back to pageable memory"
+
+    try:
+        allocate_latent(shape, strategy="sparse")
+        assert False, "Unknown strategies should raise"
+    except ValueError:
+        pass
+    print("  ✓ Allocation strategy tests passed")
+
+
+def test_node_allocation_options():
+    """Test the node's dtype and allocation options and its allocation report"""
+    print("\nTesting node allocation options:")
+    node = ResolutionSelector()
+    node._latent_pool = LatentPool()
+    output = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "1x", 4, 512, 512, "1x", 1,
+                                    latent_dtype="fp16", allocation="lazy")
+    result, report = output["result"], output["ui"]["allocations"]
+    assert result[2]["samples"].dtype == torch.float16, "latent_dtype should set the tensor dtype"
+    assert result[6] == 4 * 4 * 128 * 128 * 2, "latent_bytes should reflect the fp16 dtype"
+    assert [entry["output"] for entry in report] == ["latent", "custom_latent"], f"Bad report: {report}"
+    assert all(entry["strategy"] == "lazy" and entry["allocated_bytes"] == 0 for entry in report), "Lazy outputs allocate nothing"
+    assert node._latent_pool.stats()["misses"] == 0, "Lazy allocation should bypass the pool"
+
+    output = node.select_resolution("Flux", "1024x1024    (1:1 Square)", latent_dtype="bf16", allocation="eager", pin_memory=True)
+    assert output["result"][2]["samples"].dtype == torch.bfloat16, "bf16 latents should be supported on CPU"
+    assert output["ui"]["allocations"][0]["allocated_bytes"] == output["result"][6], "Eager output should report its bytes"
+    assert output["ui"]["allocations"][0]["ms"] >= 0, "Allocation time should be reported"
+    print("  ✓ Node allocation option tests passed")
+
+
+def test_unconnected_latents_are_skipped():
+    """Test unconnected and zero-dimension latents are never allocated"""
+    print("\nTesting lazy output evaluation:")
+    node = ResolutionSelector()
+    node._latent_pool = LatentPool()
+    prompt = {"7": {"class_type": "ResolutionSelector", "inputs": {}},
+              "8": {"class_type": "KSampler", "inputs": {"latent_image": ["7", 5]}}}
+    before = ResolutionSelector.skipped_allocations
+    output = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "1x", 2, 768, 512, "1x", 1,
+                                    prompt=prompt, unique_id="7")
+    result = output["result"]
+    assert [entry["output"] for entry in output["ui"]["allocations"]] == ["custom_latent"], "Only the wired latent is built"
+    assert result[2]["samples"].shape == (2, 4, 128, 128) and result[2]["samples"].stride() == (0, 0, 0, 0), "Skipped latent is a placeholder"
+    assert result[6] == 2 * 4 * 128 * 128 * 4, "latent_bytes is still reported for skipped latents"
+    assert node._latent_pool.stats()["misses"] == 1, "Only the custom latent should be allocated"
+
+    node.select_resolution("SDXL", "1024x1024    (1:1 Square)", prompt={}, unique_id="7")
+    assert ResolutionSelector.skipped_allocations - before == 2, "Skipped allocations should be counted"
+    assert node._latent_pool.stats()["misses"] == 2, "Zero-dimension custom latents should not touch the pool"
+    print("  ✓ Lazy output evaluation tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LatentPool Tests")
+    print("=" * 60)
+
+    try:
+        test_pool_reuses_buffers()
+        test_pool_rezeroes_mutated_buffers()
+        test_pool_budget_and_lru()
+        test_pool_thread_safety()
+        test_node_uses_shared_pool()
+        test_node_model_latent_geometry()
+        test_node_snap_to_model()
+        test_node_fails_fast_on_memory()
+        test_free_memory_cpu_fallback()
+        test_allocation_strategies()
+        test_node_allocation_options()
+        test_unconnected_latents_are_skipped()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the workflow linter
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+from lint_workflows import extract_selector_nodes, lint_directory, lint_workflows, main
+from resolution_presets import dimension_violation_mask, dimension_violations, MODEL_RESOLUTIONS
+
+STALE_LABEL = "1000x1000    (1:1 Square)"
+
+
+def ui_workflow(*widget_lists, subgraph=None):
+    """UI-format workflow with one ResolutionSelector per widget list, optionally one more in a subgraph"""
+    nodes = [{"id": i + 1, "type": "ResolutionSelector", "widgets_values": values} for i, values in enumerate(widget_lists)]
+    nodes.append({"id": 99, "type": "KSampler", "widgets_values": [1, "fixed", 20]})
+    workflow = {"nodes": nodes, "links": []}
+    if subgraph is not None:
+        nodes = [{"id": 1, "type": "ResolutionSelector", "widgets_values": subgraph}]
+        workflow["definitions"] = {"subgraphs": [{"id": "sg-1", "nodes": nodes}]}
+    return workflow
+
+
+def api_prompt(**inputs):
+    """API-format prompt with a single ResolutionSelector"""
+    return {
+        "3": {"class_type": "ResolutionSelector", "inputs": inputs},
+        "4": {"class_type": "KSampler", "inputs": {"latent_image": ["3", 2]}},
+    }
+
+
+def write_workflows(root):
+    """Write a small corpus covering each finding type"""
+    workflows = {
+        "clean.json": ui_workflow(["SDXL", "1024x1024    (1:1 Square)", "2x", 1, 0, 0, "1x", 1],
+                                  subgraph=["Flux", "1024x1024    (1:1 Square)"]),
+        "ui/problems.json": ui_workflow(
+            ["Flux", "1024x1024    (1:1 Square)", "1x", 1, 1000, 750, "1x", 1],  # custom dims break Flux's /16 rule
+            ["SDXL", "2048x2048    (1:1 Square)", "4x", 1],                      # 8192 past SDXL's max
+            ["SDXL", STALE_LABEL, "1x", 1],                                      # stale label
+            subgraph=["Flux", "1024x1024    (1:1 Square)", "1x", 1, 1024, 768, "1x", 1],
+        ),
+        "api/prompt.json": {"prompt": api_prompt(model="SD 1.5", resolution="832x1216     (2:3 Portrait)",
+                                                 custom_width=["10", 0], custom_height=512)},
+        "api/legacy.json": api_prompt(model="SD 2.1", resolution="512x512      (1:1 Square)"),
+        "broken.json": None,
+    }
+    for name, workflow in workflows.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("{not json" if workflow is None else json.dumps(workflow))
+
+
+def test_violation_mask_matches_rules():
+    """Test the vectorized mask agrees with dimension_violations"""
+    print("Testing vectorized constraint checks:")
+    models = list(MODEL_RESOLUTIONS) + ["All", "Unknown"]
+    rows = [(model, width, height) for model in models for width in range(0, 5000, 56) for height in (8, 250, 1000, 2056, 4100)]
+    mask = dimension_violation_mask(*zip(*rows))
+    expected = [bool(dimension_violations(*row)) for row in rows]
+    assert list(mask) == expected, "Vectorized mask should match dimension_violations"
+    print(f"  ✓ {len(rows)} rows agree")
+
+
+def test_extract_nodes():
+    """Test extraction from UI (with subgraphs) and API formats"""
+    print("\nTesting node extraction:")
+    nodes = extract_selector_nodes(ui_workflow(["Flux", "1024x1024    (1:1 Square)"], subgraph=["SDXL", "1024x1024    (1:1 Square)"]))
+    assert [node[0] for node in nodes] == ["1", "sg-1:1"], "Top-level and subgraph nodes should be found"
+    settings = nodes[0][1]
+    assert settings["model"] == "Flux" and settings["batch_size"] == 1, "Missing widgets should take defaults"
+
+    nodes = extract_selector_nodes(api_prompt(model="SDXL", custom_width=["5", 0]))
+    assert nodes[0][0] == "3" and nodes[0][1]["custom_width"] is None, "Linked API inputs should be unknown"
+    print("  ✓ Node extraction tests passed")
+
+
+def test_lint_findings():
+    """Test each finding type is reported once"""
+    print("\nTesting lint findings:")
+    with tempfile.TemporaryDirectory() as root:
+        write_workflows(root)
+        findings = []
+        nodes = 0
+        for chunk_findings, chunk_nodes, _, _ in lint_directory(root, workers=2, chunk_size=2):
+            findings.extend(chunk_findings)
+            nodes += chunk_nodes
+        codes = sorted(finding["code"] for finding in findings)
+        assert nodes == 8, f"Expected 8 selector nodes, got {nodes}"
+        assert codes == ["custom-dimensions", "model-mismatch", "preset-exceeds-constraints",
+                         "stale-label", "unknown-model", "unreadable"], f"Unexpected findings: {codes}"
+
+        by_code = {finding["code"]: finding for finding in findings}
+        assert "divisible by 16" in by_code["custom-dimensions"]["message"], "Messages should match the node's errors"
+        assert by_code["preset-exceeds-constraints"]["severity"] == "warning", "Preset overflow is a warning"
+        assert by_code["model-mismatch"]["path"].endswith("prompt.json"), "SD 1.5 has no 832x1216 preset"
+    print("  ✓ Lint finding tests passed")
+
+
+def test_fix_rewrites_stale_labels():
+    """Test --fix rewrites stale labels in place and the exit code reflects the rest"""
+    print("\nTesting fix mode:")
+    with tempfile.TemporaryDirectory() as root:
+        write_workflows(root)
+        path = os.path.join(root, "ui", "problems.json")
+        findings, _, fixed_paths = lint_workflows([path], fix=True)
+        assert fixed_paths == [path], "The file with a stale label should be rewritten"
+        stale = [finding for finding in findings if finding["code"] == "stale-label"][0]
+        assert stale["fixed_to"] == "1024x1024    (1:1 Square)", f"Unexpected replacement: {stale}"
+
+        with open(path) as f:
+            assert STALE_LABEL not in f.read(), "Stale label should be gone from the file"
+        findings, _, fixed_paths = lint_workflows([path], fix=True)
+        assert not fixed_paths and "stale-label" not in {f["code"] for f in findings}, "Fix should be idempotent"
+
+        report_path = os.path.join(root, "report.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            status = main([os.path.join(root, "ui"), "--workers", "0", "-o", report_path])
+        with open(report_path) as f:
+            report = json.load(f)
+        assert status == 1 and report["summary"]["errors"] == 1, f"Custom dims error should remain: {report['summary']}"
+    print("  ✓ Fix mode tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Workflow Linter Tests")
+    print("=" * 60)
+
+    try:
+        test_violation_mask_matches_rules()
+        test_extract_nodes()
+        test_lint_findings()
+        test_fix_rewrites_stale_labels()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for node cache fingerprints (IS_CHANGED)
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from resolution_selector import NODE_CLASS_MAPPINGS, ResolutionSelector
+
+# Stand-in for inputs without a widget default, such as IMAGE
+LINKED_INPUT = object()
+
+
+def default_inputs(node_class):
+    """Inputs as ComfyUI passes them to IS_CHANGED: every widget at its default, hidden PROMPT unset"""
+    input_types = node_class.INPUT_TYPES()
+    inputs = {}
+    for section in ("required", "optional"):
+        for name, spec in input_types.get(section, {}).items():
+            if isinstance(spec[0], list):
+                inputs[name] = spec[1].get("default", spec[0][0]) if len(spec) > 1 else spec[0][0]
+            else:
+                inputs[name] = spec[1].get("default", LINKED_INPUT) if len(spec) > 1 else LINKED_INPUT
+    for name, kind in input_types.get("hidden", {}).items():
+        inputs[name] = "7" if kind == "UNIQUE_ID" else None
+    return inputs
+
+
+def test_is_changed_fingerprint():
+    """Test IS_CHANGED only changes when effective inputs change"""
+    print("Testing IS_CHANGED fingerprint:")
+    base = ResolutionSelector.IS_CHANGED("SDXL", "1024x1024    (1:1 Square)", "2x", 4)
+    assert base == ResolutionSelector.IS_CHANGED("SDXL", "1024x1024    (1:1 Square)", "2x", 4), "Fingerprint should be stable"
+    assert base == ResolutionSelector.IS_CHANGED("SDXL", "1024x1024    (1:1 Square)", "2x", 4, custom_multiplier="3x",
+                                                 resolution_source="both"), "Unused inputs should not change it"
+    assert base != ResolutionSelector.IS_CHANGED("SDXL", "1024x1024    (1:1 Square)", "2x", 8), "Batch should change it"
+    assert base != ResolutionSelector.IS_CHANGED("SDXL", "1024x1024    (1:1 Square)", "2x", 4, latent_dtype="fp16"), "dtype should change it"
+    assert base == ResolutionSelector.IS_CHANGED("SDXL", "1024x1024    (1:1 Square)", "2x", 4, prompt=None, unique_id="3"), \
+        "Hidden inputs should not change it"
+    print("  ✓ IS_CHANGED fingerprint tests passed")
+
+
+def test_is_changed_noise_seed():
+    """Test the noise seed only changes the fingerprint in noise mode, and is not randomized per queue"""
+    print("\nTesting IS_CHANGED noise seed:")
+    is_changed = ResolutionSelector.IS_CHANGED
+    assert is_changed("SDXL", "1024x1024    (1:1 Square)", "1x", 1, latent_mode="noise", latent_seed=1) != \
+        is_changed("SDXL", "1024x1024    (1:1 Square)", "1x", 1, latent_mode="noise", latent_seed=2), \
+        "Seed should be part of the fingerprint in noise mode"
+    assert is_changed("SDXL", "1024x1024    (1:1 Square)", latent_seed=1) == is_changed("SDXL", "1024x1024    (1:1 Square)", latent_seed=2), \
+        "Seed should not matter in empty mode"
+    seed_input = ResolutionSelector.INPUT_TYPES()["optional"]["latent_seed"]
+    assert seed_input[1]["control_after_generate"] is False, "The seed should not be randomized on every queue"
+    print("  ✓ IS_CHANGED noise seed tests passed")
+
+
+def test_cached_placeholders_match_empty_latents():
+    """Test a result cached while an output was unconnected is still valid once it is connected"""
+    print("\nTesting cached placeholders:")
+    prompt = {"1": {"class_type": "ResolutionSelector", "inputs": {}},
+              "2": {"class_type": "KSampler", "inputs": {"latent_image": ["1", 2]}}}
+    node = ResolutionSelector()
+    skipped = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", custom_width=768, custom_height=512,
+                                     prompt=prompt, unique_id="1")["result"][5]["samples"]
+    built = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", custom_width=768, custom_height=512)["result"][5]["samples"]
+    assert skipped.shape == built.shape and skipped.dtype == built.dtype, "Placeholder should match the real latent"
+    assert skipped.eq(built).all(), "Placeholder should hold the same zeros"
+    again = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", custom_width=768, custom_height=512,
+                                   prompt=prompt, unique_id="1")["result"][5]["samples"]
+    assert again is skipped, "Placeholders should be built once and shared"
+    print("  ✓ Placeholders match the empty latents they stand in for")
+
+
+def test_is_changed_every_node():
+    """Test every registered node accepts its own inputs in IS_CHANGED, or leaves caching to ComfyUI"""
+    print("\nTesting IS_CHANGED on every node:")
+    for name, node_class in NODE_CLASS_MAPPINGS.items():
+        if not hasattr(node_class, "IS_CHANGED"):
+            print(f"  ✓ {name}: cached on its inputs")
+            continue
+        assert "IS_CHANGED" in vars(node_class), f"{name} should not inherit another node's IS_CHANGED"
+        inputs = default_inputs(node_class)
+        fingerprint = node_class.IS_CHANGED(**inputs)
+        assert isinstance(fingerprint, str) and fingerprint == node_class.IS_CHANGED(**inputs), \
+            f"{name}: IS_CHANGED should return a stable string, got {fingerprint!r}"
+
+        required = node_class.INPUT_TYPES()["required"]
+        for input_name, spec in required.items():
+            if isinstance(spec[0], list) and len(spec[0]) > 1:
+                other = next(value for value in spec[0] if value != inputs[input_name])
+                changed = node_class.IS_CHANGED(**{**inputs, input_name: other})
+                assert changed != fingerprint, f"{name}: changing {input_name} should change IS_CHANGED"
+        print(f"  ✓ {name}: IS_CHANGED follows its inputs")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Node Caching Tests")
+    print("=" * 60)
+
+    try:
+        test_is_changed_fingerprint()
+        test_is_changed_noise_seed()
+        test_cached_placeholders_match_empty_latents()
+        test_is_changed_every_node()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for seeded noise latents and background prefetch
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import torch
+
+from resolution_selector import NoisePrefetcher, ResolutionSelector
+
+
+def test_noise_prefetcher():
+    """Test seeded noise is bit-identical whether prefetched or not, and the buffer is bounded"""
+    print("Testing noise prefetcher:")
+    shape = [2, 4, 64, 64]
+    prefetcher = NoisePrefetcher(max_workers=2)
+    prefetcher.get(100, shape, torch.float32, prefetch=3)
+    assert prefetcher.stats()["pending"] == 0, "A single seed says nothing about the next one"
+    prefetcher.get(6, shape, torch.float32, prefetch=3)
+    assert prefetcher.stats()["pending"] == 0, "Random seeds should never be prefetched"
+    first, report = prefetcher.get(7, shape, torch.float32, prefetch=3)
+    assert not report.hit and report.saved_seconds == 0, "First seed is generated inline"
+    assert prefetcher.stats()["pending"] == 3, "Counting seeds should prefetch the next ones"
+    second, report = prefetcher.get(8, shape, torch.float32)
+    assert report.hit and report.saved_seconds >= 0, "Next seed should come from the buffer"
+
+    for seed, noise in ((7, first), (8, second)):
+        torch.manual_seed(seed)
+        assert torch.equal(noise, torch.randn(shape)), f"Seed {seed} should match sequential generation"
+    half, _ = prefetcher.get(9, shape, torch.float16)
+    torch.manual_seed(9)
+    assert torch.equal(half, torch.randn(shape, dtype=torch.float16)), "fp16 noise should match too"
+
+    bounded = NoisePrefetcher(max_bytes=3 * 4 * 64 * 64 * 4)
+    bounded.schedule(range(10), [1, 4, 64, 64], torch.float32)
+    stats = bounded.stats()
+    assert stats["pending"] == 3 and stats["wasted"] == 7, f"Buffer should keep the 3 newest seeds: {stats}"
+    bounded.clear()
+    print("  ✓ Noise prefetcher tests passed")
+
+
+def test_noise_mode_node():
+    """Test the node's noise mode matches the seed, prefetches counting seeds and builds unconnected outputs"""
+    print("\nTesting noise latent mode:")
+    node = ResolutionSelector()
+    node._noise_prefetcher = NoisePrefetcher()
+    node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "1x", 1, latent_mode="noise", noise_prefetch=4, latent_seed=41)
+    output = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "1x", 1, latent_mode="noise", noise_prefetch=4, latent_seed=42)
+    torch.manual_seed(42)
+    assert torch.equal(output["result"][2]["samples"], torch.randn(1, 4, 128, 128)), "Node noise should match the seed"
+    report = output["ui"]["noise"][0]
+    assert report["output"] == "latent" and report["saved_ms"] >= 0, f"Unexpected report: {report}"
+    output = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "1x", 1, latent_mode="noise", latent_seed=43)
+    assert output["ui"]["noise"][0]["prefetched"], "Seed 43 should have been prefetched by the previous run"
+    node._noise_prefetcher.clear()
+
+    # Noise outputs are built even when unconnected: a zero placeholder could be reused from cache
+    prompt = {"1": {"class_type": "ResolutionSelector", "inputs": {}},
+              "2": {"class_type": "KSampler", "inputs": {"latent_image": ["1", 2]}}}
+    output = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", custom_width=512, custom_height=512,
+                                    latent_mode="noise", latent_seed=5, prompt=prompt, unique_id="1")
+    assert output["result"][5]["samples"].std() > 0.5, "Unconnected noise latents should still hold noise"
+
+    # Tiling keeps the plan's tiles empty but must not turn the noise latent into zeros
+    output = node.select_resolution("SDXL", "1024x1024    (1:1 Square)", "1x", 1, tile_size=512,
+                                    latent_mode="noise", latent_seed=7)
+    torch.manual_seed(7)
+    assert torch.equal(output["result"][2]["samples"], torch.randn(1, 4, 128, 128)), "Tiled noise latent should match the seed"
+    assert len(output["result"][10]) > 1, "Tiling should still emit a multi-tile plan"
+    print("  ✓ Noise latent mode tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Noise Prefetch Tests")
+    print("=" * 60)
+
+    try:
+        test_noise_prefetcher()
+        test_noise_mode_node()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
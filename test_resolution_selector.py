@@ -3,25 +3,46 @@
 Test script for ResolutionSelector enhancements
 """
 
+import json
+import os
+import shutil
+import subprocess
 import sys
+import tempfile
 sys.path.insert(0, '.')
 
-# Mock torch module for testing without ComfyUI environment
-class MockTorch:
-    class device:
-        def __init__(self, name):
-            self.name = name
-
-sys.modules['torch'] = MockTorch()
-sys.modules['comfy'] = type('module', (), {'model_management': None})()
-
-from resolution_selector import (
+# Preset core is torch-free, so no torch/comfy mocking is needed
+from resolution_presets import (
     gcd,
     calculate_aspect_ratio,
+    classify_aspect_ratios,
+    get_orientation,
     format_resolution,
     get_resolution_list,
     get_all_resolutions,
     parse_resolution_string,
+    get_latent_format,
+    get_latent_shape,
+    get_latent_bytes,
+    resolve_latent_dtype,
+    get_default_resolution,
+    get_resolution_index,
+    invalidate_resolution_index,
+    snap_dimensions,
+    get_constraints,
+    plan_latent_memory,
+    get_presets_payload,
+    dimension_violations,
+    validate_dimensions,
+    filter_resolutions,
+    generate_buckets,
+    plan_tiles,
+    plan_hires_schedule,
+    tile_blend_weights,
+    get_selectable_resolutions,
+    get_user_presets_status,
+    reload_user_presets,
+    main as presets_main,
     MODEL_RESOLUTIONS
 )
 
@@ -42,6 +63,47 @@ def test_aspect_ratio():
     assert calculate_aspect_ratio(1536, 1024) == "3:2", "1536x1024 should be 3:2"
     print("  ✓ Aspect ratio tests passed")
 
+def test_aspect_ratio_presets_unchanged():
+    """Test bisect classifier matches the original nearest-ratio labels for every preset"""
+    print("\nTesting aspect ratio labels for all presets:")
+    # Original two-decimal table with linear nearest search
+    legacy_ratios = [
+        (1.0, "1:1"), (1.25, "5:4"), (1.33, "4:3"), (1.5, "3:2"), (1.6, "16:10"),
+        (1.78, "16:9"), (2.0, "2:1"), (2.35, "21:9"), (2.4, "12:5"), (3.0, "3:1"),
+        (0.75, "3:4"), (0.67, "2:3"), (0.625, "5:8"), (0.56, "9:16"), (0.5, "1:2"),
+        (0.42, "5:12"), (0.33, "1:3"),
+    ]
+    count = 0
+    for model_name, model_data in MODEL_RESOLUTIONS.items():
+        for category in ["square", "portrait", "landscape"]:
+            for w, h in model_data[category]:
+                legacy = min(legacy_ratios, key=lambda r: abs(w / h - r[0]))[1]
+                assert calculate_aspect_ratio(w, h) == legacy, f"{model_name} {w}x{h} label changed"
+                count += 1
+
+    # Rotations get mirrored labels
+    assert calculate_aspect_ratio(1472, 1140) == "4:3", "1472x1140 should be 4:3"
+    assert calculate_aspect_ratio(1140, 1472) == "3:4", "1140x1472 should be 3:4"
+    print(f"  ✓ {count} preset labels unchanged")
+
+def test_classify_aspect_ratios_batch():
+    """Test vectorized classifier agrees with the scalar path"""
+    print("\nTesting batched aspect ratio classification:")
+    import numpy as np
+
+    dims = [(w, h) for w in range(256, 2049, 40) for h in range(256, 2049, 56)]
+    widths = np.array([w for w, _ in dims])
+    heights = np.array([h for _, h in dims])
+    ratios, orientations = classify_aspect_ratios(widths, heights)
+    for (w, h), ratio, orientation in zip(dims, ratios, orientations):
+        assert ratio == calculate_aspect_ratio(w, h), f"Batch ratio mismatch for {w}x{h}"
+        assert orientation == get_orientation(w, h), f"Batch orientation mismatch for {w}x{h}"
+
+    ratios, orientations = classify_aspect_ratios([1920, 1024], [1080, 1024])
+    assert list(ratios) == ["16:9", "1:1"], "List inputs should be accepted"
+    assert list(orientations) == ["Landscape", "Square"], "Orientations should match"
+    print(f"  ✓ {len(dims)} batched classifications match")
+
 def test_format_resolution():
     """Test resolution formatting"""
     print("\nTesting resolution formatting:")
@@ -124,6 +186,395 @@ def test_all_resolutions_unique():
     assert len(dimensions) == len(unique_dimensions), "Should have no duplicate dimensions"
     print(f"  ✓ All {len(all_res)} resolutions are unique")
 
+def test_latent_geometry():
+    """Test model-aware latent geometry registry"""
+    print("\nTesting latent geometry registry:")
+    for model_name, model_data in MODEL_RESOLUTIONS.items():
+        latent_format = model_data["latent"]
+        assert set(latent_format) == {"channels", "downscale", "dtype", "memory_format"}, f"{model_name} latent format incomplete"
+
+    assert get_latent_format("Flux")["channels"] == 16, "Flux VAE has 16 latent channels"
+    assert get_latent_format("SDXL")["channels"] == 4, "SDXL VAE has 4 latent channels"
+    assert get_latent_format("All")["channels"] == 4, "'All' falls back to the SD latent format"
+
+    assert get_latent_shape("Qwen Image", 1328, 1328, 2) == [2, 16, 166, 166], "Qwen latent shape mismatch"
+    assert get_latent_shape("SDXL", 1024, 768) == [1, 4, 96, 128], "SDXL latent shape mismatch"
+    assert get_latent_bytes("Flux", 1024, 1024) == 16 * 128 * 128 * 4, "Flux fp32 latent bytes mismatch"
+    assert get_latent_bytes("Flux", 1024, 1024, latent_dtype="bf16") == 16 * 128 * 128 * 2, "bf16 halves latent bytes"
+    assert resolve_latent_dtype("SDXL") == "float32" and resolve_latent_dtype("SDXL", "fp16") == "float16", "dtype choice mismatch"
+    try:
+        resolve_latent_dtype("SDXL", "int8")
+        assert False, "Unknown dtypes should raise"
+    except ValueError:
+        pass
+    print("  ✓ Latent geometry tests passed")
+
+def test_resolution_index():
+    """Test precomputed resolution index matches the preset tables"""
+    print("\nTesting precomputed resolution index:")
+    index = get_resolution_index()
+    assert index is get_resolution_index(), "Index should be built once and reused"
+
+    for model_name, model_data in MODEL_RESOLUTIONS.items():
+        expected = [
+            format_resolution(w, h)
+            for category in ["square", "portrait", "landscape"]
+            for w, h in model_data[category]
+        ]
+        assert get_resolution_list(model_name) == expected, f"{model_name} labels should match the table"
+
+    assert get_resolution_list("Unknown") == [], "Unknown models should have no resolutions"
+    assert get_resolution_list("All") == get_all_resolutions(), "'All' should list all unique resolutions"
+    for label in get_all_resolutions():
+        assert index.label_dimensions[label] == parse_resolution_string(label.replace("  ", " ")), f"Lookup mismatch for {label}"
+
+    assert get_default_resolution("Qwen Image") == format_resolution(1328, 1328), "Qwen default should be 1328x1328"
+    assert get_default_resolution("Unknown") == format_resolution(1024, 1024), "Fallback default should be 1024x1024"
+
+    # Index is only rebuilt after explicit invalidation
+    MODEL_RESOLUTIONS["SDXL"]["square"].append((1152, 1152))
+    try:
+        assert not any("1152x1152" in r for r in get_resolution_list("SDXL")), "Index should not change implicitly"
+        invalidate_resolution_index()
+        assert any("1152x1152" in r for r in get_resolution_list("SDXL")), "Invalidated index should pick up changes"
+    finally:
+        MODEL_RESOLUTIONS["SDXL"]["square"].remove((1152, 1152))
+        invalidate_resolution_index()
+    print("  ✓ Resolution index tests passed")
+
+def test_snap_dimensions():
+    """Test constraint-aware snapping of custom dimensions"""
+    print("\nTesting dimension snapping:")
+    assert snap_dimensions("SDXL", 1024, 768) == (1024, 768), "Valid dimensions should be unchanged"
+    assert snap_dimensions("Flux", 1000, 750) == (1008, 752), "Flux should snap to multiples of 16"
+    assert snap_dimensions("Flux", 4096, 3072) == (2048, 1536), "Oversized requests should scale into range"
+    assert snap_dimensions("SD 1.5", 100, 100) == (256, 256), "Undersized requests should scale into range"
+    assert snap_dimensions("All", 1001, 999) == (1001, 999), "'All' has no constraints to snap to"
+
+    for model_name in MODEL_RESOLUTIONS:
+        constraints = get_constraints(model_name)
+        for w, h in [(1001, 777), (3000, 2000), (300, 533), (1920, 1080)]:
+            sw, sh = snap_dimensions(model_name, w, h)
+            assert sw % constraints["divisible_by"] == 0 and sh % constraints["divisible_by"] == 0, f"{model_name} {sw}x{sh} not divisible"
+            assert constraints["min"] <= sw <= constraints["max"], f"{model_name} width {sw} out of range"
+            assert constraints["min"] <= sh <= constraints["max"], f"{model_name} height {sh} out of range"
+            assert abs(sw / sh / (w / h) - 1) <= 0.05, f"{model_name} {w}x{h} -> {sw}x{sh} aspect drift"
+
+    try:
+        snap_dimensions("Flux", 4000, 300)
+        assert False, "Extreme aspect ratios cannot be snapped within tolerance"
+    except ValueError:
+        pass
+    print("  ✓ Snap dimension tests passed")
+
+def test_plan_latent_memory():
+    """Test memory planning for resolution x multiplier x batch combinations"""
+    print("\nTesting memory planner:")
+    plan = plan_latent_memory("SDXL", 1024, 1024, 4)
+    assert plan.latent_bytes == 4 * 4 * 128 * 128 * 4, "Latent bytes should follow the registry"
+    assert plan.working_set_bytes > plan.latent_bytes, "Working set should include sampling activations"
+    assert plan.fits and plan.batch_splits == [4], "Unknown free memory should assume the batch fits"
+
+    per_sample = plan.working_set_bytes // 4
+    plan = plan_latent_memory("SDXL", 1024, 1024, 10, free_bytes=per_sample * 4)
+    assert not plan.fits and plan.max_batch == 4, "Only 4 samples should fit"
+    assert plan.batch_splits == [4, 3, 3], f"Batch should be split evenly, got {plan.batch_splits}"
+    assert sum(plan.batch_splits) == 10, "Splits should cover the whole batch"
+
+    plan = plan_latent_memory("SDXL", 8192, 8192, 1, free_bytes=per_sample)
+    assert not plan.fits and plan.batch_splits == [], "4x of 2048 should not fit a 1024 budget"
+
+    flux = plan_latent_memory("Flux", 1024, 1024)
+    assert flux.latent_bytes == 4 * plan_latent_memory("SDXL", 1024, 1024).latent_bytes, "Flux latents have 4x the channels"
+    print("  ✓ Memory planner tests passed")
+
+def test_presets_route():
+    """Test the preset JSON route with a local aiohttp test client"""
+    print("\nTesting presets route:")
+    import asyncio
+    import json
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+    from resolution_selector import presets_handler, PRESETS_ROUTE
+
+    body, etag = get_presets_payload()
+    assert get_presets_payload()[0] is body, "Payload should be cached until the index changes"
+
+    async def run():
+        app = web.Application()
+        app.router.add_get(PRESETS_ROUTE, presets_handler)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get(PRESETS_ROUTE)
+            assert response.status == 200, "Route should serve presets"
+            assert response.headers["ETag"] == etag, "Response should carry the content hash ETag"
+            data = json.loads(await response.read())
+
+            cached = await client.get(PRESETS_ROUTE, headers={"If-None-Match": etag})
+            assert cached.status == 304, "Matching ETag should return 304"
+            return data
+
+    data = asyncio.run(run())
+    assert data["resolutions"]["All"] == get_all_resolutions(), "'All' labels should match the index"
+    for model_name in MODEL_RESOLUTIONS:
+        assert data["resolutions"][model_name] == get_resolution_list(model_name), f"{model_name} labels should match"
+        assert data["defaults"][model_name] == get_default_resolution(model_name), f"{model_name} default should match"
+    print(f"  ✓ Presets route served {len(body)} bytes")
+
+def test_validate_dimensions():
+    """Test constraint validation rules"""
+    print("\nTesting dimension validation:")
+    assert dimension_violations("SDXL", 1024, 768) == [], "Valid SDXL dimensions"
+    assert dimension_violations("All", 1001, 13) == [], "'All' has no constraints"
+    violations = dimension_violations("Flux", 1000, 4096)
+    assert len(violations) == 2, f"Expected width divisibility and height bounds errors: {violations}"
+    try:
+        validate_dimensions("Flux", 1000, 1024)
+        assert False, "Invalid dimensions should raise"
+    except ValueError as e:
+        assert "divisible by 16" in str(e), f"Unexpected error: {e}"
+    print("  ✓ Dimension validation tests passed")
+
+def test_core_is_torch_free():
+    """Test the preset core imports without torch and the node defers it"""
+    print("\nTesting torch-free core import:")
+    import subprocess
+    code = (
+        "import sys; import resolution_presets, resolution_selector; "
+        "assert 'torch' not in sys.modules, 'torch imported eagerly'"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    print("  ✓ Core and node import without torch")
+
+def test_cli():
+    """Test the JSON command line entry point"""
+    print("\nTesting command line entry point:")
+    import io
+    import json
+    from contextlib import redirect_stdout
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        assert presets_main(["tables", "--model", "SDXL"]) == 0
+    tables = json.loads(output.getvalue())
+    assert [r["label"] for r in tables["SDXL"]] == get_resolution_list("SDXL"), "Table dump should match"
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        status = presets_main(["validate", "Flux", "500", "375", "--multiplier", "2", "--snap"])
+    result = json.loads(output.getvalue())
+    assert status == 1 and not result["valid"], "1000x750 is not valid for Flux"
+    assert result["snapped"] == [1008, 752], "Snapped size should be reported"
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        assert presets_main(["hires", "All", "1024", "1024", "--target", "4"]) == 0
+    result = json.loads(output.getvalue())
+    assert [stage["width"] for stage in result["stages"]] == [1024, 2048, 4096], "Hires plan should be dumped"
+    print("  ✓ Command line tests passed")
+
+def test_filter_resolutions():
+    """Test preset filtering by orientation, ratio and pixel range"""
+    print("\nTesting resolution filtering:")
+    sdxl = [parse_resolution_string(r) for r in get_resolution_list("SDXL")]
+    assert filter_resolutions("SDXL") == sdxl, "No filter should keep every preset in order"
+
+    portrait = filter_resolutions("SDXL", orientation="Portrait")
+    assert portrait and all(w < h for w, h in portrait), "Portrait filter"
+
+    wide = filter_resolutions("Flux", aspect_ratios=["16:9"], max_pixels=2_100_000)
+    assert wide == [(1280, 720), (1344, 768), (1664, 928), (1792, 1024), (1920, 1088)], f"Unexpected 16:9 Flux presets: {wide}"
+    assert filter_resolutions("Unknown") == [], "Unknown models have no presets"
+    print("  ✓ Resolution filter tests passed")
+
+def test_generate_buckets():
+    """Test programmatic aspect-ratio buckets"""
+    print("\nTesting bucket generation:")
+    for model_name in MODEL_RESOLUTIONS:
+        constraints = get_constraints(model_name)
+        buckets = generate_buckets(model_name)
+        assert len(buckets) > 5, f"{model_name} should have buckets"
+        native = parse_resolution_string(get_default_resolution(model_name))
+        budget = native[0] * native[1]
+        for w, h in buckets:
+            assert not dimension_violations(model_name, w, h), f"{model_name} bucket {w}x{h} breaks constraints"
+            assert abs(w * h / budget - 1) <= 0.1, f"{model_name} bucket {w}x{h} is off budget"
+        ratios = [w / h for w, h in buckets]
+        assert ratios == sorted(ratios), "Buckets should run from tallest to widest"
+        assert len(set(buckets)) == len(buckets), "Buckets should be unique"
+    assert native in generate_buckets("SDXL"), "Native square should be a bucket"
+
+    assert generate_buckets("Flux", 2.0) is generate_buckets("Flux", 2.0), "Buckets should be memoized"
+    assert len(generate_buckets("Flux", ratio_step=0.2)) < len(generate_buckets("Flux")), "Wider steps give fewer buckets"
+    assert generate_buckets("All") == (), "'All' has no constraints to enumerate"
+
+    buckets = get_resolution_list("SDXL", "buckets")
+    both = get_resolution_list("SDXL", "both")
+    assert both[:len(get_resolution_list("SDXL"))] == get_resolution_list("SDXL"), "'both' starts with presets"
+    assert set(both) == set(buckets) | set(get_resolution_list("SDXL")), "'both' merges presets and buckets"
+    selectable = set(get_selectable_resolutions())
+    assert set(both) <= selectable, "Node should accept every listed label"
+    for label in buckets:
+        assert parse_resolution_string(label) in generate_buckets("SDXL"), f"Bucket label {label} should parse"
+    print(f"  ✓ {len(selectable)} selectable labels")
+
+
+def test_plan_tiles():
+    """Test tile plans respect constraints, cover the image and blend to 1"""
+    print("\nTesting tile plans:")
+    cases = [("SDXL", 8192, 8192, 1024, 64), ("Flux", 4096, 2304, 1000, 128), ("SD 1.5", 2048, 1368, 768, 64), ("SDXL", 4096, 4096, 4096, 64)]
+    for model_name, width, height, tile_size, overlap in cases:
+        plan = plan_tiles(model_name, width, height, tile_size, overlap, batch_size=2)
+        constraints = get_constraints(model_name)
+        for side in (plan.tile_width, plan.tile_height):
+            assert side % constraints["divisible_by"] == 0 and constraints["min"] <= side <= constraints["max"], f"Bad tile side {side}"
+        assert plan.latent_shape == get_latent_shape(model_name, plan.tile_width, plan.tile_height, 2), "Tile latent shape mismatch"
+
+        for starts, tile, length in [(plan.x_starts, plan.tile_width, width), (plan.y_starts, plan.tile_height, height)]:
+            assert starts[0] == 0 and starts[-1] + tile == length, "Tiles should span the axis exactly"
+            assert all(start % 8 == 0 for start in starts), "Tiles should start on latent cells"
+            assert all(b - a <= tile - plan.overlap for a, b in zip(starts, starts[1:])), "Neighbours should overlap"
+
+            weights = tile_blend_weights([start // 8 for start in starts], tile // 8, length // 8)
+            totals = [0.0] * (length // 8)
+            for start, ramp in zip(starts, weights):
+                for offset, weight in enumerate(ramp):
+                    totals[start // 8 + offset] += weight
+            assert all(abs(total - 1.0) < 1e-9 for total in totals), "Blend weights should sum to 1"
+        print(f"  ✓ {model_name} {width}x{height}: {len(plan.x_starts)}x{len(plan.y_starts)} tiles of {plan.tile_width}x{plan.tile_height}")
+
+    single = plan_tiles("SDXL", 2048, 1024, None)
+    assert (single.x_starts, single.y_starts, single.tile_width) == ([0], [0], 2048), "None should plan one full tile"
+    try:
+        plan_tiles("SDXL", 2048, 2048, 0)
+        assert False, "Non-positive tile sizes should raise"
+    except ValueError:
+        pass
+
+
+def test_nearest_resolutions_vectorized():
+    """Test the vectorized nearest-preset search agrees with nearest_resolution"""
+    print("\nTesting vectorized nearest preset:")
+    import random
+    from resolution_presets import nearest_resolution, nearest_resolutions
+
+    rng = random.Random(7)
+    queries = [(rng.randint(200, 6000), rng.randint(200, 6000)) for _ in range(200)]
+    for model_name in list(MODEL_RESOLUTIONS) + ["All"]:
+        for source in ("presets", "both"):
+            expected = [nearest_resolution(model_name, w, h, source) for w, h in queries]
+            assert nearest_resolutions(model_name, *zip(*queries), source=source) == expected, f"{model_name}/{source}"
+    assert nearest_resolutions("Unknown", [1024], [1024]) == [], "Unknown models have no presets"
+    print(f"  ✓ {len(queries)} queries agree for every model")
+
+
+def test_plan_hires_schedule():
+    """Test staged upscale schedules are snapped, bounded by max_step and cheapest"""
+    print("\nTesting hires schedules:")
+    schedule = plan_hires_schedule("All", 1024, 1024, 4)
+    assert [(s.width, s.height) for s in schedule.stages] == [(1024, 1024), (2048, 2048), (4096, 4096)], schedule
+    assert schedule.largest_step == 2.0 and schedule.total_cost < schedule.direct_cost, "Staging should be cheaper"
+    assert [s.denoise for s in schedule.stages] == [1.0, 0.5, 0.5], "Only the base pass is full denoise"
+
+    # Past SDXL's 2048 max the final stage is clamped without distorting the aspect ratio
+    schedule = plan_hires_schedule("SD 1.5", 512, 768, 4, max_step=1.5)
+    final = schedule.stages[-1]
+    assert final.height == 2048 and abs(final.width / final.height - 512 / 768) < 0.01, f"Bad final stage: {final}"
+    for stage in schedule.stages:
+        assert not dimension_violations("SD 1.5", stage.width, stage.height), f"Stage breaks constraints: {stage}"
+    steps = [b.width / a.width for a, b in zip(schedule.stages, schedule.stages[1:])]
+    assert max(steps) <= 1.5 + 1e-9 and schedule.largest_step <= 1.5, f"Steps should respect max_step: {steps}"
+
+    # A stricter quality target needs more, cheaper-per-step stages
+    loose = plan_hires_schedule("Flux", 832, 1216, 2.5, max_step=2.0)
+    strict = plan_hires_schedule("Flux", 832, 1216, 2.5, max_step=1.25, max_stages=6)
+    assert len(strict.stages) > len(loose.stages) and strict.total_cost > loose.total_cost
+    assert all(s.width % 16 == 0 and s.height % 16 == 0 for s in strict.stages), "Flux stages should be /16"
+
+    assert len(plan_hires_schedule("SDXL", 1024, 1024, 1).stages) == 1, "1x is just the base pass"
+    try:
+        plan_hires_schedule("All", 1024, 1024, 4, max_step=1.5, max_stages=3)
+        assert False, "Unreachable targets should fail"
+    except ValueError as e:
+        assert "raise max_step or max_stages" in str(e)
+    print(f"  ✓ 4x in {len(plan_hires_schedule('All', 1024, 1024, 4).stages)} stages at {schedule.total_cost} vs {schedule.direct_cost} direct")
+
+
+def test_user_presets():
+    """Test user presets are validated, hot-reloaded and only rebuild changed models"""
+    print("\nTesting user presets:")
+    user_presets = {"models": {
+        "SDXL": {"landscape": [[1600, 896]]},
+        "My Model": {
+            "constraints": {"divisible_by": 64, "min": 512, "max": 1536},
+            "square": [[1024, 1024]],
+            "landscape": [[1536, 1024]],
+            "default": [1536, 1024],
+        },
+    }}
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "user_presets.json")
+        with open(path, "w") as f:
+            json.dump(user_presets, f)
+
+        flux_sizes = get_resolution_index().valid_sizes["Flux"]
+        _, etag = get_presets_payload()
+        try:
+            changed, error = reload_user_presets(path, force=True)
+            assert error is None and changed == {"SDXL", "My Model"}, f"Unexpected reload: {changed} {error}"
+            assert get_resolution_index().valid_sizes["Flux"] is flux_sizes, "Unchanged models should not be rebuilt"
+            assert format_resolution(1600, 896) in get_resolution_list("SDXL"), "User preset should extend SDXL"
+            assert get_resolution_list("My Model") == [format_resolution(1024, 1024), format_resolution(1536, 1024)]
+            assert get_default_resolution("My Model") == format_resolution(1536, 1024), "User default should apply"
+            assert get_constraints("My Model")["divisible_by"] == 64, "User constraints should apply"
+            assert get_presets_payload()[1] != etag, "Presets route should serve the new tables"
+            assert get_user_presets_status() == {"path": path, "models": ["My Model"], "error": None}
+
+            assert reload_user_presets(path, force=True) == (frozenset(), None), "Same content should not reload"
+
+            # Invalid content is rejected as a whole and the previous tables stay
+            user_presets["models"]["My Model"]["square"].append([1000, 1000])
+            user_presets["models"]["Bad"] = {"portrait": [[1024, 512]], "shape": "round"}
+            with open(path, "w") as f:
+                json.dump(user_presets, f)
+            changed, error = reload_user_presets(path, force=True)
+            assert not changed and "divisible by 64" in error, f"Constraint violation should be reported: {error}"
+            assert "is not portrait" in error and "unknown key 'shape'" in error, f"All problems should be listed: {error}"
+            assert "My Model" in MODEL_RESOLUTIONS and "Bad" not in MODEL_RESOLUTIONS, "Previous tables should stay"
+
+            yaml_path = os.path.join(root, "user_presets.yaml")
+            with open(yaml_path, "w") as f:
+                f.write("models:\n  SDXL:\n    portrait:\n      - [896, 1600]\n")
+            try:
+                import yaml  # noqa: F401
+                changed, error = reload_user_presets(yaml_path, force=True)
+                assert error is None and changed == {"SDXL", "My Model"}, f"YAML should replace the JSON presets: {changed}"
+                assert format_resolution(896, 1600) in get_resolution_list("SDXL")
+            except ImportError:
+                print("  - PyYAML not installed, skipping YAML")
+        finally:
+            changed, _ = reload_user_presets(os.path.join(root, "missing.json"), force=True)
+        assert "My Model" not in MODEL_RESOLUTIONS and format_resolution(1600, 896) not in get_resolution_list("SDXL")
+        assert get_resolution_index().valid_sizes["Flux"] is flux_sizes, "Reverting should not rebuild Flux either"
+    print("  ✓ User preset tests passed")
+
+
+def test_user_presets_at_import():
+    """Test a user presets file next to the module is applied when it is first imported"""
+    print("\nTesting user presets at import:")
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copy("resolution_presets.py", root)
+        with open(os.path.join(root, "user_presets.json"), "w") as f:
+            json.dump({"models": {"SDXL": {"landscape": [[1600, 896]]}}}, f)
+        script = ("import json, resolution_presets as p; "
+                  "print(json.dumps([p.get_user_presets_status()['error'], p.get_resolution_list('SDXL')]))")
+        result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+        assert result.returncode == 0, f"Import with user presets failed: {result.stderr}"
+        error, labels = json.loads(result.stdout)
+        assert error is None and format_resolution(1600, 896) in labels, f"User preset should apply at import: {error}"
+    print("  ✓ User presets apply at import")
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("ResolutionSelector Enhancement Tests")
@@ -132,11 +583,28 @@ if __name__ == "__main__":
     try:
         test_gcd()
         test_aspect_ratio()
+        test_aspect_ratio_presets_unchanged()
+        test_classify_aspect_ratios_batch()
         test_format_resolution()
         test_parse_resolution()
         test_model_resolutions()
         test_new_resolutions()
         test_all_resolutions_unique()
+        test_latent_geometry()
+        test_resolution_index()
+        test_snap_dimensions()
+        test_plan_latent_memory()
+        test_presets_route()
+        test_validate_dimensions()
+        test_core_is_torch_free()
+        test_cli()
+        test_filter_resolutions()
+        test_generate_buckets()
+        test_plan_tiles()
+        test_nearest_resolutions_vectorized()
+        test_plan_hires_schedule()
+        test_user_presets()
+        test_user_presets_at_import()
 
         print("\n" + "=" * 60)
         print("✓ ALL TESTS PASSED!")
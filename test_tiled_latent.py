@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for tiling mode and the lazy tile plan
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import torch
+
+from resolution_selector import LatentPool, ResolutionSelector
+
+
+def test_tiled_latent_plan():
+    """Test tiling mode emits a lazy tile plan instead of a monolithic latent"""
+    print("Testing tiled latent plan:")
+    node = ResolutionSelector()
+    node._latent_pool = LatentPool()
+    output = node.select_resolution("SDXL", "2048x2048    (1:1 Square)", "4x", 2, tile_size=1024, tile_overlap=64)
+    result = output["result"]
+    tiles = result[10]
+    assert result[2]["samples"].stride() == (0, 0, 0, 0), "Tiling mode should not build the full latent"
+    assert len(tiles) == 81 and output["ui"]["tile_plan"][0]["tiles"] == 81, "8192px at 1024px tiles is a 9x9 grid"
+    assert node._latent_pool.stats()["misses"] == 0, "Tiles should only be built on demand"
+
+    canvas = torch.zeros(1, 1, 1024, 1024)
+    for index, (box, latent) in enumerate(tiles):
+        assert latent["samples"].shape == (2, 4, 128, 128), f"Bad tile latent shape {latent['samples'].shape}"
+        x, y, w, h = tiles.latent_box(index)
+        canvas[:, :, y:y + h, x:x + w] += tiles.blend_weights(index)
+    assert torch.allclose(canvas, torch.ones_like(canvas)), "Blend weights should sum to 1 over the image"
+
+    stats = node._latent_pool.stats()
+    assert stats["misses"] == 1 and stats["bytes"] == 2 * 4 * 128 * 128 * 4, "Peak memory should be one tile"
+
+    plain = node.select_resolution("SDXL", "1024x1024    (1:1 Square)")["result"][10]
+    assert len(plain) == 1 and plain.tile_box(0) == (0, 0, 1024, 1024), "Without tiling the plan is one full tile"
+    again = node.select_resolution("SDXL", "1024x1024    (1:1 Square)")["result"][10]
+    assert again is plain, "The untiled plan should be built once and reused"
+    assert node.select_resolution("SDXL", "1024x1024    (1:1 Square)", batch_size=2)["result"][10] is not plain, \
+        "A different batch needs its own plan"
+    print("  ✓ Tiled latent plan tests passed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Tiled Latent Tests")
+    print("=" * 60)
+
+    try:
+        test_tiled_latent_plan()
+
+        print("\n" + "=" * 60)
+        print("✓ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n✗ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
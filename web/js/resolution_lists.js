@@ -0,0 +1,143 @@
+// Pure helpers for building, filtering and windowing resolution lists.
+// No ComfyUI imports, so the same module runs in the browser and under Node
+// (see bench_resolution_lists.mjs).
+
+// "1920x1080    (16:9 Landscape)" -> width, height, ratio, orientation
+const LABEL_PATTERN = /^(\d+)x(\d+)\s*\(([^ )]+)\s+([^)]+)\)/;
+
+export function parseLabel(label) {
+    const match = LABEL_PATTERN.exec(label);
+    if (!match) {
+        return { label, width: 0, height: 0, ratio: "", orientation: "", megapixels: 0, search: label.toLowerCase() };
+    }
+    const width = Number(match[1]);
+    const height = Number(match[2]);
+    return {
+        label,
+        width,
+        height,
+        ratio: match[3],
+        orientation: match[4],
+        megapixels: (width * height) / 1e6,
+        search: label.toLowerCase(),
+    };
+}
+
+export function getResolutionsForModel(presets, model, source = "presets") {
+    const curated = presets.resolutions[model] || [];
+    if (source === "presets") return curated;
+
+    const buckets = presets.buckets[model] || [];
+    if (source === "buckets") return buckets;
+
+    // "both": presets followed by generated buckets not already listed
+    const listed = new Set(curated);
+    return curated.concat(buckets.filter((label) => !listed.has(label)));
+}
+
+export function getDefaultResolution(presets, model) {
+    return presets.defaults[model] || presets.defaults["All"];
+}
+
+// Memoized per-model lists for one presets payload. Every selector node on the
+// page shares the same instance, so switching models is a Map lookup instead of
+// a rebuild. Returned arrays are shared and must not be mutated.
+export function createResolutionLists(presets) {
+    const labelCache = new Map();
+    const entryCache = new Map();
+    const setCache = new Map();
+
+    const labels = (model, source = "presets") => {
+        const key = `${source}\u0000${model}`;
+        let list = labelCache.get(key);
+        if (!list) {
+            list = getResolutionsForModel(presets, model, source);
+            labelCache.set(key, list);
+        }
+        return list;
+    };
+
+    return {
+        presets,
+        labels,
+
+        // Parsed entries, built on first use (only the picker needs them)
+        entries(model, source = "presets") {
+            const key = `${source}\u0000${model}`;
+            let list = entryCache.get(key);
+            if (!list) {
+                list = labels(model, source).map(parseLabel);
+                entryCache.set(key, list);
+            }
+            return list;
+        },
+
+        // O(1) membership checks instead of Array.includes on long lists
+        has(model, source, label) {
+            const key = `${source}\u0000${model}`;
+            let set = setCache.get(key);
+            if (!set) {
+                set = new Set(labels(model, source));
+                setCache.set(key, set);
+            }
+            return set.has(label);
+        },
+
+        defaultFor(model) {
+            return getDefaultResolution(presets, model);
+        },
+    };
+}
+
+// Search syntax: plain words match the label text, "16:9" matches a ratio,
+// "portrait"/"landscape"/"square" an orientation, and ">1.5mp" / "<4mp" bound
+// the megapixels. All terms must match.
+const ORIENTATIONS = new Set(["portrait", "landscape", "square"]);
+const MEGAPIXEL_PATTERN = /^([<>]=?)(\d+(?:\.\d+)?)mp$/;
+const RATIO_PATTERN = /^\d+:\d+$/;
+
+export function parseQuery(text) {
+    const query = { words: [], ratio: null, orientation: null, minMegapixels: 0, maxMegapixels: Infinity };
+    for (const term of text.toLowerCase().split(/\s+/)) {
+        if (!term) continue;
+        const megapixels = MEGAPIXEL_PATTERN.exec(term);
+        if (megapixels) {
+            const value = Number(megapixels[2]);
+            if (megapixels[1][0] === ">") query.minMegapixels = Math.max(query.minMegapixels, value);
+            else query.maxMegapixels = Math.min(query.maxMegapixels, value);
+        } else if (RATIO_PATTERN.test(term)) {
+            query.ratio = term;
+        } else if (ORIENTATIONS.has(term)) {
+            query.orientation = term;
+        } else {
+            query.words.push(term);
+        }
+    }
+    return query;
+}
+
+export function filterEntries(entries, query) {
+    if (typeof query === "string") query = parseQuery(query);
+    const { words, ratio, orientation, minMegapixels, maxMegapixels } = query;
+    const unfiltered = !words.length && !ratio && !orientation && minMegapixels === 0 && maxMegapixels === Infinity;
+    if (unfiltered) return entries;
+
+    return entries.filter((entry) => {
+        if (ratio && entry.ratio !== ratio) return false;
+        if (orientation && entry.orientation.toLowerCase() !== orientation) return false;
+        if (entry.megapixels < minMegapixels || entry.megapixels > maxMegapixels) return false;
+        for (const word of words) {
+            if (!entry.search.includes(word)) return false;
+        }
+        return true;
+    });
+}
+
+// Rows to render for a scroll position: [start, end) plus a few rows of
+// overscan either side, and the offset of the first rendered row.
+export function visibleRange(scrollTop, viewportHeight, rowHeight, total, overscan = 4) {
+    const first = Math.floor(scrollTop / rowHeight);
+    const start = Math.max(0, first - overscan);
+    const end = Math.min(total, first + Math.ceil(viewportHeight / rowHeight) + overscan);
+    return { start, end: Math.max(start, end), offsetTop: start * rowHeight, totalHeight: total * rowHeight };
+}
@@ -1,174 +1,190 @@
 import { app } from "/scripts/app.js";
-
-// Model-specific resolution presets with constraints
-// Includes: model-optimized sizes + photo print (4x6, 5x7, 8x10) + digital/social + canvas art ratios
-const MODEL_RESOLUTIONS = {
-    "Flux": {
-        "square": [[512, 512], [768, 768], [1024, 1024], [1088, 1088], [1280, 1280], [1536, 1536], [1920, 1920], [2048, 2048]],
-        "portrait": [[688, 2048], [768, 1344], [832, 1216], [896, 1152], [928, 1664], [1024, 1536], [1024, 1792], [1024, 2048], [1088, 1920], [1152, 2048], [1200, 1792], [1360, 2048], [1456, 2048], [1536, 2048], [1616, 2048], [1632, 2048], [1712, 2048]],
-        "landscape": [[1280, 720], [1344, 768], [1216, 832], [1152, 896], [1536, 1024], [1664, 928], [1792, 1024], [1792, 1200], [1920, 1088], [2048, 688], [2048, 1024], [2048, 1152], [2048, 1360], [2048, 1456], [2048, 1536], [2048, 1616], [2048, 1632], [2048, 1712]],
-    },
-    "Qwen Image": {
-        "square": [[1024, 1024], [1080, 1080], [1280, 1280], [1328, 1328], [1536, 1536], [1920, 1920], [2048, 2048]],
-        "portrait": [[680, 2048], [928, 1664], [1024, 1536], [1024, 2048], [1080, 1920], [1140, 1472], [1152, 2048], [1200, 1800], [1368, 2048], [1464, 2048], [1536, 2048], [1608, 2048], [1640, 2048], [1704, 2048]],
-        "landscape": [[1280, 720], [1472, 1140], [1536, 1024], [1664, 928], [1800, 1200], [1920, 1080], [2048, 680], [2048, 1024], [2048, 1152], [2048, 1368], [2048, 1464], [2048, 1536], [2048, 1608], [2048, 1640], [2048, 1704]],
-    },
-    "Z-Image": {
-        "square": [[512, 512], [768, 768], [1024, 1024], [1080, 1080], [1280, 1280], [1536, 1536], [1920, 1920], [2048, 2048]],
-        "portrait": [[680, 2048], [720, 1280], [768, 1024], [1024, 2048], [1080, 1920], [1152, 2048], [1200, 1800], [1368, 2048], [1464, 2048], [1536, 2048], [1608, 2048], [1640, 2048], [1704, 2048]],
-        "landscape": [[1024, 768], [1280, 720], [1800, 1200], [1920, 1080], [2048, 680], [2048, 1024], [2048, 1152], [2048, 1368], [2048, 1464], [2048, 1536], [2048, 1608], [2048, 1640], [2048, 1704]],
-    },
-    "SD 1.5": {
-        "square": [[512, 512], [768, 768], [1024, 1024], [1080, 1080], [1280, 1280], [1536, 1536]],
-        "portrait": [[512, 768], [512, 682], [512, 1024], [680, 2048], [768, 1024], [768, 1344], [1024, 2048], [1080, 1920], [1200, 1800], [1368, 2048], [1464, 2048], [1536, 2048], [1608, 2048], [1640, 2048], [1704, 2048]],
-        "landscape": [[768, 512], [1024, 512], [1024, 768], [1280, 720], [1344, 768], [1536, 512], [1800, 1200], [1920, 1080], [2048, 680], [2048, 1024], [2048, 1368], [2048, 1464], [2048, 1536], [2048, 1608], [2048, 1640], [2048, 1704]],
-    },
-    "SDXL": {
-        "square": [[1024, 1024], [1080, 1080], [1280, 1280], [1536, 1536], [1920, 1920], [2048, 2048]],
-        "portrait": [[640, 1536], [680, 2048], [768, 1344], [832, 1216], [896, 1152], [1024, 1536], [1024, 2048], [1080, 1920], [1152, 2048], [1200, 1800], [1368, 2048], [1464, 2048], [1536, 2048], [1608, 2048], [1640, 2048], [1704, 2048]],
-        "landscape": [[1152, 896], [1216, 832], [1280, 720], [1344, 768], [1536, 640], [1536, 1024], [1800, 1200], [1920, 1080], [2048, 680], [2048, 1024], [2048, 1152], [2048, 1368], [2048, 1464], [2048, 1536], [2048, 1608], [2048, 1640], [2048, 1704]],
-    }
-};
-
-function gcd(a, b) {
-    while (b !== 0) {
-        const temp = b;
-        b = a % b;
-        a = temp;
+import { api } from "/scripts/api.js";
+import { createResolutionLists, filterEntries, visibleRange } from "./resolution_lists.js";
+
+// Preset index served by the Python node (single source of truth for all labels)
+const PRESETS_ROUTE = "/resolution_selector/presets";
+
+let presetsPromise = null;
+let currentLists = null;
+
+function loadPresets() {
+    // Fetch once per page (and again after a node definition refresh); the server
+    // answers revalidations with 304 via ETag. Resolves to memoized lists shared by
+    // every selector node on the page.
+    if (!presetsPromise) {
+        presetsPromise = api.fetchApi(PRESETS_ROUTE)
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then((presets) => (currentLists = createResolutionLists(presets)))
+            .catch((error) => {
+                console.error("ResolutionSelector: Failed to load presets", error);
+                presetsPromise = null;
+                return null;
+            });
     }
-    return a;
+    return presetsPromise;
 }
 
-function calculateAspectRatio(width, height) {
-    // Calculate actual ratio as decimal
-    const actualRatio = width / height;
-
-    // Common aspect ratios [ratio_value, "width:height" string]
-    const commonRatios = [
-        [1.0, "1:1"],      // Square
-        [1.25, "5:4"],     // 1.25
-        [1.33, "4:3"],     // 1.333...
-        [1.5, "3:2"],      // 1.5
-        [1.6, "16:10"],    // 1.6
-        [1.78, "16:9"],    // 1.777...
-        [2.0, "2:1"],      // 2.0
-        [2.35, "21:9"],    // 2.333... (ultrawide)
-        [2.4, "12:5"],     // 2.4
-        [3.0, "3:1"],      // 3.0
-        // Portrait ratios
-        [0.75, "3:4"],     // 0.75
-        [0.67, "2:3"],     // 0.666...
-        [0.625, "5:8"],    // 0.625
-        [0.56, "9:16"],    // 0.5625
-        [0.5, "1:2"],      // 0.5
-        [0.42, "5:12"],    // 0.4166...
-        [0.33, "1:3"],     // 0.333... (panoramic)
-    ];
-
-    // Find closest common ratio by absolute difference
-    let closestRatio = commonRatios[0];
-    let minDiff = Math.abs(actualRatio - closestRatio[0]);
-
-    for (const ratio of commonRatios) {
-        const diff = Math.abs(actualRatio - ratio[0]);
-        if (diff < minDiff) {
-            minDiff = diff;
-            closestRatio = ratio;
-        }
-    }
+// Picker geometry: rows are fixed height so only the visible window is rendered
+const PICKER_ROW_HEIGHT = 24;
+const PICKER_VIEWPORT_HEIGHT = 360;
 
-    return closestRatio[1];
-}
+let activePicker = null;
 
-function formatResolution(width, height) {
-    const aspectRatio = calculateAspectRatio(width, height);
-    let orientation;
-
-    if (width === height) {
-        orientation = "Square";
-    } else if (width < height) {
-        orientation = "Portrait";
-    } else {
-        orientation = "Landscape";
+function closeResolutionPicker() {
+    if (activePicker) {
+        activePicker.remove();
+        activePicker = null;
     }
+}
 
-    // Format with fixed width for better alignment
-    const resolutionStr = `${width}x${height}`;
-    const paddedResolution = resolutionStr.padEnd(13, ' '); // Pad to 13 chars for alignment
+function openResolutionPicker(node, lists) {
+    const modelWidget = node.widgets.find(w => w.name === "model");
+    const resolutionWidget = node.widgets.find(w => w.name === "resolution");
+    const sourceWidget = node.widgets.find(w => w.name === "resolution_source");
+    if (!modelWidget || !resolutionWidget) return;
+
+    closeResolutionPicker();
+    const entries = lists.entries(modelWidget.value, sourceWidget ? sourceWidget.value : "presets");
+    let filtered = entries;
+
+    const panel = document.createElement("div");
+    Object.assign(panel.style, {
+        position: "fixed", top: "20%", left: "50%", transform: "translateX(-50%)", width: "360px", zIndex: 10000,
+        background: "var(--comfy-menu-bg)", color: "var(--fg-color)", border: "1px solid var(--border-color)",
+        borderRadius: "6px", padding: "8px", boxShadow: "0 4px 16px rgba(0, 0, 0, 0.5)", fontSize: "13px",
+    });
+
+    const input = document.createElement("input");
+    input.type = "search";
+    input.placeholder = "Filter: 16:9 portrait >2mp 1024";
+    Object.assign(input.style, { width: "100%", boxSizing: "border-box", marginBottom: "6px" });
+
+    const status = document.createElement("div");
+    Object.assign(status.style, { opacity: 0.7, marginBottom: "4px" });
+
+    const viewport = document.createElement("div");
+    Object.assign(viewport.style, { height: `${PICKER_VIEWPORT_HEIGHT}px`, overflowY: "auto", position: "relative" });
+    const spacer = document.createElement("div");
+    const rows = document.createElement("div");
+    Object.assign(rows.style, { position: "absolute", left: 0, right: 0, top: 0 });
+    spacer.appendChild(rows);
+    viewport.appendChild(spacer);
+    panel.append(input, status, viewport);
+
+    const choose = (label) => {
+        resolutionWidget.value = label;
+        resolutionWidget.callback?.(label);
+        node.setDirtyCanvas(true, true);
+        closeResolutionPicker();
+    };
 
-    return `${paddedResolution}(${aspectRatio} ${orientation})`;
-}
+    const render = () => {
+        const { start, end, offsetTop, totalHeight } = visibleRange(
+            viewport.scrollTop, PICKER_VIEWPORT_HEIGHT, PICKER_ROW_HEIGHT, filtered.length
+        );
+        spacer.style.height = `${totalHeight}px`;
+        rows.style.transform = `translateY(${offsetTop}px)`;
+        const visible = [];
+        for (let i = start; i < end; i++) {
+            const row = document.createElement("div");
+            row.textContent = filtered[i].label;
+            row.dataset.label = filtered[i].label;
+            Object.assign(row.style, {
+                height: `${PICKER_ROW_HEIGHT}px`, lineHeight: `${PICKER_ROW_HEIGHT}px`, cursor: "pointer",
+                whiteSpace: "pre", fontFamily: "monospace", padding: "0 4px",
+                background: filtered[i].label === resolutionWidget.value ? "var(--comfy-input-bg)" : "",
+            });
+            visible.push(row);
+        }
+        rows.replaceChildren(...visible);
+        status.textContent = `${filtered.length} of ${entries.length} resolutions`;
+    };
 
-function getAllResolutions() {
-    const uniqueResolutions = new Map();
-
-    // Collect all unique width×height pairs
-    for (const modelName in MODEL_RESOLUTIONS) {
-        const modelData = MODEL_RESOLUTIONS[modelName];
-        for (const category of ["square", "portrait", "landscape"]) {
-            if (modelData[category]) {
-                for (const [w, h] of modelData[category]) {
-                    const key = `${w}x${h}`;
-                    if (!uniqueResolutions.has(key)) {
-                        uniqueResolutions.set(key, { width: w, height: h, pixels: w * h });
-                    }
-                }
-            }
+    let frame = 0;
+    viewport.addEventListener("scroll", () => {
+        if (!frame) {
+            frame = requestAnimationFrame(() => {
+                frame = 0;
+                render();
+            });
         }
-    }
+    });
+    rows.addEventListener("click", (event) => {
+        const label = event.target.dataset?.label;
+        if (label) choose(label);
+    });
+    input.addEventListener("input", () => {
+        filtered = filterEntries(entries, input.value);
+        viewport.scrollTop = 0;
+        render();
+    });
+    input.addEventListener("keydown", (event) => {
+        if (event.key === "Escape") closeResolutionPicker();
+        if (event.key === "Enter" && filtered.length > 0) choose(filtered[0].label);
+    });
+
+    // Close on any click outside the panel
+    const onPointerDown = (event) => {
+        if (!panel.contains(event.target)) {
+            document.removeEventListener("pointerdown", onPointerDown, true);
+            closeResolutionPicker();
+        }
+    };
+    document.addEventListener("pointerdown", onPointerDown, true);
 
-    // Sort by total pixels, then by width
-    const sorted = Array.from(uniqueResolutions.values())
-        .sort((a, b) => {
-            if (a.pixels !== b.pixels) return a.pixels - b.pixels;
-            return a.width - b.width;
-        });
+    document.body.appendChild(panel);
+    activePicker = panel;
 
-    return sorted.map(({ width, height }) => formatResolution(width, height));
+    // Start scrolled to the current value
+    const current = entries.findIndex((entry) => entry.label === resolutionWidget.value);
+    if (current > 0) viewport.scrollTop = current * PICKER_ROW_HEIGHT;
+    render();
+    input.focus();
 }
 
-function getResolutionsForModel(model) {
-    if (model === "All") {
-        return getAllResolutions();
-    }
+// Narrow a node's resolution dropdown to its model, keeping the value when still listed
+function applyResolutionList(node, lists) {
+    const modelWidget = node.widgets.find(w => w.name === "model");
+    const sourceWidget = node.widgets.find(w => w.name === "resolution_source");
+    const resolutionWidget = node.widgets.find(w => w.name === "resolution");
+    if (!modelWidget || !resolutionWidget) return;
 
-    const modelData = MODEL_RESOLUTIONS[model];
-    if (!modelData) return [];
+    const source = sourceWidget ? sourceWidget.value : "presets";
+    const resolutions = lists.labels(modelWidget.value, source);
+    if (resolutions.length > 0) {
+        resolutionWidget.options.values = resolutions;
 
-    const resolutions = [];
-    for (const category of ["square", "portrait", "landscape"]) {
-        if (modelData[category]) {
-            for (const [w, h] of modelData[category]) {
-                resolutions.push(formatResolution(w, h));
-            }
+        if (!lists.has(modelWidget.value, source, resolutionWidget.value)) {
+            resolutionWidget.value = resolutions[0];
         }
     }
-    return resolutions;
-}
-
-function getDefaultResolution(model) {
-    // Model-specific native/optimal resolutions
-    const defaultResolutions = {
-        "Flux": [1024, 1024],
-        "Qwen Image": [1328, 1328],
-        "Z-Image": [1024, 1024],
-        "SD 1.5": [512, 512],
-        "SDXL": [1024, 1024],
-        "All": [1024, 1024]
-    };
-
-    if (defaultResolutions[model]) {
-        const [w, h] = defaultResolutions[model];
-        return formatResolution(w, h);
-    }
-
-    // Fallback
-    return formatResolution(1024, 1024);
 }
 
 app.registerExtension({
     name: "ResolutionSelector.DynamicDropdown",
 
+    async beforeRegisterNodeDef(nodeType, nodeData) {
+        if (nodeData.name !== "ResolutionSelector") return;
+
+        const origGetExtraMenuOptions = nodeType.prototype.getExtraMenuOptions;
+        nodeType.prototype.getExtraMenuOptions = function(canvas, options) {
+            origGetExtraMenuOptions?.apply(this, arguments);
+            options.unshift({
+                content: "Search resolutions...",
+                callback: async () => {
+                    const lists = await loadPresets();
+                    if (lists) openResolutionPicker(this, lists);
+                },
+            });
+        };
+    },
+
     async nodeCreated(node) {
         if (node.comfyClass !== "ResolutionSelector") return;
 
@@ -177,6 +193,7 @@ app.registerExtension({
 
         const modelWidget = node.widgets.find(w => w.name === "model");
         const resolutionWidget = node.widgets.find(w => w.name === "resolution");
+        const sourceWidget = node.widgets.find(w => w.name === "resolution_source");
 
         if (!modelWidget || !resolutionWidget) {
             console.error("ResolutionSelector: Required widgets not found");
@@ -184,9 +201,13 @@ app.registerExtension({
         }
 
         const origCallback = modelWidget.callback;
+        if (!(await loadPresets())) return;
 
         const updateResolutions = (modelValue) => {
-            const resolutions = getResolutionsForModel(modelValue);
+            // Read at call time so user preset reloads reach existing nodes
+            const lists = currentLists;
+            const source = sourceWidget ? sourceWidget.value : "presets";
+            const resolutions = lists.labels(modelValue, source);
 
             if (resolutions.length === 0) {
                 console.warn(`ResolutionSelector: No resolutions found for model ${modelValue}`);
@@ -196,10 +217,10 @@ app.registerExtension({
             resolutionWidget.options.values = resolutions;
 
             // Set to model-specific default resolution
-            const defaultRes = getDefaultResolution(modelValue);
-            if (resolutions.includes(defaultRes)) {
+            const defaultRes = lists.defaultFor(modelValue);
+            if (lists.has(modelValue, source, defaultRes)) {
                 resolutionWidget.value = defaultRes;
-            } else if (!resolutions.includes(resolutionWidget.value)) {
+            } else if (!lists.has(modelValue, source, resolutionWidget.value)) {
                 // Fallback to first resolution if default not found
                 resolutionWidget.value = resolutions[0];
             }
@@ -214,6 +235,16 @@ app.registerExtension({
             updateResolutions(value);
         };
 
+        if (sourceWidget) {
+            const origSourceCallback = sourceWidget.callback;
+            sourceWidget.callback = function(value) {
+                if (origSourceCallback) {
+                    origSourceCallback.apply(this, arguments);
+                }
+                updateResolutions(modelWidget.value);
+            };
+        }
+
         setTimeout(() => {
             updateResolutions(modelWidget.value);
         }, 10);
@@ -222,18 +253,19 @@ app.registerExtension({
     async loadedGraphNode(node) {
         if (node.comfyClass !== "ResolutionSelector") return;
 
-        const modelWidget = node.widgets.find(w => w.name === "model");
-        if (modelWidget) {
-            const resolutions = getResolutionsForModel(modelWidget.value);
-            const resolutionWidget = node.widgets.find(w => w.name === "resolution");
-
-            if (resolutionWidget && resolutions.length > 0) {
-                resolutionWidget.options.values = resolutions;
+        const lists = await loadPresets();
+        if (lists) applyResolutionList(node, lists);
+    },
 
-                if (!resolutions.includes(resolutionWidget.value)) {
-                    resolutionWidget.value = resolutions[0];
-                }
-            }
+    // Node definitions were re-fetched (e.g. after editing user presets): refetch the
+    // lists and re-narrow every selector's dropdown
+    async refreshComboInNodes() {
+        presetsPromise = null;
+        const lists = await loadPresets();
+        if (!lists) return;
+        for (const node of app.graph._nodes) {
+            if (node.comfyClass === "ResolutionSelector") applyResolutionList(node, lists);
         }
+        app.graph.setDirtyCanvas(true, true);
     }
 });